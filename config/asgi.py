@@ -13,4 +13,12 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Importes apres get_asgi_application() : les reglages sont charges.
+from django.conf import settings  # noqa: E402
+
+from core.asgi import ConcurrencyLimit  # noqa: E402
+
+# Profil de deploiement : config/gunicorn_asgi.py
+application = ConcurrencyLimit(django_application, settings.ASGI_MAX_CONCURRENCY)
@@ -0,0 +1,43 @@
+"""Profil de deploiement ASGI : Gunicorn avec des workers Uvicorn.
+
+Le profil par defaut (workers synchrones, config.wsgi) sert une requete a
+la fois par worker : une recherche lente bloque le worker entier. Ici
+chaque worker est une boucle d'evenements (paquet uvicorn-worker) qui sert
+les vues asynchrones de core/async_views.py (ASYNC_VIEWS, pose ci-dessous).
+
+Unite systemd (meme socket que nginx, voir le fichier nginx) :
+
+    ExecStart=/var/www/horusglobalservices/horusglobalservices/venv/bin/gunicorn \\
+        -c config/gunicorn_asgi.py config.asgi:application
+
+En local, pour comparer les deux profils (benchmark_concurrency) :
+
+    gunicorn config.wsgi:application -w 3 -b 127.0.0.1:8001
+    GUNICORN_BIND=127.0.0.1:8002 gunicorn -c config/gunicorn_asgi.py config.asgi:application
+
+Variables d'environnement : GUNICORN_BIND, GUNICORN_WORKERS,
+GUNICORN_TIMEOUT, et ASGI_MAX_CONCURRENCY (requetes en cours par worker,
+voir core/asgi.py).
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "unix:/var/www/horusglobalservices/horusglobalservices/horus.sock")
+worker_class = "uvicorn_worker.UvicornWorker"
+# Une boucle par coeur suffit : l'attente (base, cache) ne bloque plus le worker.
+workers = int(os.getenv("GUNICORN_WORKERS", str(multiprocessing.cpu_count())))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = 30
+keepalive = 5
+# Recycle les workers : borne la memoire d'un processus de longue duree.
+max_requests = 5000
+max_requests_jitter = 500
+
+raw_env = [
+    "ASYNC_VIEWS=True",
+    # Sous ASGI, chaque requete a son thread (sync_to_async) et donc ses
+    # connexions : une connexion persistante ne serait jamais reutilisee.
+    # (Sans effet avec le pool, DB_POOL, qui les rend a chaque fin de requete.)
+    "DB_CONN_MAX_AGE=0",
+]
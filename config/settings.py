@@ -3,6 +3,7 @@
 # ------------------------------------------------------------
 import os
 from pathlib import Path
+from urllib.parse import urlsplit
 
 from dotenv import load_dotenv
 from django.urls import reverse_lazy
@@ -65,6 +66,12 @@ CSRF_TRUSTED_ORIGINS = env_csv(
 # ------------------------------------------------------------
 ROOT_URLCONF = "config.urls"
 WSGI_APPLICATION = "config.wsgi.application"
+ASGI_APPLICATION = "config.asgi.application"
+# Profil ASGI (config/gunicorn_asgi.py) : pages publiques en vues asynchrones
+# (core/async_views.py). Sous Gunicorn synchrone, laisser a False.
+ASYNC_VIEWS = env_bool("ASYNC_VIEWS", "False")
+# Requetes HTTP traitees en meme temps par worker ASGI (core/asgi.py) ; 0 : sans limite.
+ASGI_MAX_CONCURRENCY = env_int("ASGI_MAX_CONCURRENCY", "8")
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 LANGUAGE_CODE = "fr-fr"
@@ -103,6 +110,10 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    # Server-Timing (personnel) + capture des requetes lentes (core/profiling.py)
+    "core.profiling.ProfilingMiddleware",
+    # HTML / XML des vues : minifie + Brotli / gzip (core/compression.py)
+    "core.compression.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -111,15 +122,38 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+if ASYNC_VIEWS and not DEBUG:
+    # WhiteNoiseMiddleware n'est que synchrone : sous ASGI, il obligerait
+    # chaque requete a repasser par un thread. nginx sert deja /static/.
+    MIDDLEWARE.remove("whitenoise.middleware.WhiteNoiseMiddleware")
+
 # ------------------------------------------------------------
 # Templates
 # ------------------------------------------------------------
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # DjangoTemplates + mesure du temps de rendu (core/profiling.py)
+        "BACKEND": "core.profiling.ProfiledTemplates",
         "DIRS": [BASE_DIR / "templates"],
-        "APP_DIRS": True,
         "OPTIONS": {
+            # Gabarits compiles une fois par processus en production ; relus a
+            # chaque requete en developpement.
+            "loaders": (
+                [
+                    "django.template.loaders.filesystem.Loader",
+                    "django.template.loaders.app_directories.Loader",
+                ]
+                if DEBUG
+                else [
+                    (
+                        "django.template.loaders.cached.Loader",
+                        [
+                            "django.template.loaders.filesystem.Loader",
+                            "django.template.loaders.app_directories.Loader",
+                        ],
+                    )
+                ]
+            ),
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
@@ -148,6 +182,25 @@ if USE_SQLITE:
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": BASE_DIR / "db.sqlite3",
+            "OPTIONS": {
+                # Attente d'un verrou (s) avant "database is locked".
+                "timeout": env_int("DB_SQLITE_TIMEOUT", "20"),
+                # BEGIN IMMEDIATE : une transaction d'ecriture attend le verrou
+                # des son debut. En DEFERRED, deux transactions qui lisent puis
+                # ecrivent s'interbloquent et l'une echoue sans attendre.
+                "transaction_mode": "IMMEDIATE",
+                # Executees a chaque nouvelle connexion. WAL : les lectures ne
+                # bloquent plus les ecritures (formulaire de contact) ni
+                # l'inverse ; synchronous=NORMAL suffit en WAL (pas de
+                # corruption possible, au pire la derniere transaction perdue
+                # en cas de coupure de courant).
+                "init_command": ";".join([
+                    "PRAGMA journal_mode=WAL",
+                    "PRAGMA synchronous=NORMAL",
+                    f"PRAGMA mmap_size={env_int('DB_SQLITE_MMAP_SIZE', str(128 * 1024 * 1024))}",
+                    "PRAGMA temp_store=MEMORY",
+                ]),
+            },
         }
     }
 else:
@@ -156,6 +209,8 @@ else:
     DB_PASSWORD = os.getenv("DB_PASSWORD", "").strip()
     DB_HOST = os.getenv("DB_HOST", "localhost").strip()
     DB_PORT = os.getenv("DB_PORT", "5432").strip()
+    # Pool de connexions psycopg 3 (paquet psycopg-pool)
+    DB_POOL = env_bool("DB_POOL", "True")
 
     # Check "prod" : credentials obligatoires
     if IS_PROD:
@@ -183,9 +238,64 @@ else:
             "PASSWORD": DB_PASSWORD,
             "HOST": DB_HOST,
             "PORT": DB_PORT,
-            "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "60")),
+            # Connexion verifiee avant reutilisation (et par le pool).
+            "CONN_HEALTH_CHECKS": env_bool("DB_CONN_HEALTH_CHECKS", "True"),
+            # Le pool remplace les connexions persistantes (incompatibles).
+            "CONN_MAX_AGE": 0 if DB_POOL else env_int("DB_CONN_MAX_AGE", "60"),
         }
     }
+    if DB_POOL:
+        # Pool psycopg 3 par processus : max_size connexions au plus par
+        # worker, donc workers x DB_POOL_MAX_SIZE au plus pour le serveur
+        # (a garder sous max_connections de PostgreSQL).
+        DATABASES["default"]["OPTIONS"] = {
+            "pool": {
+                "min_size": env_int("DB_POOL_MIN_SIZE", "1"),
+                # Une connexion est gardee pendant toute la requete : sous ASGI,
+                # autant que de requetes simultanees (ASGI_MAX_CONCURRENCY).
+                "max_size": env_int("DB_POOL_MAX_SIZE", "8"),
+                # Attente maximale d'une connexion libre (s), puis PoolTimeout.
+                "timeout": env_int("DB_POOL_TIMEOUT", "10"),
+                # Requetes en attente au-dela desquelles le pool refuse (0 : sans limite).
+                "max_waiting": env_int("DB_POOL_MAX_WAITING", "0"),
+                # Connexions inactives fermees au-dela de min_size (s).
+                "max_idle": env_int("DB_POOL_MAX_IDLE", "300"),
+                # Connexions recyclees (s) : fuites memoire cote serveur, bascules.
+                "max_lifetime": env_int("DB_POOL_MAX_LIFETIME", "3600"),
+            },
+        }
+
+# Replicas de lecture (optionnel, core/replicas.py) : pages publiques, flux
+# et sitemap. SQLite : chemins de fichiers ; PostgreSQL : HOTE[:PORT][/BASE],
+# le reste (et ce qui manque) repris de "default".
+DATABASE_REPLICAS = []
+for index, replica in enumerate(env_csv("DB_REPLICAS"), start=1):
+    alias = f"replica{index}"
+    DATABASES[alias] = {**DATABASES["default"], "OPTIONS": dict(DATABASES["default"].get("OPTIONS", {}))}
+    if USE_SQLITE:
+        DATABASES[alias]["NAME"] = BASE_DIR / replica
+    else:
+        url = urlsplit(f"//{replica}")
+        DATABASES[alias].update(
+            HOST=url.hostname or DB_HOST,
+            PORT=str(url.port or DB_PORT),
+            NAME=url.path.lstrip("/") or DB_NAME,
+        )
+    # Les tests lisent les replicas dans la base de test de "default".
+    DATABASES[alias]["TEST"] = {"MIRROR": "default"}
+    DATABASE_REPLICAS.append(alias)
+
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ["core.replicas.ReplicaRouter"]
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index("django.contrib.sessions.middleware.SessionMiddleware"),
+        "core.replicas.ReplicaMiddleware",
+    )
+# Epinglage sur "default" apres un POST (lire ses propres ecritures) et apres
+# une invalidation du cache de pages, en s : au-dela du retard des replicas.
+DB_REPLICA_PIN_SECONDS = env_int("DB_REPLICA_PIN_SECONDS", "10")
+# Un replica en echec n'est retente qu'apres ce delai (s), sauf si tous le sont.
+DB_REPLICA_RETRY_SECONDS = env_int("DB_REPLICA_RETRY_SECONDS", "30")
 
 # ------------------------------------------------------------
 # Auth / Sites
@@ -267,6 +377,12 @@ LOGGING = {
             "filename": str(LOG_DIR / "app-error.log"),
             "formatter": "verbose",
         },
+        "slow": {
+            "level": "WARNING",
+            "class": "logging.FileHandler",
+            "filename": str(LOG_DIR / "slow-requests.log"),
+            "formatter": "verbose",
+        },
     },
     "loggers": {
         "django": {
@@ -274,6 +390,12 @@ LOGGING = {
             "level": "INFO" if DEBUG else "ERROR",
             "propagate": True,
         },
+        # Requetes plus lentes que PROFILING_SLOW_MS (core/profiling.py)
+        "core.profiling": {
+            "handlers": ["console", "slow"] if DEBUG else ["slow"],
+            "level": "WARNING",
+            "propagate": False,
+        },
     },
 }
 
@@ -303,7 +425,8 @@ if IS_PROD:
 # CKEditor (sans duplication)
 # ------------------------------------------------------------
 CKEDITOR_UPLOAD_PATH = os.getenv("CKEDITOR_UPLOAD_PATH", "uploads/")
-CKEDITOR_IMAGE_BACKEND = os.getenv("CKEDITOR_IMAGE_BACKEND", "pillow")
+# Convertit les uploads en WebP redimensionne (voir core/richtext.py)
+CKEDITOR_IMAGE_BACKEND = os.getenv("CKEDITOR_IMAGE_BACKEND", "core.richtext.OptimizedPillowBackend")
 CKEDITOR_ALLOW_NONIMAGE_FILES = env_bool("CKEDITOR_ALLOW_NONIMAGE_FILES", "False")
 
 FILE_UPLOAD_MAX_MEMORY_SIZE = env_int("FILE_UPLOAD_MAX_MEMORY_SIZE", str(5 * 1024 * 1024))
@@ -386,22 +509,100 @@ UNFOLD = {
                         "badge": "core.unfold_callbacks.unread_contacts_badge",
                         "badge_variant": "warning",
                         "badge_style": "solid",
-                    }
+                    },
+                    {
+                        "title": _("Requêtes lentes"),
+                        "icon": "speed",
+                        "link": reverse_lazy("admin_slow_requests"),
+                    },
                 ],
             }
         ],
     },
 }
 # ------------------------------------------------------------
-# Cache (rate limiting anti-spam)
-# FileBasedCache fonctionne avec Gunicorn multi-workers
+# Cache
+# Partage entre workers Gunicorn sans service externe : LRU par
+# processus devant une base SQLite en WAL (core/cache_backends.py)
 # ------------------------------------------------------------
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
-        "LOCATION": str(BASE_DIR / "cache"),
+        "BACKEND": "core.cache_backends.TieredSQLiteCache",
+        "LOCATION": str(BASE_DIR / "cache" / "cache.sqlite3"),
         "TIMEOUT": 3600,
+        "OPTIONS": {
+            "MAX_ENTRIES": env_int("CACHE_MAX_ENTRIES", "10000"),
+            "LOCAL_MAX_ENTRIES": env_int("CACHE_LOCAL_MAX_ENTRIES", "1000"),
+        },
     }
 }
 
+# ------------------------------------------------------------
+# Limitation de debit (core/ratelimit.py)
+# "database" : fenetre glissante exacte ; "cache" : approchee, atomique
+# seulement avec Redis / Memcached
+# ------------------------------------------------------------
+RATE_LIMIT_STORAGE = os.getenv("RATE_LIMIT_STORAGE", "database")
+RATE_LIMIT_RETENTION = env_int("RATE_LIMIT_RETENTION", "86400")
+
+# ------------------------------------------------------------
+# Cache de pages publiques (core/page_cache.py)
+# Invalide par tags depuis core/signals.py, jamais vide en entier
+# ------------------------------------------------------------
+PAGE_CACHE_ALIAS = "default"
+PAGE_CACHE_TIMEOUT = env_int("PAGE_CACHE_TIMEOUT", "3600")
+
+# ------------------------------------------------------------
+# Sitemaps (core/sitemaps.py)
+# Au-dela de SITEMAP_PAGE_SIZE URL par section, sitemap.xml devient un index
+# ------------------------------------------------------------
+SITEMAP_PAGE_SIZE = env_int("SITEMAP_PAGE_SIZE", "1000")
+SITEMAP_CACHE_TIMEOUT = env_int("SITEMAP_CACHE_TIMEOUT", "86400")
+
+# ------------------------------------------------------------
+# Fragments de base.html (en-tete, pied de page) mis en cache par {% cache %}
+# ------------------------------------------------------------
+FRAGMENT_CACHE_TIMEOUT = env_int("FRAGMENT_CACHE_TIMEOUT", "86400")
+
+# ------------------------------------------------------------
+# Profilage (core/profiling.py) : requetes plus lentes que PROFILING_SLOW_MS
+# gardees (avec SQL et EXPLAIN) dans un tampon de PROFILING_RING_SIZE entrees
+# ------------------------------------------------------------
+PROFILING_ENABLED = env_bool("PROFILING_ENABLED", "True")
+PROFILING_SLOW_MS = env_int("PROFILING_SLOW_MS", "500")
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "1"))
+PROFILING_RING_SIZE = env_int("PROFILING_RING_SIZE", "50")
+
+# ------------------------------------------------------------
+# Admin : au-dela de ce nombre de lignes (estimation PostgreSQL), les listes
+# affichent l'estimation au lieu d'un COUNT(*) (core/admin_search.py)
+# ------------------------------------------------------------
+ADMIN_ESTIMATED_COUNT_THRESHOLD = env_int("ADMIN_ESTIMATED_COUNT_THRESHOLD", "10000")
+
+# ------------------------------------------------------------
+# Compteurs du tableau de bord admin (core/counters.py) : recalcul depuis la
+# base au plus tard toutes les COUNTERS_RECONCILE_INTERVAL secondes
+# ------------------------------------------------------------
+COUNTERS_RECONCILE_INTERVAL = env_int("COUNTERS_RECONCILE_INTERVAL", "900")
+
+# ------------------------------------------------------------
+# Export statique (core/export.py, commande export_site) servi par nginx
+# STATIC_EXPORT_ORIGIN : schema + domaine des pages rendues (canonical,
+# og:image...) ; defaut : premiere origine de CSRF_TRUSTED_ORIGINS
+# ------------------------------------------------------------
+STATIC_EXPORT_ROOT = os.getenv("STATIC_EXPORT_ROOT", str(BASE_DIR / "export"))
+STATIC_EXPORT_ORIGIN = os.getenv(
+    "STATIC_EXPORT_ORIGIN", CSRF_TRUSTED_ORIGINS[0] if CSRF_TRUSTED_ORIGINS else "http://localhost"
+).rstrip("/")
+
 EMAIL_TIMEOUT = int(os.getenv("EMAIL_TIMEOUT", "20"))
+
+# ------------------------------------------------------------
+# Boite d'envoi (core/outbox.py, commande send_outbox)
+# Les vues n'envoient plus d'email pendant la requete
+# ------------------------------------------------------------
+OUTBOX_BATCH_SIZE = env_int("OUTBOX_BATCH_SIZE", "50")
+OUTBOX_MAX_ATTEMPTS = env_int("OUTBOX_MAX_ATTEMPTS", "5")
+OUTBOX_RETRY_DELAY = env_int("OUTBOX_RETRY_DELAY", "60")
+OUTBOX_MAX_DELAY = env_int("OUTBOX_MAX_DELAY", "3600")
+OUTBOX_LEASE = env_int("OUTBOX_LEASE", "300")
@@ -2,34 +2,27 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from django.contrib.sitemaps.views import sitemap
 from django.views.generic.base import TemplateView, RedirectView
 from django.contrib.staticfiles.storage import staticfiles_storage
-from django.contrib.admin.views.decorators import staff_member_required
 
-from core.sitemaps import StaticViewSitemap, ArticleSitemap, ProjectSitemap
-
-# Dictionnaire des sitemaps
-sitemaps = {
-    "static": StaticViewSitemap,
-    "blog": ArticleSitemap,
-    "projects": ProjectSitemap,
-}
+from core import sitemaps
+from core.admin import slow_requests_view
 
 urlpatterns = [
+    # Page "Requetes lentes" de l'admin (core/profiling.py), avant admin.site.urls
+    path("admin-horus/performance/", admin.site.admin_view(slow_requests_view), name="admin_slow_requests"),
     path("admin-horus/", admin.site.urls),
     path("", include("core.urls")),
 
-    # CKEditor uploader protégé (admin interne / staff uniquement)
-    path("ckeditor/", staff_member_required(include("ckeditor_uploader.urls"))),
+    # CKEditor uploader protégé (admin interne / staff uniquement).
+    # ckeditor_uploader.urls applique deja staff_member_required a upload/ et
+    # browse/ : l'envelopper autour de include() ne protegeait rien et cassait
+    # la resolution (/ckeditor/upload/ repondait 404).
+    path("ckeditor/", include("ckeditor_uploader.urls")),
 
-    # SEO : Sitemap.xml
-    path(
-        "sitemap.xml",
-        sitemap,
-        {"sitemaps": sitemaps},
-        name="django.contrib.sitemaps.views.sitemap",
-    ),
+    # SEO : Sitemap.xml (pre-genere et mis en cache, voir core/sitemaps.py)
+    path("sitemap.xml", sitemaps.sitemap, name="sitemap"),
+    path("sitemap-<slug:section>.xml", sitemaps.sitemap_section, name="sitemap_section"),
 
     # SEO : Robots.txt
     path(
@@ -1,12 +1,18 @@
-from django.contrib import admin
+from django.conf import settings
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
+from django.db import transaction
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
 from unfold.admin import ModelAdmin
 
-from .models import CustomUser, Contact, Article, Project
+from . import counters, outbox, profiling, spam
+from .admin_search import IndexedSearchMixin
+from .models import CustomUser, Contact, Article, OutboundEmail, Project, SpamRule
 
 
 @admin.register(Contact)
-class ContactAdmin(ModelAdmin):
+class ContactAdmin(IndexedSearchMixin, ModelAdmin):
     icon = "mail"
     list_display = ("name", "email", "phone", "created_at", "is_read", "is_responded")
     list_filter = ("is_read", "is_responded", "created_at")
@@ -16,17 +22,67 @@ class ContactAdmin(ModelAdmin):
 
     actions = ("mark_as_read", "mark_as_responded")
 
+    # queryset.update() ne declenche pas post_save : les compteurs du tableau
+    # de bord (core/counters.py) sont ajustes du nombre de lignes modifiees.
     @admin.action(description="Marquer comme lu")
     def mark_as_read(self, request, queryset):
-        queryset.update(is_read=True)
+        updated = queryset.filter(is_read=False).update(is_read=True)
+        counters.adjust("contacts_unread", -updated)
 
     @admin.action(description="Marquer comme répondu")
     def mark_as_responded(self, request, queryset):
-        queryset.update(is_responded=True)
+        updated = queryset.filter(is_responded=False).update(is_responded=True)
+        counters.adjust("contacts_unanswered", -updated)
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(ModelAdmin):
+    icon = "outbox"
+    list_display = ("subject", "status", "attempts", "next_attempt_at", "created_at", "sent_at")
+    list_filter = ("status", "created_at")
+    search_fields = ("subject", "to", "last_error")
+    ordering = ("-created_at",)
+    readonly_fields = (
+        "subject", "body", "from_email", "to", "reply_to", "status", "attempts",
+        "next_attempt_at", "last_error", "created_at", "sent_at",
+    )
+
+    actions = ("requeue",)
+
+    @admin.action(description="Remettre en file d'envoi")
+    def requeue(self, request, queryset):
+        count = outbox.requeue(queryset)
+        self.message_user(request, f"{count} email(s) remis en file.")
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(SpamRule)
+class SpamRuleAdmin(ModelAdmin):
+    icon = "block"
+    list_display = ("value", "kind", "is_active", "note", "created_at")
+    list_filter = ("kind", "is_active")
+    list_editable = ("is_active",)
+    search_fields = ("value", "note")
+    ordering = ("kind", "value")
+
+    actions = ("activate", "deactivate")
+
+    # queryset.update() ne declenche pas post_save : on change la version a la main.
+    @admin.action(description="Activer")
+    def activate(self, request, queryset):
+        queryset.update(is_active=True)
+        transaction.on_commit(spam.bump_version)
+
+    @admin.action(description="Désactiver")
+    def deactivate(self, request, queryset):
+        queryset.update(is_active=False)
+        transaction.on_commit(spam.bump_version)
 
 
 @admin.register(Article)
-class ArticleAdmin(ModelAdmin):
+class ArticleAdmin(IndexedSearchMixin, ModelAdmin):
     icon = "description"
     list_display = ("title", "category", "created_at", "is_published")
     list_filter = ("category", "is_published", "created_at")
@@ -37,7 +93,7 @@ class ArticleAdmin(ModelAdmin):
 
 
 @admin.register(Project)
-class ProjectAdmin(ModelAdmin):
+class ProjectAdmin(IndexedSearchMixin, ModelAdmin):
     icon = "rocket_launch"
     list_display = ("title", "created_at", "is_featured")
     list_filter = ("is_featured", "created_at")
@@ -66,3 +122,23 @@ class CustomUserAdmin(UserAdmin, ModelAdmin):
     add_fieldsets = (
         (None, {"classes": ("wide",), "fields": ("email", "first_name", "last_name", "phone", "role", "password1", "password2")}),
     )
+
+
+# ---------------------------------------------------------------------------
+# Requetes lentes (core/profiling.py), page hors modele : voir config/urls.py
+# ---------------------------------------------------------------------------
+def slow_requests_view(request):
+    if request.method == "POST":
+        profiling.clear_slow_requests()
+        messages.success(request, "Requêtes lentes effacées.")
+        return redirect("admin_slow_requests")
+
+    context = {
+        **admin.site.each_context(request),
+        "title": "Requêtes lentes",
+        "entries": profiling.slow_requests(),
+        "slow_ms": settings.PROFILING_SLOW_MS,
+        "sample_rate": settings.PROFILING_SAMPLE_RATE,
+        "ring_size": settings.PROFILING_RING_SIZE,
+    }
+    return TemplateResponse(request, "admin/slow_requests.html", context)
@@ -0,0 +1,198 @@
+"""Recherche de l'admin (Contact, Article, Project) sur index trigrammes.
+
+La recherche par defaut de l'admin filtre chaque mot en "icontains" sur
+tous les search_fields : "UPPER(message) LIKE '%...%'" sur des dizaines de
+milliers de messages (spam compris), soit un parcours complet de la table,
+puis deux COUNT(*) pour l'en-tete et la pagination.
+
+Index crees par la migration 0013_admin_search_index :
+
+- PostgreSQL : index GIN "gin_trgm_ops" (extension pg_trgm) sur
+  UPPER(colonne::text), l'expression exacte que Django genere pour
+  icontains. La recherche par defaut les utilise donc telle quelle.
+- SQLite : table FTS5 "<table>_admin_fts" au tokenizer "trigram" (SQLite
+  3.34+), ou MATCH trouve une sous-chaine quelconque comme LIKE '%...%'.
+  Tenue a jour par les signaux (core/signals.py) ; reconstruite par
+  rebuild_search_index. Contrairement a core/search.py, le texte est
+  indexe tel quel (HTML compris) : memes resultats qu'icontains.
+
+Un trigramme fait trois caracteres : les mots plus courts gardent le
+filtrage icontains. Sans index (migration non appliquee, SQLite ancien),
+IndexedSearchMixin retombe sur la recherche par defaut.
+
+EstimatedCountPaginator remplace le COUNT(*) des grosses listes par
+l'estimation du planificateur PostgreSQL (EXPLAIN), au-dessus de
+ADMIN_ESTIMATED_COUNT_THRESHOLD lignes.
+"""
+
+import json
+import logging
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connection, connections
+from django.db.models.expressions import RawSQL
+from django.utils.functional import cached_property
+from django.utils.text import smart_split, unescape_string_literal
+
+from .models import Article, Contact, Project
+
+logger = logging.getLogger(__name__)
+
+# Doit rester aligne sur les search_fields de core/admin.py et sur la
+# migration 0013_admin_search_index.
+ADMIN_INDEXED_FIELDS = {
+    Contact: ("name", "email", "phone", "message"),
+    Article: ("title", "summary", "content"),
+    Project: ("title", "technologies", "description"),
+}
+
+# Longueur minimale d'un mot cherche dans l'index (un trigramme).
+MIN_TERM_LENGTH = 3
+
+
+def _fts_table(model):
+    return f"{model._meta.db_table}_admin_fts"
+
+
+def _fts_phrase(term):
+    """Mot cite pour FTS5 : recherche de la sous-chaine, syntaxe non exposee."""
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _terms(search_term):
+    """Mots de la saisie, decoupes comme le fait ModelAdmin.get_search_results."""
+    terms = []
+    for bit in smart_split(search_term):
+        if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+            bit = unescape_string_literal(bit)
+        terms.append(bit)
+    return terms
+
+
+# ---------------------------------------------------------------------------
+# Maintenance de l'index (SQLite uniquement, PostgreSQL s'en charge seul)
+# ---------------------------------------------------------------------------
+def index_instance(instance):
+    """Insere ou remplace la ligne de l'objet dans l'index de l'admin."""
+    fields = ADMIN_INDEXED_FIELDS.get(type(instance))
+    if connection.vendor != "sqlite" or not fields:
+        return
+    table = _fts_table(type(instance))
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE rowid = %s", [instance.pk])
+            cursor.execute(
+                f"INSERT INTO {table} (rowid, {', '.join(fields)}) "
+                f"VALUES (%s, {', '.join(['%s'] * len(fields))})",
+                [instance.pk, *(getattr(instance, field) or "" for field in fields)],
+            )
+    except DatabaseError as exc:
+        logger.warning("Index de l'admin non mis a jour | %s pk=%s err=%s", table, instance.pk, exc)
+
+
+def remove_instance(instance):
+    if connection.vendor != "sqlite" or type(instance) not in ADMIN_INDEXED_FIELDS:
+        return
+    table = _fts_table(type(instance))
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE rowid = %s", [instance.pk])
+    except DatabaseError as exc:
+        logger.warning("Index de l'admin non mis a jour | %s pk=%s err=%s", table, instance.pk, exc)
+
+
+def rebuild_index(model):
+    """Reconstruit l'index de l'admin d'un modele. Retourne le nombre de lignes."""
+    if connection.vendor != "sqlite":
+        return model.objects.count()
+    fields = ", ".join(ADMIN_INDEXED_FIELDS[model])
+    table = _fts_table(model)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table}")
+        cursor.execute(
+            f"INSERT INTO {table} (rowid, {fields}) SELECT id, {fields} FROM {model._meta.db_table}"
+        )
+        return cursor.rowcount
+
+
+def has_index(model):
+    if connection.vendor != "sqlite":
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT 1 FROM {_fts_table(model)} LIMIT 0")
+    except DatabaseError:
+        return False
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Comptage estime
+# ---------------------------------------------------------------------------
+def estimate_count(queryset):
+    """Nombre de lignes estime par le planificateur PostgreSQL, ou None."""
+    db = connections[queryset.db]
+    if db.vendor != "postgresql":
+        return None
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+        with db.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+    except EmptyResultSet:
+        return 0
+    except DatabaseError as exc:
+        logger.warning("Estimation du nombre de lignes impossible | err=%s", exc)
+        return None
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPaginator(Paginator):
+    """COUNT(*) exact pour les petites listes, estimation au-dela du seuil.
+
+    L'estimation peut s'ecarter du nombre reel : la derniere page annoncee
+    peut etre vide ou incomplete, ce qui est acceptable dans l'admin.
+    """
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate is None or estimate < settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+            return super().count
+        return estimate
+
+
+# ---------------------------------------------------------------------------
+# ModelAdmin
+# ---------------------------------------------------------------------------
+class IndexedSearchMixin:
+    """Recherche sur l'index trigrammes, sans COUNT(*) du total non filtre."""
+
+    # Evite le second COUNT(*) ("N resultats (M au total)").
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+    def get_search_results(self, request, queryset, search_term):
+        model = queryset.model
+        indexed = [term for term in _terms(search_term) if len(term) >= MIN_TERM_LENGTH]
+        if (
+            not indexed
+            or set(self.get_search_fields(request)) != set(ADMIN_INDEXED_FIELDS.get(model, ()))
+            or not has_index(model)
+        ):
+            # PostgreSQL : l'icontains par defaut utilise deja les index GIN.
+            return super().get_search_results(request, queryset, search_term)
+
+        table = _fts_table(model)
+        for term in indexed:
+            queryset = queryset.filter(
+                pk__in=RawSQL(f"SELECT rowid FROM {table} WHERE {table} MATCH %s", [_fts_phrase(term)])
+            )
+        short = [term for term in _terms(search_term) if len(term) < MIN_TERM_LENGTH]
+        if short:
+            return super().get_search_results(request, queryset, " ".join(short))
+        return queryset, False
@@ -0,0 +1,35 @@
+"""Plafond de requetes traitees en meme temps par un worker ASGI.
+
+Sous ASGI, Django execute tout code synchrone (middlewares, ORM, rendu des
+gabarits) dans un thread propre a chaque requete. Sans limite, un worker
+Uvicorn qui recoit 200 requetes lance 200 threads qui se disputent le GIL
+et les verrous internes (asgiref.Local, derriere chaque reverse() des
+gabarits) : mesure sur le corpus de seed_corpus avec benchmark_concurrency,
+le debit tombait de ~35 a ~3 requetes/s et des requetes depassaient 30 s.
+
+ConcurrencyLimit laisse passer ASGI_MAX_CONCURRENCY requetes HTTP a la fois
+par worker ; les suivantes attendent leur tour dans la boucle, ce qui ne
+coute rien. Une requete qui attend la base ou le reseau occupe une place,
+pas le worker entier : le plafond se regle selon la part d'attente (plus
+haut avec PostgreSQL distant qu'avec SQLite local).
+"""
+
+import asyncio
+
+
+class ConcurrencyLimit:
+    """Application ASGI qui borne le nombre de requetes HTTP en cours."""
+
+    def __init__(self, app, limit):
+        self.app = app
+        self.limit = limit
+        self._semaphore = None
+
+    async def __call__(self, scope, receive, send):
+        if not self.limit or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        if self._semaphore is None:
+            # Cree dans la boucle du worker (apres le fork de Gunicorn).
+            self._semaphore = asyncio.Semaphore(self.limit)
+        async with self._semaphore:
+            return await self.app(scope, receive, send)
@@ -0,0 +1,111 @@
+"""Vues publiques asynchrones, pour le profil ASGI (config/gunicorn_asgi.py).
+
+Sous Gunicorn synchrone, un worker sert une requete a la fois : une
+recherche lente occupe tout le worker pendant que les autres visiteurs
+attendent. Sous Uvicorn, ces vues rendent la main a la boucle pendant les
+lectures en base et un worker sert de nombreuses requetes a la fois.
+
+core/urls.py les sert a la place de celles de core/views.py quand
+ASYNC_VIEWS est actif. Memes gabarits, memes decorateurs (cache de pages,
+ETag), donc memes reponses octet pour octet. Les lectures passent par l'ORM
+asynchrone (aget, async for) ; ce qui n'a pas d'equivalent asynchrone
+passe par sync_to_async, dans un thread, jamais dans la boucle :
+
+- la recherche (SQL brut sur l'index FTS, core/search.py) ;
+- le rendu des gabarits, qui lit le cache ({% cache %}) et peut toucher
+  la base (champs differes, balises).
+
+Le formulaire de contact reste une vue synchrone (core/views.py) : sous
+ASGI, Django execute une vue synchrone dans un thread, avec ses ecritures
+en base ; l'envoi SMTP est deja hors requete (core/outbox.py).
+"""
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import aget_object_or_404, render
+
+from .conditional import (
+    article_state,
+    conditional_page,
+    legal_page_state,
+    project_state,
+    projects_state,
+    published_articles_state,
+)
+from .models import Article, LegalPage, Project
+from .page_cache import cache_public_page
+from .pagination import CURSOR_PARAM, KeysetPaginator
+from .search import search_articles, search_projects
+
+_render = sync_to_async(render)
+
+
+@cache_public_page("articles", "projects")
+async def home(request):
+    recent_articles = [article async for article in Article.objects.published().cards().recent()[:3]]
+    featured_projects = [project async for project in Project.objects.featured().recent()[:3]]
+
+    return await _render(request, "core/home.html", {
+        "recent_articles": recent_articles,
+        "featured_projects": featured_projects,
+    })
+
+
+@conditional_page(published_articles_state)
+@cache_public_page("articles")
+async def blog(request):
+    paginator = KeysetPaginator(
+        Article.objects.published().cards(), ("-created_at", "-id"), 9, count_tags=("articles",)
+    )
+    legacy = await paginator.alegacy_redirect(request)
+    if legacy:
+        return legacy
+    articles = await paginator.apage(request.GET.get(CURSOR_PARAM))
+    return await _render(request, "core/blog.html", {"articles": articles})
+
+
+async def search(request):
+    query = request.GET.get("q", "").strip()
+    articles = []
+    projects = []
+
+    if query:
+        articles = await sync_to_async(search_articles)(query, limit=20)
+        projects = await sync_to_async(search_projects)(query, limit=20)
+
+    return await _render(request, "core/search.html", {
+        "query": query,
+        "articles": articles,
+        "projects": projects,
+    })
+
+
+@conditional_page(article_state)
+@cache_public_page("article:{slug}")
+async def article_detail(request, slug):
+    article = await aget_object_or_404(Article.objects.defer("content"), slug=slug, is_published=True)
+    return await _render(request, "core/article_detail.html", {"article": article})
+
+
+@conditional_page(projects_state)
+@cache_public_page("projects")
+async def portfolio(request):
+    paginator = KeysetPaginator(Project.objects.all(), ("-id",), 9, count_tags=("projects",))
+    legacy = await paginator.alegacy_redirect(request)
+    if legacy:
+        return legacy
+    projects = await paginator.apage(request.GET.get(CURSOR_PARAM))
+    return await _render(request, "core/portfolio.html", {"projects": projects})
+
+
+@conditional_page(project_state)
+@cache_public_page("project:{slug}")
+async def project_detail(request, slug):
+    project = await aget_object_or_404(Project, slug=slug)
+    return await _render(request, "core/project_detail.html", {"project": project})
+
+
+@conditional_page(legal_page_state)
+@cache_public_page("legal:{slug}")
+async def legal_page_detail(request, slug):
+    page = await aget_object_or_404(LegalPage, slug=slug)
+    return await _render(request, "core/legal.html", {"page": page})
@@ -0,0 +1,41 @@
+"""Micro-benchmarks lances par `python manage.py benchmark <nom>`.
+
+Chaque module de ce paquet expose :
+
+- DESCRIPTION : une ligne, affichee par `benchmark --list` ;
+- run(write, repeat) : execute les mesures, ecrit le rapport ligne a ligne
+  via write() et retourne un dict de resultats (sortie --json).
+
+"routes" mesure le site entier sur le corpus en base ; la commande
+benchmark_routes y ajoute la comparaison a une reference JSON.
+
+concurrency.py n'est pas dans BENCHMARKS : il charge des serveurs deja
+lances (commande benchmark_concurrency).
+"""
+
+import importlib
+import timeit
+
+BENCHMARKS = {
+    "cache": "core.benchmarks.cache",
+    "compression": "core.benchmarks.compression",
+    "database": "core.benchmarks.database",
+    "render": "core.benchmarks.render",
+    "routes": "core.benchmarks.routes",
+    "spam": "core.benchmarks.spam",
+}
+
+
+def load(name):
+    return importlib.import_module(BENCHMARKS[name])
+
+
+def best_of(func, repeat=5, number=None):
+    """Meilleur temps d'un appel de func(), en secondes.
+
+    number : appels par serie (determine automatiquement pour ~0,2 s si None).
+    """
+    timer = timeit.Timer(func)
+    if number is None:
+        number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
@@ -0,0 +1,53 @@
+"""Latence get / set : FileBasedCache (ancien defaut) vs TieredSQLiteCache.
+
+Chaque backend travaille dans un repertoire temporaire, avec 1000 cles
+deja presentes. "niveau partage seul" desactive le LRU local
+(LOCAL_MAX_ENTRIES=0) pour isoler le cout de SQLite.
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.core.cache.backends.filebased import FileBasedCache
+
+from core.cache_backends import TieredSQLiteCache
+
+DESCRIPTION = "Cache : FileBasedCache vs LRU + SQLite WAL (get hit, get miss, set, incr)"
+
+KEYS = 1000
+VALUE = {"content": b"x" * 20_000, "status": 200, "headers": {"Content-Type": "text/html"}}
+
+
+def _backends(root):
+    params = {"TIMEOUT": 3600, "OPTIONS": {"MAX_ENTRIES": KEYS * 10}}
+    yield "FileBasedCache", FileBasedCache(str(root / "files"), params)
+    yield "Tiered (LRU + SQLite)", TieredSQLiteCache(root / "tiered.sqlite3", params)
+    shared_only = {**params, "OPTIONS": {**params["OPTIONS"], "LOCAL_MAX_ENTRIES": 0}}
+    yield "Tiered, niveau partage seul", TieredSQLiteCache(root / "shared.sqlite3", shared_only)
+
+
+def run(write, repeat):
+    from core.benchmarks import best_of
+
+    root = Path(tempfile.mkdtemp())
+    results = {}
+    try:
+        write(f"{'backend':<30} {'get hit':>10} {'get miss':>10} {'set':>10} {'incr':>10}   (us)")
+        for label, cache in _backends(root):
+            for i in range(KEYS):
+                cache.set(f"page:{i}", VALUE)
+            cache.set("counter", 0)
+            cache.get("page:7")  # alimente le niveau local
+
+            timings = {
+                "get_hit": best_of(lambda: cache.get("page:7"), repeat=repeat),
+                "get_miss": best_of(lambda: cache.get("absent"), repeat=repeat),
+                "set": best_of(lambda: cache.set("page:8", VALUE), repeat=repeat, number=200),
+                "incr": best_of(lambda: cache.incr("counter"), repeat=repeat, number=200),
+            }
+            results[label] = {name: value * 1e6 for name, value in timings.items()}
+            write(f"{label:<30} " + " ".join(f"{value * 1e6:>10.1f}" for value in timings.values()))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return results
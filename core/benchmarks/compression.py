@@ -0,0 +1,52 @@
+"""Taille et cout CPU du pipeline de core/compression.py sur une page reelle.
+
+La page est core/services.html rendue hors vue (voir core/benchmarks/render.py).
+"a la volee" est le cout paye par requete sans cache de pages ; les
+variantes "cache" (Brotli qualite maximale) sont calculees une fois par
+entree du cache de pages, puis servies sans aucun calcul.
+"""
+
+from django.test import override_settings
+
+from core import compression
+
+DESCRIPTION = "Compression : taille et cout de minify / gzip / Brotli sur une page rendue"
+
+
+def _page():
+    from core.benchmarks.render import PAGE, _backend, _request
+
+    with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}):
+        return _backend(True).get_template(PAGE).render({}, _request())
+
+
+def run(write, repeat):
+    from core.benchmarks import best_of
+
+    html = _page()
+    raw = html.encode()
+    minified = compression.minify_html(html).encode()
+
+    steps = {
+        "brut": (raw, None),
+        "minifie": (minified, lambda: compression.minify_html(html)),
+        "gzip": (compression.compress(minified, "gzip"), lambda: compression.compress(minified, "gzip")),
+    }
+    if "br" in compression.ENCODINGS:
+        steps["br (a la volee)"] = (
+            compression.compress(minified, "br"), lambda: compression.compress(minified, "br"),
+        )
+        steps["br (cache)"] = (
+            compression.compress(minified, "br", cached=True),
+            lambda: compression.compress(minified, "br", cached=True),
+        )
+    else:
+        write("(paquet Brotli absent : gzip seul)")
+
+    results = {}
+    write(f"{'etape':<18} {'octets':>10} {'% brut':>8} {'ms':>8}")
+    for label, (data, func) in steps.items():
+        elapsed = best_of(func, repeat=repeat) * 1e3 if func else 0.0
+        results[label] = {"bytes": len(data), "ms": elapsed}
+        write(f"{label:<18} {len(data):>10} {len(data) / len(raw) * 100:>7.1f}% {elapsed:>8.2f}")
+    return results
@@ -0,0 +1,174 @@
+"""Debit et latence de queue sous charge concurrente, serveur par serveur.
+
+Compare des serveurs deja lances (typiquement Gunicorn synchrone et le
+profil ASGI de config/gunicorn_asgi.py) sur le meme corpus : `concurrency`
+clients simultanes, chacun sur sa connexion keep-alive, enchainent des GET
+pendant `duration` secondes (boucle fermee : une requete part quand la
+precedente a repondu). Par serveur : requetes/s, p50 / p95 / p99 / max en
+ms, erreurs et statuts, au total et par route.
+
+Le client est ecrit sur asyncio (HTTP/1.1, sans dependance) : un seul
+processus tient 200 connexions sans que le client ne devienne le goulot.
+
+Les routes sont celles de core/benchmarks/routes.py (memes exemples, memes
+parametres de requete) ; le melange par defaut alterne pages en cache,
+detail et recherche, la route la plus lente.
+"""
+
+import asyncio
+import statistics
+import time
+from collections import Counter, defaultdict
+from urllib.parse import urlencode, urlsplit
+
+from core.benchmarks import routes
+
+DEFAULT_ROUTES = ("home", "blog", "article_detail", "search")
+REQUEST_TIMEOUT = 30.0
+
+
+def paths(names=DEFAULT_ROUTES):
+    """[(nom, chemin avec query string)] des routes demandees."""
+    found = dict(routes.routes()[0])
+    missing = [name for name in names if name not in found]
+    if missing:
+        raise ValueError(f"Routes inconnues ou sans exemple : {', '.join(missing)}")
+    result = []
+    for name in names:
+        query = routes.QUERY.get(name)
+        result.append((name, found[name] + ("?" + urlencode(query) if query else "")))
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Client HTTP/1.1 minimal
+# ---------------------------------------------------------------------------
+async def _read_response(reader):
+    """(statut, keep-alive) ; le corps est lu et jete."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connexion fermee par le serveur")
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip().lower()
+
+    if headers.get("transfer-encoding") == "chunked":
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)  # donnees + CRLF
+            if not size:
+                break
+    else:
+        await reader.readexactly(int(headers.get("content-length", 0)))
+    return status, headers.get("connection") != "close"
+
+
+async def _client(target, requests, deadline, record):
+    url = urlsplit(target)
+    host = url.hostname
+    port = url.port or 80
+    index = 0
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        name, path = requests[index % len(requests)]
+        index += 1
+        start = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            writer.write(
+                f"GET {path} HTTP/1.1\r\nHost: {url.netloc}\r\n"
+                "Accept-Encoding: br, gzip\r\nUser-Agent: benchmark_concurrency\r\n\r\n".encode()
+            )
+            status, keep_alive = await asyncio.wait_for(_read_response(reader), REQUEST_TIMEOUT)
+        except (OSError, ValueError, asyncio.IncompleteReadError, asyncio.TimeoutError) as exc:
+            record(name, None, time.perf_counter() - start, type(exc).__name__)
+            keep_alive = False
+        else:
+            record(name, status, time.perf_counter() - start, None)
+        if not keep_alive and writer is not None:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def _load(target, requests, concurrency, duration):
+    timings = defaultdict(list)
+    statuses = Counter()
+    errors = Counter()
+    measuring = False
+
+    def record(name, status, elapsed, error):
+        if not measuring:
+            return
+        if error:
+            errors[error] += 1
+        else:
+            statuses[status] += 1
+            timings[name].append(elapsed)
+
+    deadline = time.perf_counter() + duration
+    # Clients decales sur le melange : toutes les routes sont chargees des le debut.
+    clients = [
+        asyncio.create_task(_client(target, requests[i % len(requests):] + requests[:i % len(requests)], deadline, record))
+        for i in range(concurrency)
+    ]
+    # Premiere seconde ignoree : ouverture des connexions, caches froids.
+    await asyncio.sleep(min(1.0, duration / 4))
+    measuring = True
+    started = time.perf_counter()
+    await asyncio.gather(*clients)
+    return timings, statuses, errors, time.perf_counter() - started
+
+
+def _summary(timings):
+    if len(timings) < 2:
+        return {"requests": len(timings)}
+    cuts = statistics.quantiles(timings, n=100, method="inclusive")
+    return {
+        "requests": len(timings),
+        "p50_ms": cuts[49] * 1e3,
+        "p95_ms": cuts[94] * 1e3,
+        "p99_ms": cuts[98] * 1e3,
+        "max_ms": max(timings) * 1e3,
+    }
+
+
+def measure(targets, requests, concurrency=200, duration=10.0, write=None):
+    """targets : {etiquette: URL de base} ; retourne les resultats par serveur."""
+    write = write or (lambda line: None)
+    results = {}
+    for label, target in targets.items():
+        timings, statuses, errors, elapsed = asyncio.run(_load(target, requests, concurrency, duration))
+        every = [value for values in timings.values() for value in values]
+        results[label] = {
+            "url": target,
+            "concurrency": concurrency,
+            "rps": len(every) / elapsed if elapsed else 0.0,
+            **_summary(every),
+            "statuses": {str(status): count for status, count in sorted(statuses.items())},
+            "errors": dict(errors),
+            "routes": {name: _summary(values) for name, values in timings.items()},
+        }
+        _report(label, results[label], write)
+    return results
+
+
+def _report(label, entry, write):
+    errors = sum(entry["errors"].values())
+    write(
+        f"{label:<10} {entry['rps']:>9.1f} req/s  p50 {entry.get('p50_ms', 0):>8.1f}  "
+        f"p95 {entry.get('p95_ms', 0):>8.1f}  p99 {entry.get('p99_ms', 0):>8.1f}  "
+        f"max {entry.get('max_ms', 0):>8.1f} ms  erreurs {errors}  statuts {entry['statuses']}"
+    )
+    for name, summary in entry["routes"].items():
+        write(
+            f"  {name:<16} {summary['requests']:>7} req  p50 {summary.get('p50_ms', 0):>8.1f}  "
+            f"p95 {summary.get('p95_ms', 0):>8.1f}  p99 {summary.get('p99_ms', 0):>8.1f} ms"
+        )
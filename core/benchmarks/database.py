@@ -0,0 +1,172 @@
+"""Base de donnees : acquisition d'une connexion, debit lecture / ecriture concurrent.
+
+Compare deux profils du moteur de DATABASES["default"] :
+
+- SQLite : reglages par defaut de Django (journal rollback, transactions
+  DEFERRED) et profil de config/settings.py (WAL, synchronous=NORMAL,
+  mmap, BEGIN IMMEDIATE), chacun sur une base temporaire ;
+- PostgreSQL : nouvelle connexion a chaque requete et pool psycopg
+  (OPTIONS["pool"]), sur la base configuree : la table TABLE y est creee
+  puis supprimee.
+
+Acquisition : ouvrir (ou emprunter au pool) une connexion, SELECT 1, la
+rendre ; c'est ce que coute le debut et la fin de chaque requete HTTP.
+
+Debit : THREADS threads pendant DURATION s. WRITERS d'entre eux ecrivent
+comme le formulaire de contact (lecture puis INSERT dans une transaction),
+les autres lisent (SELECT par cle, COUNT). Chaque operation prend et rend
+sa connexion, comme une requete HTTP. Les echecs ("database is locked",
+PoolTimeout) sont comptes, pas retentes.
+"""
+
+import copy
+import random
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.db import DatabaseError, connections, transaction
+from django.db.utils import load_backend
+
+DESCRIPTION = "Base : acquisition d'une connexion, debit lecture/ecriture concurrent (pool, profil SQLite)"
+
+TABLE = "bench_database"
+ROWS = 1000
+THREADS = 8
+WRITERS = 2
+DURATION = 2.0
+
+
+def _variants(root):
+    """[(etiquette, alias, settings_dict)] a comparer pour le moteur configure."""
+    base = connections["default"].settings_dict
+    vendor = connections["default"].vendor
+    if vendor == "sqlite":
+        default = {**copy.deepcopy(base), "NAME": str(root / "defaut.sqlite3"), "OPTIONS": {}}
+        tuned = {**copy.deepcopy(base), "NAME": str(root / "profil.sqlite3")}
+        return [("SQLite defaut", "bench-defaut", default), ("SQLite profil", "bench-profil", tuned)]
+    if vendor == "postgresql":
+        options = {key: value for key, value in base["OPTIONS"].items() if key != "pool"}
+        direct = {**copy.deepcopy(base), "OPTIONS": options, "CONN_MAX_AGE": 0}
+        pooled = {
+            **copy.deepcopy(base),
+            "OPTIONS": {**options, "pool": base["OPTIONS"].get("pool") or True},
+            "CONN_MAX_AGE": 0,
+        }
+        return [("PG sans pool", "bench-direct", direct), ("PG pool", "bench-pool", pooled)]
+    raise NotImplementedError(f"Moteur non pris en charge : {vendor}")
+
+
+def _wrapper(settings_dict, alias):
+    return load_backend(settings_dict["ENGINE"]).DatabaseWrapper(settings_dict, alias)
+
+
+# ---------------------------------------------------------------------------
+# Mesures
+# ---------------------------------------------------------------------------
+def _acquire(settings_dict, alias, repeat):
+    from core.benchmarks import best_of
+
+    connection = _wrapper(settings_dict, alias)
+
+    def acquire():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        connection.close()
+
+    acquire()  # ouvre le pool, cree le fichier
+    return best_of(acquire, repeat=repeat, number=50)
+
+
+def _create_table(settings_dict, alias):
+    connection = _wrapper(settings_dict, alias)
+    primary_key = "BIGSERIAL PRIMARY KEY" if connection.vendor == "postgresql" else "INTEGER PRIMARY KEY"
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        cursor.execute(f"CREATE TABLE {TABLE} (id {primary_key}, payload TEXT NOT NULL)")
+        cursor.executemany(f"INSERT INTO {TABLE} (payload) VALUES (%s)", [(f"ligne {i}",) for i in range(ROWS)])
+    connection.close()
+
+
+def _drop_table(settings_dict, alias):
+    connection = _wrapper(settings_dict, alias)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    connection.close()
+
+
+def _worker(settings_dict, alias, writer, deadline, counts, lock):
+    connection = _wrapper(settings_dict, alias)
+    # transaction.atomic() passe par connections[alias] : le wrapper du thread.
+    connections[alias] = connection
+    rng = random.Random()
+    done = failed = 0
+    try:
+        while time.perf_counter() < deadline:
+            try:
+                if writer:
+                    with transaction.atomic(using=alias), connection.cursor() as cursor:
+                        payload = f"contact {rng.random()}"
+                        cursor.execute(f"SELECT COUNT(*) FROM {TABLE} WHERE payload = %s", [payload])
+                        cursor.execute(f"INSERT INTO {TABLE} (payload) VALUES (%s)", [payload])
+                else:
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"SELECT payload FROM {TABLE} WHERE id = %s", [rng.randrange(1, ROWS)])
+                        cursor.fetchone()
+                        cursor.execute(f"SELECT COUNT(*) FROM {TABLE}")
+                        cursor.fetchone()
+                done += 1
+            except DatabaseError:
+                failed += 1
+            finally:
+                connection.close()
+    finally:
+        del connections[alias]
+    with lock:
+        kind = "writes" if writer else "reads"
+        counts[kind] += done
+        counts["errors"] += failed
+
+
+def _read_write(settings_dict, alias):
+    _create_table(settings_dict, alias)
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + DURATION
+    threads = [
+        threading.Thread(target=_worker, args=(settings_dict, alias, index < WRITERS, deadline, counts, lock))
+        for index in range(THREADS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    _drop_table(settings_dict, alias)
+    return {name: value / DURATION for name, value in counts.items()}
+
+
+def run(write, repeat):
+    root = Path(tempfile.mkdtemp())
+    results = {}
+    try:
+        write(
+            f"{'profil':<16} {'acquisition':>12} {'lectures/s':>12} {'ecritures/s':>12} {'echecs/s':>10}"
+            f"   ({THREADS} threads dont {WRITERS} ecrivains, {DURATION:.0f} s)"
+        )
+        for label, alias, settings_dict in _variants(root):
+            try:
+                acquire = _acquire(settings_dict, alias, repeat)
+                throughput = _read_write(settings_dict, alias)
+            finally:
+                if "pool" in settings_dict["OPTIONS"]:
+                    _wrapper(settings_dict, alias).close_pool()
+            results[label] = {"acquire_us": acquire * 1e6, **throughput}
+            write(
+                f"{label:<16} {acquire * 1e6:>9.1f} us {throughput['reads']:>12.0f} "
+                f"{throughput['writes']:>12.0f} {throughput['errors']:>10.1f}"
+            )
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return results
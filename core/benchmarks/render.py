@@ -0,0 +1,69 @@
+"""Cout de rendu d'une page publique (gabarit seul, sans vue ni SQL).
+
+Quatre combinaisons, sur core/services.html (base.html presque nue) :
+
+- chargeur : gabarits relus et recompiles a chaque rendu (developpement)
+  ou chargeur cached.Loader (production, config/settings.py) ;
+- fragments : en-tete et pied de page recalcules a chaque rendu
+  (FRAGMENT_CACHE_TIMEOUT=0, equivalent de l'ancien base.html monolithique)
+  ou servis par {% cache %}.
+
+Le cache de fragments utilise ici un LocMemCache, pour ne pas ecrire dans
+le cache du site.
+"""
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory, override_settings
+from django.urls import resolve, reverse
+
+DESCRIPTION = "Rendu : base.html sans / avec cache de fragments, chargeur simple / cached"
+
+PAGE = "core/services.html"
+LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+
+
+def _backend(cached):
+    options = {**settings.TEMPLATES[0]["OPTIONS"]}
+    options["loaders"] = [("django.template.loaders.cached.Loader", LOADERS)] if cached else LOADERS
+    return DjangoTemplates({
+        "NAME": "benchmark",
+        "DIRS": settings.TEMPLATES[0]["DIRS"],
+        "APP_DIRS": False,
+        "OPTIONS": options,
+    })
+
+
+def _request():
+    path = reverse("services")
+    request = RequestFactory().get(path, HTTP_HOST="localhost")
+    request.resolver_match = resolve(path)
+    request.user = AnonymousUser()
+    return request
+
+
+def run(write, repeat):
+    from core.benchmarks import best_of
+
+    request = _request()
+    results = {}
+    write(f"{'chargeur':<12} {'sans fragments':>16} {'avec fragments':>16}   (ms / rendu)")
+    with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}):
+        for label, cached in (("simple", False), ("cached", True)):
+            template_backend = _backend(cached)
+
+            def render():
+                return template_backend.get_template(PAGE).render({}, request)
+
+            with override_settings(FRAGMENT_CACHE_TIMEOUT=0):
+                without = best_of(render, repeat=repeat)
+            render()  # remplit le cache de fragments
+            with_fragments = best_of(render, repeat=repeat)
+
+            results[label] = {"without_fragments_ms": without * 1e3, "with_fragments_ms": with_fragments * 1e3}
+            write(f"{label:<12} {without * 1e3:>16.2f} {with_fragments * 1e3:>16.2f}")
+    return results
@@ -0,0 +1,234 @@
+"""Latence de chaque route publique, sur le corpus courant (voir seed_corpus).
+
+Les routes sont lues dans config/urls.py (donc core/urls.py inclus) : une
+route ajoutee est mesuree sans toucher a ce module, ou signalee si elle
+attend un parametre sans exemple dans SAMPLES. L'admin et l'upload
+CKEditor (connexion requise) sont ignores.
+
+Par route : une requete d'echauffement (cache de pages rempli, comme en
+production), puis `requests` requetes mesurees : p50 / p95 / p99 en ms,
+nombre maximal de requetes SQL, et RSS max du processus apres la route
+(ru_maxrss, en Ko sous Linux). --cold mesure sans cache (DummyCache).
+
+Avec base_url, les requetes partent en HTTP vers un serveur local
+(Gunicorn) : latence seule, SQL et RSS ne sont pas observables d'ici.
+
+La commande benchmark_routes enregistre ces resultats comme reference
+JSON et echoue quand une route regresse au-dela d'une tolerance.
+"""
+
+import platform
+import statistics
+import time
+import urllib.error
+import urllib.request
+from contextlib import nullcontext
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db import connections
+from django.test import Client, override_settings
+from django.urls import NoReverseMatch, URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+
+from core.models import Article, Contact, LegalPage, Project
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DESCRIPTION = "Routes : latence p50/p95/p99, requetes SQL et RSS max par route publique"
+
+SKIP_NAMESPACES = ("admin",)
+SKIP_PREFIXES = ("ckeditor/",)
+# Parametres de requete des routes qui n'ont de sens qu'avec eux
+QUERY = {"search": {"q": "django cache"}}
+# Ecart absolu toujours tolere (ms) : sous la milliseconde, le bruit domine.
+SLACK_MS = 1.0
+# Metriques de latence comparees a la reference (p99 trop bruite sur 50 requetes)
+GATED = ("p50_ms", "p95_ms")
+
+
+def _slug(queryset):
+    return queryset.order_by().values_list("slug", flat=True).first()
+
+
+# nom de route -> kwargs d'exemple (None : pas d'objet pour la mesurer)
+SAMPLES = {
+    "article_detail": lambda: {"slug": _slug(Article.objects.published())},
+    "project_detail": lambda: {"slug": _slug(Project.objects.all())},
+    "legal_page": lambda: {"slug": _slug(LegalPage.objects.all())},
+    "sitemap_section": lambda: {"section": "blog"},
+}
+
+
+def _walk(patterns, prefix="", skip=SKIP_PREFIXES):
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern)
+        if route.startswith(skip):
+            continue
+        if isinstance(pattern, URLResolver):
+            yield from _walk(pattern.url_patterns, route, skip)
+        elif isinstance(pattern, URLPattern):
+            yield pattern, route
+
+
+def routes():
+    """([(nom, chemin)], [routes ignorees faute d'exemple])."""
+    patterns = get_resolver().url_patterns
+    # Prefixe de l'admin : ses pages ajoutees hors admin.site.urls aussi.
+    skip = SKIP_PREFIXES + tuple(
+        str(pattern.pattern) for pattern in patterns
+        if isinstance(pattern, URLResolver) and pattern.namespace in SKIP_NAMESPACES
+    )
+    found, skipped = [], []
+    for pattern, route in _walk(patterns, skip=skip):
+        if pattern.name:
+            kwargs = SAMPLES[pattern.name]() if pattern.name in SAMPLES else {}
+            try:
+                if any(value is None for value in kwargs.values()):
+                    raise NoReverseMatch
+                found.append((pattern.name, reverse(pattern.name, kwargs=kwargs)))
+            except NoReverseMatch:
+                skipped.append(pattern.name)
+        elif not any(char in route for char in "<(^$"):
+            found.append((route, "/" + route))  # robots.txt, favicon.ico
+        else:
+            skipped.append(route)  # medias servis en DEBUG
+    return found, skipped
+
+
+def corpus():
+    return {
+        "articles": Article.objects.count(),
+        "projects": Project.objects.count(),
+        "contacts": Contact.objects.count(),
+    }
+
+
+def peak_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+
+
+# ---------------------------------------------------------------------------
+# Mesure
+# ---------------------------------------------------------------------------
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _host():
+    hosts = [host for host in settings.ALLOWED_HOSTS if host != "*" and not host.startswith(".")]
+    return hosts[0] if hosts else "localhost"
+
+
+def _client_get(client, secure):
+    def get(path, query):
+        counter = _QueryCounter()
+        with connections["default"].execute_wrapper(counter):
+            start = time.perf_counter()
+            response = client.get(path, query, secure=secure)
+            elapsed = time.perf_counter() - start
+        return response.status_code, elapsed, counter.count
+
+    return get
+
+
+def _http_get(base_url):
+    def get(path, query):
+        url = base_url.rstrip("/") + path + ("?" + urlencode(query) if query else "")
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as exc:
+            status = exc.code
+        return status, time.perf_counter() - start, None
+
+    return get
+
+
+def _percentiles(timings):
+    cuts = statistics.quantiles(timings, n=100, method="inclusive")
+    return {"p50_ms": cuts[49] * 1e3, "p95_ms": cuts[94] * 1e3, "p99_ms": cuts[98] * 1e3}
+
+
+def measure(requests=50, base_url=None, cold=False, only=None, write=None):
+    """Mesure chaque route ; retourne le dict enregistre comme reference."""
+    write = write or (lambda line: None)
+    requests = max(2, requests)
+    found, skipped = routes()
+    for name in skipped:
+        write(f"  ! route sans exemple, ignoree : {name}")
+
+    no_cache = override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}})
+    results = {}
+    with no_cache if cold else nullcontext():
+        get = _http_get(base_url) if base_url else _client_get(
+            Client(HTTP_HOST=_host()), getattr(settings, "SECURE_SSL_REDIRECT", False)
+        )
+        write(f"{'route':<18} {'statut':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'SQL':>5}   (ms)")
+        for name, path in found:
+            if only and name not in only:
+                continue
+            query = QUERY.get(name, {})
+            get(path, query)  # echauffement
+            timings, queries = [], []
+            for _ in range(requests):
+                status, elapsed, count = get(path, query)
+                timings.append(elapsed)
+                queries.append(count)
+            entry = {
+                "path": path,
+                "status": status,
+                **_percentiles(timings),
+                "queries": None if base_url else max(queries),
+                "peak_rss_kb": None if base_url else peak_rss_kb(),
+            }
+            results[name] = entry
+            write(
+                f"{name:<18} {status:>6} {entry['p50_ms']:>8.2f} {entry['p95_ms']:>8.2f} "
+                f"{entry['p99_ms']:>8.2f} {entry['queries'] if entry['queries'] is not None else '-':>5}"
+            )
+
+    return {
+        "created": timezone.now().isoformat(),
+        "python": platform.python_version(),
+        "mode": base_url or "client",
+        "cold": cold,
+        "requests": requests,
+        "corpus": corpus(),
+        "peak_rss_kb": None if base_url else peak_rss_kb(),
+        "routes": results,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Regressions de results par rapport a baseline (liste de messages)."""
+    regressions = []
+    for name, current in results["routes"].items():
+        base = baseline.get("routes", {}).get(name)
+        if not base:
+            continue
+        if current["status"] != base["status"]:
+            regressions.append(f"{name} : statut {base['status']} -> {current['status']}")
+        for metric in GATED:
+            if current[metric] > base[metric] * (1 + tolerance) + SLACK_MS:
+                regressions.append(f"{name} : {metric} {base[metric]:.2f} -> {current[metric]:.2f} ms")
+        if None not in (current["queries"], base.get("queries")) and current["queries"] > base["queries"]:
+            regressions.append(f"{name} : requetes SQL {base['queries']} -> {current['queries']}")
+    if None not in (results["peak_rss_kb"], baseline.get("peak_rss_kb")):
+        if results["peak_rss_kb"] > baseline["peak_rss_kb"] * (1 + tolerance):
+            regressions.append(f"RSS max {baseline['peak_rss_kb']} -> {results['peak_rss_kb']} Ko")
+    return regressions
+
+
+def run(write, repeat):
+    return measure(requests=repeat * 10, write=write)
@@ -0,0 +1,51 @@
+"""Detection de mots-cles : boucle "keyword in message" vs moteur compile.
+
+Mesure le cout d'un message de contact propre (le cas courant : il faut
+tout parcourir) selon la taille de la liste de mots-cles.
+"""
+
+import random
+import string
+
+from core.spam import SpamEngine
+
+DESCRIPTION = "Anti-spam : liste Python (ancienne implementation) vs regex trie compilee"
+
+SIZES = (35, 1000, 5000)
+
+MESSAGE = (
+    "Bonjour, nous souhaitons refondre notre application de gestion des sinistres "
+    "(Django, PostgreSQL) et obtenir un audit de performance avant la mise en production. "
+    "Pouvez-vous nous proposer un creneau la semaine prochaine ? Merci d'avance. "
+) * 4
+
+
+def _keywords(count, seed=42):
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 12))))
+    return sorted(words)
+
+
+def legacy_match(keywords, text):
+    """Ancienne implementation de ContactForm.clean_message."""
+    return any(keyword in text for keyword in keywords)
+
+
+def run(write, repeat):
+    from core.benchmarks import best_of
+
+    text = MESSAGE.lower()
+    results = {}
+    write(f"{'mots-cles':>10} {'liste (us)':>12} {'compile (us)':>13} {'gain':>7}")
+    for size in SIZES:
+        keywords = _keywords(size)
+        engine = SpamEngine(keywords=keywords)
+        assert engine.match_keyword(text) is None and not legacy_match(keywords, text)
+
+        legacy = best_of(lambda: legacy_match(keywords, text), repeat=repeat)
+        compiled = best_of(lambda: engine.match_keyword(text), repeat=repeat)
+        results[size] = {"legacy_us": legacy * 1e6, "compiled_us": compiled * 1e6}
+        write(f"{size:>10} {legacy * 1e6:>12.1f} {compiled * 1e6:>13.1f} {legacy / compiled:>6.1f}x")
+    return results
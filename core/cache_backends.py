@@ -0,0 +1,379 @@
+"""Backend de cache a deux niveaux : LRU en memoire + SQLite (WAL) partage.
+
+Le FileBasedCache servait tout le site (cache de pages, versions de tags,
+compteurs, limitation de debit) parce qu'il est partage entre workers
+Gunicorn. Mais chaque get() coute un open() et un unpickle, et le menage
+(_cull) liste tout le repertoire.
+
+TieredSQLiteCache garde ce partage sans service externe :
+
+- niveau partage : une base SQLite en mode WAL (LOCATION), une ligne par
+  cle, avec un index sur la date d'expiration ; le nombre de lignes est
+  tenu a jour par des triggers (table cache_size) ;
+- niveau local : un LRU par processus (LOCAL_MAX_ENTRIES entrees) des
+  valeurs deja lues, qui evite la base tant que rien n'a change.
+
+Invalidation entre workers : chaque ecriture ajoute la cle dans un journal
+(table changes, cle primaire auto-incrementee = compteur de version).
+Avant de servir une valeur locale, on interroge `PRAGMA data_version`, qui
+ne change que si une autre connexion a commite, sans lecture disque en
+WAL. S'il a change, on relit le journal depuis la derniere version vue et
+on evince les cles concernees (tout le LRU si le journal a ete tronque
+entre-temps ou en cas de clear()).
+
+Menage borne : tous les CULL_EVERY ecritures, on supprime au plus
+CULL_BATCH entrees expirees (via l'index), puis les plus proches de
+l'expiration si MAX_ENTRIES est depasse (compare a cache_size, pas a un
+COUNT(*)), et on tronque le journal a CHANGE_LOG_SIZE lignes. Jamais de
+parcours complet.
+
+incr() et add() sont atomiques entre processus (transaction IMMEDIATE,
+INSERT ... ON CONFLICT), contrairement au FileBasedCache.
+
+Connexions, schema et compteur d'ecritures sont au niveau du module, pas
+de l'instance : sous ASGI, django.core.cache.caches est local au contexte
+et construit un backend par requete. Une connexion par thread et par
+processus, un CREATE TABLE par processus, un compteur de menage commun.
+
+    CACHES = {"default": {
+        "BACKEND": "core.cache_backends.TieredSQLiteCache",
+        "LOCATION": BASE_DIR / "cache" / "cache.sqlite3",
+        "OPTIONS": {"MAX_ENTRIES": 10000, "LOCAL_MAX_ENTRIES": 1000},
+    }}
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+CLEAR_MARKER = "*"
+
+# Niveau local, par processus et par emplacement (les instances de backend
+# sont par thread, le LRU est commun a tous les threads du processus).
+_local_tiers = {}
+_local_tiers_lock = threading.Lock()
+
+# Connexions SQLite par (emplacement, pid, thread), schema deja cree et
+# ecritures depuis le demarrage par (emplacement, pid) : partages par toutes
+# les instances du backend.
+_connections = {}
+_schemas = set()
+_writes = {}
+_connections_lock = threading.Lock()
+
+SCHEMA = """
+BEGIN IMMEDIATE;
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL
+);
+CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires);
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cache_size (
+    id INTEGER PRIMARY KEY CHECK (id = 1), entries INTEGER NOT NULL
+);
+-- Compte initial d'une base anterieure aux triggers : une seule fois.
+INSERT OR IGNORE INTO cache_size (id, entries)
+    SELECT 1, (SELECT COUNT(*) FROM cache) WHERE NOT EXISTS (SELECT 1 FROM cache_size);
+CREATE TRIGGER IF NOT EXISTS cache_size_insert AFTER INSERT ON cache
+    BEGIN UPDATE cache_size SET entries = entries + 1 WHERE id = 1; END;
+CREATE TRIGGER IF NOT EXISTS cache_size_delete AFTER DELETE ON cache
+    BEGIN UPDATE cache_size SET entries = entries - 1 WHERE id = 1; END;
+COMMIT;
+"""
+
+
+class _Connection:
+    def __init__(self, conn):
+        self.conn = conn
+        self.data_version = None
+
+
+class _LocalTier:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (pickled, expires)
+        self.seen_seq = None
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] is not None and entry[1] <= time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, pickled, expires):
+        if self.max_entries <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (pickled, expires)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class TieredSQLiteCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = str(location)
+        options = params.get("OPTIONS", {})
+        self._local_max_entries = int(options.get("LOCAL_MAX_ENTRIES", 1000))
+        self._cull_every = int(options.get("CULL_EVERY", 50))
+        self._cull_batch = int(options.get("CULL_BATCH", 500))
+        self._change_log_size = int(options.get("CHANGE_LOG_SIZE", 10000))
+
+    # ------------------------------------------------------------------
+    # Connexion et niveau local
+    # ------------------------------------------------------------------
+    def _handle(self):
+        """Connexion SQLite du thread, commune a toutes les instances ;
+        recreee apres un fork."""
+        pid = os.getpid()
+        key = (self._path, pid, threading.get_ident())
+        handle = _connections.get(key)
+        if handle is not None:
+            return handle
+
+        Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self._path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if (self._path, pid) not in _schemas:
+            conn.executescript(SCHEMA)
+        with _connections_lock:
+            _schemas.add((self._path, pid))
+            # Connexions heritees du processus parent : inutilisables ici.
+            for stale in [k for k in _connections if k[1] != pid]:
+                del _connections[stale]
+            handle = _connections.setdefault(key, _Connection(conn))
+        return handle
+
+    def _connection(self):
+        return self._handle().conn
+
+    def _local(self):
+        with _local_tiers_lock:
+            tier = _local_tiers.get(self._path)
+            if tier is None or tier.pid != os.getpid():
+                tier = _local_tiers[self._path] = _LocalTier(self._local_max_entries)
+            return tier
+
+    def _sync(self, conn, tier):
+        """Evince du niveau local les cles modifiees par d'autres connexions."""
+        handle = self._handle()
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == handle.data_version and tier.seen_seq is not None:
+            return
+        handle.data_version = data_version
+
+        with tier.lock:
+            seen = tier.seen_seq
+            if seen is None:
+                row = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()
+                tier.entries.clear()
+                tier.seen_seq = row[0]
+                return
+            rows = conn.execute("SELECT seq, key FROM changes WHERE seq > ? ORDER BY seq", (seen,)).fetchall()
+            if not rows:
+                return
+            oldest = conn.execute("SELECT MIN(seq) FROM changes").fetchone()[0]
+            if oldest is not None and oldest > seen + 1 or any(key == CLEAR_MARKER for _, key in rows):
+                # Journal tronque depuis notre dernier passage, ou clear() : tout est suspect.
+                tier.entries.clear()
+            else:
+                for _, key in rows:
+                    tier.entries.pop(key, None)
+            tier.seen_seq = rows[-1][0]
+
+    def _expires(self, timeout):
+        # get_backend_timeout() retourne deja un horodatage absolu (ou None).
+        return self.get_backend_timeout(timeout)
+
+    def _log_change(self, conn, key):
+        conn.execute("INSERT INTO changes (key) VALUES (?)", (key,))
+
+    def _after_write(self, conn):
+        key = (self._path, os.getpid())
+        with _connections_lock:
+            writes = _writes[key] = _writes.get(key, 0) + 1
+        if self._cull_every and writes % self._cull_every == 0:
+            self._cull(conn)
+
+    # ------------------------------------------------------------------
+    # API du cache
+    # ------------------------------------------------------------------
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._connection()
+        tier = self._local()
+        self._sync(conn, tier)
+
+        pickled = tier.get(key)
+        if pickled is None:
+            row = conn.execute(
+                "SELECT value, expires FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)",
+                (key, time.time()),
+            ).fetchone()
+            if row is None:
+                return default
+            pickled = row[0]
+            tier.put(key, pickled, row[1])
+        return pickle.loads(pickled)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT INTO cache (key, value, expires) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires = excluded.expires",
+                (key, pickled, self._expires(timeout)),
+            )
+            self._log_change(conn, key)
+        self._local().discard(key)
+        self._after_write(conn)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.execute(
+                "INSERT INTO cache (key, value, expires) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires = excluded.expires "
+                "WHERE cache.expires IS NOT NULL AND cache.expires <= ?",
+                (key, pickled, self._expires(timeout), time.time()),
+            )
+            added = cursor.rowcount == 1
+            if added:
+                self._log_change(conn, key)
+        if added:
+            self._local().discard(key)
+            self._after_write(conn)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.execute(
+                "UPDATE cache SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)",
+                (self._expires(timeout), key, time.time()),
+            )
+            touched = cursor.rowcount == 1
+            if touched:
+                self._log_change(conn, key)
+        self._local().discard(key)
+        return touched
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._connection()
+        with conn:
+            # IMMEDIATE : le verrou d'ecriture est pris avant la lecture, deux
+            # workers ne peuvent pas incrementer la meme valeur de depart.
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)",
+                (key, time.time()),
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            new_value = pickle.loads(row[0]) + delta
+            conn.execute(
+                "UPDATE cache SET value = ? WHERE key = ?",
+                (pickle.dumps(new_value, self.pickle_protocol), key),
+            )
+            self._log_change(conn, key)
+        self._local().discard(key)
+        return new_value
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            deleted = conn.execute("DELETE FROM cache WHERE key = ?", (key,)).rowcount == 1
+            if deleted:
+                self._log_change(conn, key)
+        self._local().discard(key)
+        return deleted
+
+    def has_key(self, key, version=None):
+        return self.get(key, self._missing_key, version=version) is not self._missing_key
+
+    def clear(self):
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM cache")
+            self._log_change(conn, CLEAR_MARKER)
+        self._local().clear()
+
+    # ------------------------------------------------------------------
+    # Menage borne
+    # ------------------------------------------------------------------
+    def _cull(self, conn):
+        now = time.time()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "DELETE FROM cache WHERE key IN "
+                "(SELECT key FROM cache WHERE expires <= ? ORDER BY expires LIMIT ?)",
+                (now, self._cull_batch),
+            )
+            excess = conn.execute("SELECT entries FROM cache_size").fetchone()[0] - self._max_entries
+            if excess > 0:
+                # Comme le FileBasedCache : on retire 1/CULL_FREQUENCY des entrees,
+                # en commencant par celles qui expirent le plus tot, puis celles
+                # sans expiration. Deux requetes qui suivent l'index cache_expires
+                # (un seul ORDER BY "expires IS NULL, expires" trierait toute la table).
+                count = min(max(excess, self._max_entries // max(self._cull_frequency, 1)), self._cull_batch)
+                keys = [row[0] for row in conn.execute(
+                    "SELECT key FROM cache WHERE expires IS NOT NULL ORDER BY expires LIMIT ?", (count,)
+                )]
+                if len(keys) < count:
+                    keys += [row[0] for row in conn.execute(
+                        "SELECT key FROM cache WHERE expires IS NULL LIMIT ?", (count - len(keys),)
+                    )]
+                conn.executemany("DELETE FROM cache WHERE key = ?", [(key,) for key in keys])
+                conn.executemany("INSERT INTO changes (key) VALUES (?)", [(key,) for key in keys])
+                tier = self._local()
+                for key in keys:
+                    tier.discard(key)
+            conn.execute(
+                "DELETE FROM changes WHERE seq <= (SELECT MAX(seq) FROM changes) - ?",
+                (self._change_log_size,),
+            )
+
+    def close(self, **kwargs):
+        # Connexion gardee ouverte entre les requetes (comme le FileBasedCache
+        # n'a rien a fermer) : la rouvrir couterait plus que la requete.
+        pass
@@ -0,0 +1,205 @@
+"""Minification et compression des reponses dynamiques (HTML, XML, texte).
+
+WhiteNoise compresse les fichiers statiques a la collecte, mais le HTML des
+vues sortait de Gunicorn tel quel, avec toute l'indentation de base.html,
+et nginx le recompressait a chaque requete.
+
+CompressionMiddleware, place juste apres WhiteNoise :
+
+- minifie le HTML (indentation, lignes vides, commentaires) hors <pre>,
+  <textarea> et <script>, et le XML (blancs entre balises) ;
+- compresse en Brotli ou gzip selon Accept-Encoding (Brotli seulement si le
+  paquet "Brotli" est installe) ;
+- ne compresse pas une reponse qui contient le jeton CSRF : compresser un
+  secret a cote de donnees controlees par le visiteur l'expose a BREACH.
+
+Le cache de pages (core/page_cache.py) appelle prepare() et encode_all()
+au moment d'enregistrer une page : l'entree contient le HTML minifie et ses
+versions compressees, qu'il attache a la reponse (response.precompressed).
+Un hit ne coute alors aucune compression. Les sitemaps (core/sitemaps.py)
+font de meme pour leurs artefacts.
+"""
+
+import gzip
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # paquet optionnel : gzip seul
+    brotli = None
+
+# En dessous, les en-tetes de compression coutent plus qu'ils ne font gagner.
+MIN_SIZE = 200
+
+GZIP_LEVEL = 6
+# Compression a la volee (cache manque, pages non cachees) / artefacts mis en
+# cache, compresses une seule fois : on peut y mettre le prix.
+BROTLI_QUALITY = 5
+BROTLI_CACHED_QUALITY = 11
+
+ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+
+HTML_TYPES = ("text/html",)
+XML_TYPES = ("application/xml", "text/xml", "application/rss+xml", "application/atom+xml")
+TEXT_TYPES = ("text/plain",)
+
+# Blocs dont les blancs sont significatifs : recopies tels quels.
+PROTECTED_RE = re.compile(r"<(pre|textarea|script)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+# Commentaires HTML, hors commentaires conditionnels (<!--[if ...]>).
+COMMENT_RE = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+# Blancs retires en debut et fin de ligne ; pas str.strip() : il retirerait
+# aussi les espaces insecables (U+00A0), qui sont du contenu.
+LINE_BLANKS = " \t\r"
+XML_BETWEEN_TAGS_RE = re.compile(rb">\s+<")
+ACCEPT_ENCODING_RE = re.compile(r"^\s*([^\s;]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$")
+
+
+def _content_type(response):
+    return response.get("Content-Type", "").split(";", 1)[0].strip().lower()
+
+
+def is_compressible(response):
+    return _content_type(response) in HTML_TYPES + XML_TYPES + TEXT_TYPES
+
+
+# ---------------------------------------------------------------------------
+# Minification
+# ---------------------------------------------------------------------------
+def _minify_chunk(chunk):
+    """Indentation et lignes vides retirees ; chaque saut de ligne conserve
+    reste un separateur, les blancs internes a une ligne sont laisses."""
+    if "<!--" in chunk:
+        chunk = COMMENT_RE.sub("", chunk)
+    lines = [line.strip(LINE_BLANKS) for line in chunk.split("\n")]
+    text = "\n".join(line for line in lines if line)
+    # Blanc en bordure d'un bloc protege : separateur a garder.
+    if not text:
+        return "\n" if chunk else ""
+    if chunk[:1] in LINE_BLANKS + "\n":
+        text = "\n" + text
+    if chunk[-1:] in LINE_BLANKS + "\n":
+        text += "\n"
+    return text
+
+
+def minify_html(text):
+    """Retire l'indentation, les lignes vides et les commentaires d'un HTML."""
+    out, position = [], 0
+    for match in PROTECTED_RE.finditer(text):
+        out.append(_minify_chunk(text[position:match.start()]))
+        out.append(match.group(0))
+        position = match.end()
+    out.append(_minify_chunk(text[position:]))
+    return "".join(out).strip()
+
+
+def minify_xml(data):
+    return XML_BETWEEN_TAGS_RE.sub(b"><", data).strip()
+
+
+def prepare(response):
+    """Minifie une reponse compressible, une seule fois ; retourne True si compressible."""
+    if response.streaming or not is_compressible(response):
+        return False
+    if getattr(response, "minified", False):
+        return True
+    content_type = _content_type(response)
+    if content_type in HTML_TYPES:
+        charset = response.charset
+        response.content = minify_html(response.content.decode(charset)).encode(charset)
+    elif content_type in XML_TYPES:
+        response.content = minify_xml(response.content)
+    response.minified = True
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Compression
+# ---------------------------------------------------------------------------
+def compress(data, encoding, cached=False):
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_CACHED_QUALITY if cached else BROTLI_QUALITY)
+    # mtime=0 : meme entree, memes octets (ETag stable, cache nginx).
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def encode_all(data):
+    """Toutes les versions compressees de data, pour un artefact mis en cache."""
+    if len(data) < MIN_SIZE:
+        return {}
+    return {encoding: compress(data, encoding, cached=True) for encoding in ENCODINGS}
+
+
+def negotiate(accept_encoding, available=ENCODINGS):
+    """Meilleur encodage accepte par le client parmi available (ordre de preference), ou None."""
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        match = ACCEPT_ENCODING_RE.match(item)
+        if not match:
+            continue
+        try:
+            accepted[match.group(1)] = float(match.group(2) or 1)
+        except ValueError:
+            continue
+    wildcard = accepted.get("*", 0)
+    candidates = [encoding for encoding in available if accepted.get(encoding, wildcard) > 0]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda encoding: accepted.get(encoding, wildcard))
+
+
+class CompressionMiddleware:
+    """Minifie puis compresse HTML, XML et texte ; reutilise response.precompressed."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if response.has_header("Content-Encoding") or not is_compressible(response):
+            return response
+        # Minification et Brotli : du calcul pur, dans le pool de threads.
+        return await sync_to_async(self.process_response, thread_sensitive=False)(request, response)
+
+    def process_response(self, request, response):
+        if response.has_header("Content-Encoding") or not prepare(response):
+            return response
+        # CommonMiddleware l'a pose avant minification.
+        response["Content-Length"] = str(len(response.content))
+        if len(response.content) < MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        # BREACH : pas de compression d'une page qui contient le jeton CSRF.
+        # CsrfViewMiddleware a deja remis CSRF_COOKIE_NEEDS_UPDATE a False ;
+        # il pose le cookie a chaque reponse qui a utilise le jeton.
+        if settings.CSRF_COOKIE_NAME in response.cookies:
+            return response
+        encoding = negotiate(request.headers.get("Accept-Encoding", ""))
+        if encoding is None:
+            return response
+
+        precompressed = getattr(response, "precompressed", None) or {}
+        response.content = precompressed.get(encoding) or compress(response.content, encoding)
+        response["Content-Length"] = str(len(response.content))
+        response["Content-Encoding"] = encoding
+        # Meme regle que GZipMiddleware : l'ETag ne designe plus les memes octets.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
@@ -0,0 +1,166 @@
+"""Requetes conditionnelles (ETag / Last-Modified / 304) pour les pages publiques.
+
+Les robots et Cloudflare retelechargeaient chaque page et feed.xml en
+entier alors que Article, Project et LegalPage portent deja un updated_at.
+(sitemap.xml a ses propres validateurs, stockes avec l'artefact : voir
+core/sitemaps.py.)
+
+Les validateurs viennent d'un agregat (MAX(updated_at), COUNT(*)) : une
+seule requete SQL, sans charger ni rendre aucun objet. Le nombre de lignes
+couvre les suppressions, que le max seul ne verrait pas. L'empreinte de la
+CSS (CSS_VERSION, changee a chaque build) entre aussi dans le calcul : un
+deploiement qui modifie les templates invalide les copies des clients.
+
+    @conditional_page(published_articles_state)
+    def blog(request): ...
+
+Une requete sans If-None-Match / If-Modified-Since ne peut pas recevoir de
+304 : l'agregat n'y sert qu'aux en-tetes de la reponse. Il est alors calcule
+apres la vue, et core/page_cache.py garde ETag / Last-Modified avec l'entree
+(request.page_validators) : une page servie par le cache ne coute aucune
+requete SQL.
+
+Les visiteurs authentifies et ceux qui ont un message flash en attente
+recoivent toujours une reponse complete, comme pour core/page_cache.py.
+"""
+
+import datetime
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.db.models import Count, Max
+from django.utils.http import http_date
+from django.views.decorators.http import condition
+
+from .context_processors import _css_version
+from .models import Article, LegalPage, Project
+from .page_cache import is_cacheable_request
+
+CONDITIONAL_HEADERS = (
+    "HTTP_IF_NONE_MATCH", "HTTP_IF_MODIFIED_SINCE", "HTTP_IF_MATCH", "HTTP_IF_UNMODIFIED_SINCE",
+)
+
+
+def _aggregate(queryset):
+    state = queryset.aggregate(last_modified=Max("updated_at"), count=Count("id"))
+    if not state["count"]:
+        return None
+    return state["last_modified"], state["count"]
+
+
+# ---------------------------------------------------------------------------
+# Etats : (dernier updated_at, nombre de lignes) ou None si rien a servir
+# ---------------------------------------------------------------------------
+def published_articles_state(request, *args, **kwargs):
+    return _aggregate(Article.objects.published())
+
+
+def projects_state(request, *args, **kwargs):
+    return _aggregate(Project.objects.all())
+
+
+def article_state(request, slug):
+    return _aggregate(Article.objects.published().filter(slug=slug))
+
+
+def project_state(request, slug):
+    return _aggregate(Project.objects.filter(slug=slug))
+
+
+def legal_page_state(request, slug):
+    return _aggregate(LegalPage.objects.filter(slug=slug))
+
+
+# ---------------------------------------------------------------------------
+# Decorateur
+# ---------------------------------------------------------------------------
+def conditional_page(state_func):
+    """Ajoute ETag / Last-Modified a une vue et repond 304 si rien n'a change.
+
+    Vue synchrone ou asynchrone (core/async_views.py).
+    """
+    memo_attr = f"_conditional_{state_func.__name__}"
+
+    def state(request, *args, **kwargs):
+        # condition() appelle etag_func puis last_modified_func : un seul agregat.
+        if not hasattr(request, memo_attr):
+            value = None
+            if is_cacheable_request(request):
+                value = state_func(request, *args, **kwargs)
+            setattr(request, memo_attr, value)
+        return getattr(request, memo_attr)
+
+    def etag(request, *args, **kwargs):
+        value = state(request, *args, **kwargs)
+        if value is None:
+            return None
+        last_modified, count = value
+        raw = f"{state_func.__name__}:{count}:{last_modified.isoformat()}:{_css_version()}"
+        # Faible : le contenu est equivalent, pas forcement identique octet par octet.
+        return f'W/"{hashlib.md5(raw.encode()).hexdigest()}"'
+
+    def last_modified(request, *args, **kwargs):
+        value = state(request, *args, **kwargs)
+        if value is None:
+            return None
+        last_modified = value[0]
+        css_version = _css_version()
+        if css_version:
+            deployed_at = datetime.datetime.fromtimestamp(int(css_version), tz=datetime.timezone.utc)
+            last_modified = max(last_modified, deployed_at)
+        return last_modified
+
+    def headers(request, *args, **kwargs):
+        result = {}
+        value = etag(request, *args, **kwargs)
+        if value:
+            result["ETag"] = value
+        value = last_modified(request, *args, **kwargs)
+        if value:
+            result["Last-Modified"] = http_date(value.timestamp())
+        return result
+
+    def apply(request, response, args, kwargs):
+        if response.status_code == 200 and request.method in ("GET", "HEAD"):
+            for name, value in headers(request, *args, **kwargs).items():
+                response[name] = value
+        return response
+
+    conditional = condition(etag_func=etag, last_modified_func=last_modified)
+
+    def decorator(view_func):
+        conditional_view = conditional(view_func)
+
+        if not iscoroutinefunction(view_func):
+            @wraps(view_func)
+            def wrapper(request, *args, **kwargs):
+                if any(header in request.META for header in CONDITIONAL_HEADERS):
+                    # Une page du cache porte les validateurs de son entree :
+                    # ceux de l'agregat, deja calcule, font foi.
+                    return apply(request, conditional_view(request, *args, **kwargs), args, kwargs)
+                request.page_validators = lambda: headers(request, *args, **kwargs)
+                response = view_func(request, *args, **kwargs)
+                if "ETag" in response:
+                    return response
+                return apply(request, response, args, kwargs)
+
+            return wrapper
+
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            if any(header in request.META for header in CONDITIONAL_HEADERS):
+                # condition() appelle etag / last_modified dans la boucle :
+                # l'agregat SQL (et la session, via is_cacheable_request) est
+                # calcule avant, dans un thread, puis relu depuis la memoisation.
+                await sync_to_async(state)(request, *args, **kwargs)
+                return apply(request, await conditional_view(request, *args, **kwargs), args, kwargs)
+            request.page_validators = lambda: headers(request, *args, **kwargs)
+            response = await view_func(request, *args, **kwargs)
+            if "ETag" in response:
+                return response
+            return await sync_to_async(apply)(request, response, args, kwargs)
+
+        return wrapper
+
+    return decorator
@@ -1,3 +1,4 @@
+import hashlib
 from functools import lru_cache
 from pathlib import Path
 
@@ -26,9 +27,37 @@ def _css_version():
     return ""
 
 
+# Gabarits mis en cache par fragment dans base.html.
+FRAGMENT_TEMPLATES = ("core/partials/header.html", "core/partials/footer.html")
+
+
+@lru_cache(maxsize=1)
+def _fragment_version():
+    """Version des fragments {% cache %} de base.html (en-tete, pied de page).
+
+    Le cache survit aux redemarrages : la cle doit changer avec tout ce que
+    les fragments affichent sans le recevoir en argument de {% cache %} —
+    CSS compilee, liens sociaux et contact, et le source des gabarits.
+    """
+    parts = [_css_version(), settings.STATIC_URL]
+    parts += [
+        str(getattr(settings, name, ""))
+        for name in ("WHATSAPP_URL", "GITHUB_URL", "LINKEDIN_URL", "FACEBOOK_URL", "X_URL", "PUBLIC_EMAIL")
+    ]
+    for template in FRAGMENT_TEMPLATES:
+        for base in map(Path, settings.TEMPLATES[0]["DIRS"]):
+            try:
+                parts.append(str((base / template).stat().st_mtime_ns))
+            except OSError:
+                continue
+    return hashlib.md5("|".join(parts).encode()).hexdigest()[:12]
+
+
 def global_settings(request):
     return {
         'CSS_VERSION': _css_version(),
+        'FRAGMENT_VERSION': _fragment_version(),
+        'FRAGMENT_CACHE_TIMEOUT': settings.FRAGMENT_CACHE_TIMEOUT,
         'WHATSAPP_URL': settings.WHATSAPP_URL,
         'GITHUB_URL': settings.GITHUB_URL,
         'LINKEDIN_URL': settings.LINKEDIN_URL,
@@ -0,0 +1,171 @@
+"""Compteurs du tableau de bord admin, tenus a jour sans COUNT(*).
+
+Le badge "messages non lus" de la barre laterale (core/unfold_callbacks.py)
+est rendu sur chaque page de l'admin : il faisait un COUNT(*) a chaque fois,
+et le tableau de bord en refaisait deux autres.
+
+Les compteurs vivent dans le cache partage (celui du cache de pages) :
+
+- les signaux (core/signals.py) les ajustent de +1 / -1 apres le commit,
+  les actions groupees de l'admin (queryset.update, sans signaux) du nombre
+  de lignes modifiees ;
+- chaque valeur expire apres COUNTERS_RECONCILE_INTERVAL secondes et est
+  alors recalculee depuis la base (un COUNT par intervalle) : un ajustement
+  perdu (lecture concurrente d'un compteur en cours de recalcul, update()
+  fait en shell) ne fausse le chiffre que jusque-la.
+
+Compteurs journaliers (cle par date locale, gardes DAILY_RETENTION jours) :
+contacts recus, recalculables depuis Contact.created_at, et formulaires
+rejetes comme spam, qui n'existent que dans le cache.
+"""
+
+import datetime
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.db.utils import OperationalError, ProgrammingError
+from django.utils import timezone
+
+DAILY_RETENTION = 35
+
+
+def _cache():
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+
+def _timeout():
+    return settings.COUNTERS_RECONCILE_INTERVAL
+
+
+def _count(model_name, **filters):
+    try:
+        return apps.get_model("core", model_name).objects.filter(**filters).count()
+    except (OperationalError, ProgrammingError):  # tables absentes (migrate pas encore lance)
+        return 0
+
+
+# nom -> calcul de reference depuis la base
+COUNTERS = {
+    "contacts_unread": lambda: _count("Contact", is_read=False),
+    "contacts_unanswered": lambda: _count("Contact", is_responded=False),
+    "articles_published": lambda: _count("Article", is_published=True),
+}
+
+
+def _key(name):
+    return f"counters:{name}"
+
+
+def get(name):
+    """Valeur du compteur ; recalculee depuis la base si absente ou expiree."""
+    value = _cache().get(_key(name))
+    if value is None:
+        value = reconcile(name)[name]
+    return value
+
+
+def get_many(*names):
+    cache = _cache()
+    values = cache.get_many([_key(name) for name in names])
+    result = {name: values.get(_key(name)) for name in names}
+    missing = [name for name, value in result.items() if value is None]
+    if missing:
+        result.update(reconcile(*missing))
+    return result
+
+
+def reconcile(*names):
+    """Recalcule les compteurs depuis la base (tous si aucun nom)."""
+    values = {name: COUNTERS[name]() for name in names or COUNTERS}
+    _cache().set_many({_key(name): value for name, value in values.items()}, _timeout())
+    return values
+
+
+def adjust(name, delta):
+    """Ajoute delta au compteur, apres le commit de la transaction en cours.
+
+    Un compteur absent du cache n'est pas cree : il sera recalcule en entier
+    a la prochaine lecture.
+    """
+    if not delta:
+        return
+
+    def apply():
+        try:
+            _cache().incr(_key(name), delta)
+        except ValueError:
+            pass
+
+    transaction.on_commit(apply)
+
+
+# ---------------------------------------------------------------------------
+# Compteurs journaliers
+# ---------------------------------------------------------------------------
+def _daily_key(name, day):
+    return f"counters:daily:{name}:{day.isoformat()}"
+
+
+def record(name, day=None):
+    """+1 sur le compteur journalier name (jour local courant par defaut).
+
+    Comme adjust() pour un compteur recalculable : une cle absente est
+    laissee au prochain recalcul plutot que creee a 1.
+    """
+    day = day or timezone.localdate()
+    cache = _cache()
+    key = _daily_key(name, day)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if DAILY_SOURCES[name] is None and not cache.add(key, 1, DAILY_RETENTION * 86400):
+            cache.incr(key)
+
+
+def _contacts_by_day(days):
+    try:
+        rows = (
+            apps.get_model("core", "Contact").objects
+            .filter(created_at__date__gte=days[0])
+            .annotate(day=TruncDate("created_at"))
+            .values("day")
+            .annotate(n=Count("id"))
+            .order_by()
+        )
+        by_day = {row["day"]: row["n"] for row in rows}
+    except (OperationalError, ProgrammingError):
+        by_day = {}
+    return {day: by_day.get(day, 0) for day in days}
+
+
+# compteur journalier -> recalcul depuis la base (None : cache seul)
+DAILY_SOURCES = {
+    "contacts": _contacts_by_day,
+    "spam_rejections": None,
+}
+
+
+def daily(name, days=7):
+    """[(date, valeur)] des `days` derniers jours, du plus ancien a aujourd'hui."""
+    today = timezone.localdate()
+    dates = [today - datetime.timedelta(days=offset) for offset in range(days - 1, -1, -1)]
+    cache = _cache()
+    values = cache.get_many([_daily_key(name, day) for day in dates])
+    result = {day: values.get(_daily_key(name, day)) for day in dates}
+
+    missing = [day for day, value in result.items() if value is None]
+    source = DAILY_SOURCES[name]
+    if missing and source:
+        computed = source(missing)
+        # add() : ne pas ecraser un record() arrive entre-temps. Le jour en
+        # cours est reconcilie comme les autres compteurs ; les jours passes
+        # ne bougent plus.
+        for day, value in computed.items():
+            timeout = _timeout() if day == today else DAILY_RETENTION * 86400
+            cache.add(_daily_key(name, day), value, timeout)
+        result.update(computed)
+    return [(day, value or 0) for day, value in result.items()]
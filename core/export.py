@@ -0,0 +1,220 @@
+"""Export statique des pages publiques, servi par nginx sans Gunicorn.
+
+Les pages publiques ne changent que lorsqu'un objet est enregistre dans
+l'admin ; services et competences ne changent jamais entre deux
+deploiements. export_site les rend une fois dans STATIC_EXPORT_ROOT :
+
+    index.html                      /
+    blog/index.html                 /blog/
+    blog/<slug>/index.html          /blog/<slug>/
+    feed.xml, sitemap.xml, robots.txt ...
+
+chacune avec ses variantes .br et .gz (core/compression.py), pour
+"brotli_static" / "gzip_static". nginx les sert par try_files (voir le
+fichier nginx) ; contact, recherche, admin, pages paginees (?c=) et
+visiteurs connectes continuent d'aller a Django.
+
+Invalidation. Chaque page est rattachee aux tags du cache de pages
+(core/page_cache.py) de sa vue : le manifeste (.manifest.json) retient,
+par page, les versions de tags au moment du rendu.
+
+- Apres un enregistrement, core/signals.py appelle discard() : les fichiers
+  des pages touchees sont supprimes aussitot, nginx retombe sur Django (qui
+  sert la version a jour) jusqu'au prochain export.
+- `export_site --changed` ne rend que les pages absentes ou dont une version
+  de tag a change ; l'export complet (deploiement) compare le contenu et ne
+  reecrit que les fichiers modifies.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.urls import resolve, reverse
+
+from . import compression
+from .models import Article, LegalPage, Project
+from .page_cache import tag_versions
+from .sitemaps import SITEMAP_TAGS, SITEMAPS
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = ".manifest.json"
+
+# Vues sans page_cache_tags (core/page_cache.py) dont le contenu depend
+# quand meme des donnees.
+EXTRA_TAGS = {
+    "article_feed": ("articles",),
+    "sitemap": SITEMAP_TAGS,
+    "sitemap_section": SITEMAP_TAGS,
+}
+
+
+def export_root():
+    return Path(settings.STATIC_EXPORT_ROOT)
+
+
+# ---------------------------------------------------------------------------
+# Pages a exporter
+# ---------------------------------------------------------------------------
+def public_paths():
+    """Chemins de toutes les pages exportables (slugs seuls, sans tri)."""
+    paths = [reverse(name) for name in ("home", "services", "skills", "blog", "portfolio", "article_feed")]
+    paths += ["/robots.txt", reverse("sitemap")]
+    sitemaps = {name: cls() for name, cls in SITEMAPS.items()}
+    if any(sitemap.paginator.num_pages > 1 for sitemap in sitemaps.values()):
+        # sitemap.xml est alors un index : premiere page de chaque section.
+        paths += [reverse("sitemap_section", args=[name]) for name in sitemaps]
+
+    for name, queryset in (
+        ("article_detail", Article.objects.published()),
+        ("project_detail", Project.objects.all()),
+        ("legal_page", LegalPage.objects.all()),
+    ):
+        paths += [reverse(name, args=[slug]) for slug in queryset.order_by().values_list("slug", flat=True)]
+    return paths
+
+
+def tags_for(path):
+    """Tags du cache de pages dont depend la page (ceux de sa vue)."""
+    match = resolve(path)
+    tags = getattr(match.func, "page_cache_tags", None)
+    if tags is None:
+        return list(EXTRA_TAGS.get(match.url_name, ()))
+    return [tag.format(**match.kwargs) for tag in tags]
+
+
+def file_for(path):
+    relative = path.lstrip("/")
+    if not relative or relative.endswith("/"):
+        relative += "index.html"
+    return relative
+
+
+# ---------------------------------------------------------------------------
+# Manifeste
+# ---------------------------------------------------------------------------
+def load_manifest(root=None):
+    try:
+        return json.loads(((root or export_root()) / MANIFEST).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(root, manifest):
+    _write(root / MANIFEST, json.dumps(manifest, indent=1, sort_keys=True).encode())
+
+
+def _write(target, data):
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, target)  # atomique : nginx ne lit jamais un fichier a moitie ecrit
+
+
+def _remove(root, relative):
+    for suffix in ("", ".br", ".gz"):
+        try:
+            (root / (relative + suffix)).unlink()
+        except FileNotFoundError:
+            pass
+
+
+def discard(*tags):
+    """Supprime les fichiers exportes qui dependent d'un des tags (apres un save).
+
+    Sans effet tant qu'aucun export n'a ete fait. Le manifeste n'est pas
+    modifie : le prochain export voit le fichier manquant et le regenere.
+    """
+    root = export_root()
+    manifest = load_manifest(root)
+    if not manifest or not tags:
+        return 0
+    wanted = set(tags)
+    removed = 0
+    for entry in manifest.values():
+        if wanted.intersection(entry["tags"]):
+            _remove(root, entry["file"])
+            removed += 1
+    return removed
+
+
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+def _client():
+    # Import tardif : core/signals.py importe ce module dans chaque worker.
+    from django.test import Client
+
+    origin = urlsplit(settings.STATIC_EXPORT_ORIGIN)
+    return Client(HTTP_HOST=origin.netloc), origin.scheme == "https"
+
+
+def export(changed_only=False, root=None, log=None):
+    """Rend les pages publiques dans root ; retourne {written, unchanged, skipped, removed}.
+
+    changed_only : ne rend que les pages absentes ou dont un tag a change.
+    """
+    root = Path(root or export_root())
+    log = log or (lambda message: None)
+    manifest = load_manifest(root)
+    client, secure = _client()
+    counts = {"written": 0, "unchanged": 0, "skipped": 0, "removed": 0}
+    new_manifest = {}
+
+    for path in public_paths():
+        tags = tags_for(path)
+        # Lues AVANT le rendu : un save pendant le rendu sera vu au prochain export.
+        versions = tag_versions(*tags) if tags else []
+        relative = file_for(path)
+        previous = manifest.get(path)
+
+        if (
+            changed_only
+            and previous
+            and previous["versions"] == versions
+            and (root / relative).exists()
+        ):
+            new_manifest[path] = previous
+            counts["unchanged"] += 1
+            continue
+
+        response = client.get(path, secure=secure)
+        # Une page qui pose un cookie (jeton CSRF...) est propre au visiteur.
+        if response.status_code != 200 or response.cookies or response.streaming:
+            logger.warning("Export ignore | %s status=%s", path, response.status_code)
+            log(f"  ! {path} ({response.status_code})")
+            counts["skipped"] += 1
+            continue
+
+        body = response.content
+        digest = hashlib.md5(body).hexdigest()
+        entry = {"file": relative, "hash": digest, "tags": tags, "versions": versions}
+        new_manifest[path] = entry
+        if previous and previous["hash"] == digest and (root / relative).exists():
+            counts["unchanged"] += 1
+            continue
+
+        # Deja minifie par CompressionMiddleware ; deja compresse si la page
+        # sort du cache de pages.
+        encodings = getattr(response, "precompressed", None) or compression.encode_all(body)
+        _remove(root, relative)
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if encoding in encodings:
+                _write(root / (relative + suffix), encodings[encoding])
+        _write(root / relative, body)
+        counts["written"] += 1
+        log(f"  + {path}")
+
+    for path, entry in manifest.items():
+        if path not in new_manifest:
+            _remove(root, entry["file"])
+            counts["removed"] += 1
+            log(f"  - {path}")
+
+    _save_manifest(root, new_manifest)
+    return counts
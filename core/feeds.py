@@ -8,13 +8,15 @@ class LatestArticlesFeed(Feed):
     description = "Derniers articles tech et tutoriels de Horuservices."
 
     def items(self):
-        return Article.objects.filter(is_published=True).order_by('-created_at')[:10]
+        return Article.objects.published().cards().recent()[:10]
 
     def item_title(self, item):
         return item.title
 
     def item_description(self, item):
-        return item.summary
+        # Extrait du corps calcule a l'enregistrement (core/richtext.py) ; le
+        # resume SEO pour une ligne pas encore recalculee.
+        return item.excerpt or item.summary
 
     def item_pubdate(self, item):
         return item.created_at
\ No newline at end of file
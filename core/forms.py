@@ -1,49 +1,24 @@
 from django import forms
 from django.core.exceptions import ValidationError
-from django.core.cache import cache
 from django.utils import timezone
 import re
 
 from .models import Contact
+from .ratelimit import RateLimiter
+from .spam import get_engine
 
 
-# Blacklist simple (tu peux déplacer en settings.py plus tard)
-BLOCKED_EMAILS = {
-    "zekisuquc419@gmail.com",
-}
-
-BLOCKED_DOMAINS = {
-    # Domaines jetables / temporaires
-    "tempmail.com",
-    "10minutemail.com",
-    "mailinator.com",
-    "guerrillamail.com",
-    "throwaway.email",
-    "yopmail.com",
-    "trashmail.com",
-    "dispostable.com",
-    "maildrop.cc",
-    "sharklasers.com",
-    "guerrillamailblock.com",
-    "grr.la",
-    "tempail.com",
-    "temp-mail.org",
-    "fakeinbox.com",
-    "mohmal.com",
-    "getnada.com",
-    "emailondeck.com",
-    "33mail.com",
-    "mailnesia.com",
-    "mintemail.com",
-    "tempr.email",
-    "discard.email",
-    "mailcatch.com",
-    "harakirimail.com",
-}
+# Adresses, domaines jetables et mots-cles bloques : voir SpamRule (admin)
+# et core/spam.py.
+
+# Heuristiques fixes, compilees une fois pour toutes.
+LINK_RE = re.compile(r"https?://|www\.")
+REPEATED_CHAR_RE = re.compile(r"(.)\1{5,}")
 
 # Rate limiting : max de soumissions par IP
 RATE_LIMIT_MAX = 5  # max 5 soumissions
 RATE_LIMIT_WINDOW = 3600  # par heure (en secondes)
+CONTACT_RATE_LIMIT = RateLimiter("contact", RATE_LIMIT_MAX, RATE_LIMIT_WINDOW)
 
 
 def _get_client_ip(request):
@@ -95,6 +70,9 @@ class ContactForm(forms.ModelForm):
         form = ContactForm(request.POST or None, request=request)
         """
         self.request = kwargs.pop("request", None)
+        # Passe a True si un des controles anti-spam a rejete la soumission
+        # (compteur "spam_rejections" du tableau de bord, core/counters.py).
+        self.spam_detected = False
         super().__init__(*args, **kwargs)
 
         # Honeypot rendu invisible sans casser le backend
@@ -105,6 +83,10 @@ class ContactForm(forms.ModelForm):
             "aria-hidden": "true",
         })
 
+    def _spam(self, message):
+        self.spam_detected = True
+        return ValidationError(message)
+
     def clean_name(self):
         name = (self.cleaned_data.get("name") or "").strip()
         if len(name) < 2:
@@ -124,21 +106,23 @@ class ContactForm(forms.ModelForm):
     def clean_email(self):
         email = (self.cleaned_data.get("email") or "").strip().lower()
 
+        engine = get_engine()
+
         # Blocage email exact
-        if email in BLOCKED_EMAILS:
-            raise ValidationError("Adresse email non autorisée.")
+        if engine.is_blocked_email(email):
+            raise self._spam("Adresse email non autorisée.")
 
         # Blocage domaine
         if "@" in email:
             domain = email.split("@")[-1]
-            if domain in BLOCKED_DOMAINS:
-                raise ValidationError("Domaine email non autorisé.")
+            if engine.is_blocked_domain(domain):
+                raise self._spam("Domaine email non autorisé.")
 
             # Rejeter les emails avec trop de chiffres (souvent générés par bots)
             local_part = email.split("@")[0]
             digit_count = sum(1 for c in local_part if c.isdigit())
             if len(local_part) > 3 and digit_count > len(local_part) * 0.6:
-                raise ValidationError("Adresse email non autorisée.")
+                raise self._spam("Adresse email non autorisée.")
 
         return email
 
@@ -150,36 +134,25 @@ class ContactForm(forms.ModelForm):
         # Heuristiques anti-spam
         lower_msg = message.lower()
 
-        spam_keywords = [
-            "crypto", "bitcoin", "ethereum", "nft", "blockchain",
-            "casino", "poker", "betting", "gambling",
-            "loan", "forex", "trading", "investment opportunity",
-            "seo service", "seo optimization", "backlink",
-            "whatsapp", "telegram",
-            "viagra", "cialis", "pharmacy", "diet pill",
-            "click here", "buy now", "free money", "earn money",
-            "make money online", "work from home", "passive income",
-            "nigerian prince", "lottery winner",
-            "cheap followers", "buy followers", "instagram followers",
-        ]
-        if any(keyword in lower_msg for keyword in spam_keywords):
-            raise forms.ValidationError("Message détecté comme spam.")
+        # Mots-cles (SpamRule) : une seule expression compilee, un seul passage
+        if get_engine().match_keyword(lower_msg):
+            raise self._spam("Message détecté comme spam.")
 
         # Trop de liens => suspect
-        links_count = len(re.findall(r"https?://|www\.", lower_msg))
+        links_count = len(LINK_RE.findall(lower_msg))
         if links_count >= 2:
-            raise forms.ValidationError("Trop de liens dans le message.")
+            raise self._spam("Trop de liens dans le message.")
 
         # Détection de caractères répétitifs (ex: "aaaaaa", "!!!!!!")
-        if re.search(r"(.)\1{5,}", message):
-            raise forms.ValidationError("Message détecté comme spam.")
+        if REPEATED_CHAR_RE.search(message):
+            raise self._spam("Message détecté comme spam.")
 
         # Trop de majuscules (cri / spam)
         alpha_chars = [c for c in message if c.isalpha()]
         if len(alpha_chars) > 20:
             upper_ratio = sum(1 for c in alpha_chars if c.isupper()) / len(alpha_chars)
             if upper_ratio > 0.7:
-                raise forms.ValidationError("Évitez d'écrire en majuscules.")
+                raise self._spam("Évitez d'écrire en majuscules.")
 
         return message
 
@@ -197,7 +170,7 @@ class ContactForm(forms.ModelForm):
         """Honeypot : si rempli, très probable bot."""
         value = (self.cleaned_data.get("website") or "").strip()
         if value:
-            raise ValidationError("Spam détecté.")
+            raise self._spam("Spam détecté.")
         return value
 
     def clean(self):
@@ -205,14 +178,11 @@ class ContactForm(forms.ModelForm):
 
         # Rate limiting par IP
         if self.request:
-            ip = _get_client_ip(self.request)
-            cache_key = f"contact_rate_{ip}"
-            submissions = cache.get(cache_key, 0)
-            if submissions >= RATE_LIMIT_MAX:
-                raise ValidationError(
+            # Test + comptage atomiques, fenetre glissante (core/ratelimit.py)
+            if not CONTACT_RATE_LIMIT.hit(_get_client_ip(self.request)):
+                raise self._spam(
                     "Trop de soumissions. Veuillez réessayer plus tard."
                 )
-            cache.set(cache_key, submissions + 1, RATE_LIMIT_WINDOW)
 
         # Vérification "soumission trop rapide"
         started_at = (cleaned_data.get("form_started_at") or "").strip()
@@ -224,7 +194,7 @@ class ContactForm(forms.ModelForm):
 
                 # Si soumis en moins de 3 secondes => suspect
                 if elapsed < 3:
-                    raise ValidationError("Soumission trop rapide. Veuillez réessayer.")
+                    raise self._spam("Soumission trop rapide. Veuillez réessayer.")
             except (TypeError, ValueError):
                 pass
 
@@ -0,0 +1,109 @@
+"""Declinaisons responsives des images de couverture (srcset).
+
+Les ResizedImageField stockent une seule image WebP de 1200 px de large,
+servie telle quelle dans des cartes d'environ 335 px : sur mobile (3G/4G)
+le visiteur telechargeait pres de quatre fois trop d'octets.
+
+La commande build_image_variants (timer systemd horus-images, chaque
+minute) genere, pour chaque nouvelle image, des copies plus etroites a cote
+de l'original :
+
+    blog/cover.webp  ->  blog/cover-320w.webp, blog/cover-640w.webp, ...
+
+et on les decrit dans un manifeste JSON stocke sur l'objet
+(champ image_manifest) :
+
+    {"src": "blog/cover.webp", "width": 1200, "height": 675,
+     "variants": [{"name": "blog/cover-320w.webp", "width": 320, "height": 180}, ...]}
+
+Le tag {% responsive_image %} (core/templatetags/responsive_images.py) s'en
+sert pour emettre srcset / sizes et des width / height explicites, ce qui
+evite aussi le decalage de mise en page au chargement.
+
+L'encodage WebP (method=6) prend plusieurs secondes par image : il ne se
+fait plus pendant l'enregistrement dans l'admin. D'ici le passage suivant
+de la commande, le manifeste ne correspond plus a l'image et le tag sert
+l'original seul.
+"""
+
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+# Largeurs generees (l'original, plus large, est toujours ajoute en dernier).
+RESPONSIVE_WIDTHS = (320, 640, 960)
+QUALITY = 80
+
+
+def variant_name(name, width):
+    path = PurePosixPath(name)
+    return str(path.with_name(f"{path.stem}-{width}w.webp"))
+
+
+def manifest_is_current(field_file, manifest):
+    return bool(field_file) and (manifest or {}).get("src") == field_file.name
+
+
+def build_manifest(field_file, widths=RESPONSIVE_WIDTHS):
+    """Genere les declinaisons d'une image et retourne son manifeste."""
+    storage = field_file.storage
+
+    with field_file.open("rb") as source, Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGB")
+        width, height = img.size
+
+        variants = []
+        for target in sorted(widths):
+            if target >= width:
+                break
+            target_height = round(height * target / width)
+            buffer = BytesIO()
+            img.resize((target, target_height), Image.LANCZOS).save(
+                buffer, format="WEBP", quality=QUALITY, method=6
+            )
+            name = variant_name(field_file.name, target)
+            if storage.exists(name):
+                storage.delete(name)
+            name = storage.save(name, ContentFile(buffer.getvalue()))
+            variants.append({"name": name, "width": target, "height": target_height})
+
+    variants.append({"name": field_file.name, "width": width, "height": height})
+    return {"src": field_file.name, "width": width, "height": height, "variants": variants}
+
+
+def delete_variants(storage, manifest):
+    """Supprime les declinaisons d'un ancien manifeste (jamais l'original)."""
+    for variant in (manifest or {}).get("variants", []):
+        if variant["name"] != manifest.get("src") and storage.exists(variant["name"]):
+            storage.delete(variant["name"])
+
+
+def refresh_manifest(instance, field_name="image", manifest_field="image_manifest", force=False):
+    """Met a jour le manifeste de l'objet si son image a change.
+
+    Ecrit via queryset.update() pour ne pas redeclencher save() et ses
+    signaux. Retourne True si le manifeste a ete regenere.
+    """
+    field_file = getattr(instance, field_name)
+    old_manifest = getattr(instance, manifest_field) or {}
+
+    if not force and (manifest_is_current(field_file, old_manifest) or (not field_file and not old_manifest)):
+        return False
+
+    manifest = {}
+    if field_file:
+        try:
+            manifest = build_manifest(field_file)
+        except (FileNotFoundError, OSError):
+            manifest = {}
+
+    if old_manifest.get("src") != manifest.get("src"):
+        delete_variants(field_file.storage, old_manifest)
+
+    setattr(instance, manifest_field, manifest)
+    type(instance).objects.filter(pk=instance.pk).update(**{manifest_field: manifest})
+    return True
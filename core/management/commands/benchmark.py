@@ -0,0 +1,46 @@
+"""Lance les micro-benchmarks de core/benchmarks/.
+
+    python manage.py benchmark --list
+    python manage.py benchmark spam
+    python manage.py benchmark spam --repeat 10 --json
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmarks
+
+
+class Command(BaseCommand):
+    help = "Lance un ou plusieurs micro-benchmarks (core/benchmarks/)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("names", nargs="*", help="Benchmarks a lancer (defaut : tous).")
+        parser.add_argument("--list", action="store_true", help="Liste les benchmarks disponibles.")
+        parser.add_argument("--repeat", type=int, default=5, help="Nombre de series par mesure (defaut : 5).")
+        parser.add_argument("--json", action="store_true", help="Ecrit les resultats en JSON sur la sortie.")
+
+    def handle(self, *args, **options):
+        if options["list"]:
+            for name in benchmarks.BENCHMARKS:
+                self.stdout.write(f"{name:<12} {benchmarks.load(name).DESCRIPTION}")
+            return
+
+        names = options["names"] or list(benchmarks.BENCHMARKS)
+        unknown = [name for name in names if name not in benchmarks.BENCHMARKS]
+        if unknown:
+            raise CommandError(
+                f"Benchmark inconnu : {', '.join(unknown)} (disponibles : {', '.join(benchmarks.BENCHMARKS)})"
+            )
+
+        as_json = options["json"]
+        write = (lambda line: None) if as_json else self.stdout.write
+        results = {}
+        for name in names:
+            module = benchmarks.load(name)
+            write(self.style.MIGRATE_HEADING(f"\n{name} — {module.DESCRIPTION}"))
+            results[name] = module.run(write, max(1, options["repeat"]))
+
+        if as_json:
+            self.stdout.write(json.dumps(results, indent=2, default=str))
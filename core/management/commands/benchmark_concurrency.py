@@ -0,0 +1,66 @@
+"""Compare le debit et la latence de queue de serveurs lances en local.
+
+Voir core/benchmarks/concurrency.py pour le detail des mesures. Les deux
+profils servent la meme base (corpus de seed_corpus) :
+
+    python manage.py seed_corpus
+    gunicorn config.wsgi:application -w 3 -b 127.0.0.1:8001
+    GUNICORN_BIND=127.0.0.1:8002 GUNICORN_WORKERS=3 \\
+        gunicorn -c config/gunicorn_asgi.py config.asgi:application
+
+    python manage.py benchmark_concurrency --target wsgi=http://127.0.0.1:8001 \\
+        --target asgi=http://127.0.0.1:8002
+    python manage.py benchmark_concurrency --target asgi=http://127.0.0.1:8002 \\
+        --concurrency 50 --duration 30 --route search --save benchmarks/concurrency.json
+"""
+
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import concurrency
+
+
+class Command(BaseCommand):
+    help = "Requetes/s et latence p50/p95/p99 de serveurs HTTP sous charge concurrente."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target", action="append", required=True, metavar="NOM=URL",
+            help="Serveur a charger (repetable), ex. asgi=http://127.0.0.1:8002.",
+        )
+        parser.add_argument(
+            "--route", action="append", dest="routes",
+            help=f"Route du melange (repetable ; defaut : {', '.join(concurrency.DEFAULT_ROUTES)}).",
+        )
+        parser.add_argument("--concurrency", type=int, default=200, help="Clients simultanes (defaut : 200).")
+        parser.add_argument("--duration", type=float, default=10.0, help="Duree par serveur, en secondes (defaut : 10).")
+        parser.add_argument("--save", metavar="FICHIER", help="Enregistre les resultats en JSON.")
+
+    def handle(self, *args, **options):
+        targets = {}
+        for value in options["target"]:
+            label, sep, url = value.partition("=")
+            if not sep or not url.startswith("http://"):
+                raise CommandError(f"--target attendu sous la forme NOM=http://hote:port, recu : {value}")
+            targets[label] = url
+
+        try:
+            requests = concurrency.paths(options["routes"] or concurrency.DEFAULT_ROUTES)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(
+            f"{options['concurrency']} clients, {options['duration']:.0f} s par serveur : "
+            + ", ".join(path for _, path in requests)
+        )
+        results = concurrency.measure(
+            targets, requests, options["concurrency"], options["duration"], write=self.stdout.write
+        )
+
+        if options["save"]:
+            path = Path(options["save"])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(results, indent=2))
+            self.stdout.write(self.style.SUCCESS(f"Resultats enregistres : {path}"))
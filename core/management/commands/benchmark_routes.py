@@ -0,0 +1,72 @@
+"""Mesure chaque route publique et la compare a une reference JSON.
+
+Voir core/benchmarks/routes.py pour le detail des mesures. Sur un corpus
+genere par seed_corpus (meme graine), les chiffres sont comparables d'une
+execution a l'autre sur la meme machine :
+
+    python manage.py seed_corpus
+    python manage.py benchmark_routes --save benchmarks/routes.json
+    python manage.py benchmark_routes --compare benchmarks/routes.json --tolerance 0.25
+    python manage.py benchmark_routes --cold --requests 20 blog article_detail
+    python manage.py benchmark_routes --base-url http://127.0.0.1:8000
+
+Avec --compare, la commande echoue (code de sortie 1) si une route est
+plus lente que la reference au-dela de la tolerance (p50 ou p95), fait
+plus de requetes SQL, change de statut, ou si le RSS max augmente.
+"""
+
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import routes
+
+
+class Command(BaseCommand):
+    help = "Latence, requetes SQL et RSS par route publique ; comparaison a une reference."
+
+    def add_arguments(self, parser):
+        parser.add_argument("names", nargs="*", help="Routes a mesurer (defaut : toutes).")
+        parser.add_argument("--requests", type=int, default=50, help="Requetes mesurees par route (defaut : 50).")
+        parser.add_argument("--cold", action="store_true", help="Sans cache (DummyCache).")
+        parser.add_argument("--base-url", help="Serveur a interroger en HTTP (ex. Gunicorn local).")
+        parser.add_argument("--save", metavar="FICHIER", help="Enregistre les resultats comme reference.")
+        parser.add_argument("--compare", metavar="FICHIER", help="Compare a une reference enregistree.")
+        parser.add_argument("--tolerance", type=float, default=0.2, help="Ecart relatif tolere (defaut : 0.2).")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            try:
+                baseline = json.loads(Path(options["compare"]).read_text())
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Reference illisible : {exc}")
+
+        results = routes.measure(
+            requests=options["requests"],
+            base_url=options["base_url"],
+            cold=options["cold"],
+            only=options["names"] or None,
+            write=self.stdout.write,
+        )
+        if not options["base_url"]:
+            self.stdout.write(f"RSS max : {results['peak_rss_kb']} Ko")
+
+        if options["save"]:
+            target = Path(options["save"])
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(json.dumps(results, indent=2))
+            self.stdout.write(self.style.SUCCESS(f"Reference enregistree : {target}"))
+
+        if baseline is not None:
+            if baseline.get("corpus") != results["corpus"]:
+                self.stdout.write(self.style.WARNING(
+                    f"Corpus different de la reference : {baseline.get('corpus')} / {results['corpus']}"
+                ))
+            regressions = routes.compare(results, baseline, options["tolerance"])
+            if regressions:
+                for message in regressions:
+                    self.stderr.write(f"  - {message}")
+                raise CommandError(f"{len(regressions)} regression(s) au-dela de {options['tolerance']:.0%}")
+            self.stdout.write(self.style.SUCCESS(f"Aucune regression au-dela de {options['tolerance']:.0%}"))
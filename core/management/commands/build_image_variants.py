@@ -0,0 +1,97 @@
+"""Genere les declinaisons responsives (srcset) des images et convertit les
+images integrees aux contenus CKEditor.
+
+Lancee chaque minute par le timer systemd horus-images (systemd/) : traite
+les objets marques images_pending a l'enregistrement (core/signals.py pour
+les couvertures, Article.save / LegalPage.save pour les contenus) et
+invalide les pages qui les affichent. A vide, un passage coute une requete
+par modele sur un index partiel. --force regenere toutes les declinaisons,
+apres un changement de core.images.RESPONSIVE_WIDTHS.
+
+    python manage.py build_image_variants
+    python manage.py build_image_variants --force
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from core.images import refresh_manifest
+from core.models import Article, LegalPage, Project
+from core.richtext import rewrite_content_images
+from core.signals import invalidate_pages
+
+# Modeles avec une image de couverture, avec un contenu CKEditor.
+IMAGE_MODELS = (Article, Project)
+CONTENT_MODELS = (Article, LegalPage)
+
+
+class Command(BaseCommand):
+    help = "Genere les declinaisons srcset des images et convertit les images des contenus."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenere meme les manifestes deja a jour.",
+        )
+
+    def handle(self, *args, **options):
+        built = converted = 0
+        for model in (Article, Project, LegalPage):
+            label = model._meta.verbose_name_plural
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{label}"))
+
+            queryset = model.objects.filter(images_pending=True)
+            fields = ["pk", "slug", "updated_at"]
+            if model in IMAGE_MODELS:
+                if options["force"]:
+                    queryset = model.objects.filter(
+                        Q(images_pending=True) | (~Q(image="") & Q(image__isnull=False))
+                    )
+                fields += ["image", "image_manifest"]
+            # Jamais le corps des articles ici : relu seulement s'il est a convertir.
+            queryset = queryset.only(*fields).order_by("pk")
+
+            for obj in queryset.iterator():
+                if model in IMAGE_MODELS:
+                    built += self._build_variants(obj, options["force"])
+                if model in CONTENT_MODELS:
+                    converted += self._convert_content(model, obj)
+                # Sauf si l'objet a ete reenregistre entre-temps : il reste a traiter.
+                model.objects.filter(pk=obj.pk, updated_at=obj.updated_at).update(images_pending=False)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"\n{built} manifeste(s) genere(s), {converted} balise(s) de contenu reecrite(s)."
+        ))
+
+    def _build_variants(self, obj, force):
+        if not refresh_manifest(obj, force=force):
+            return 0
+        # Ecrit par queryset.update() : pas de signal, le srcset doit
+        # quand meme apparaitre dans les pages en cache et exportees.
+        invalidate_pages(obj)
+        widths = [str(v["width"]) for v in obj.image_manifest.get("variants", [])]
+        if not widths:
+            self.stdout.write(self.style.WARNING(f"  ! {obj} — image illisible"))
+            return 0
+        self.stdout.write(f"  + {obj} — {', '.join(widths)} px")
+        return 1
+
+    def _convert_content(self, model, obj):
+        content = model.objects.filter(pk=obj.pk).values_list("content", flat=True).first()
+        # Encodage hors transaction : plusieurs secondes par image.
+        new_content, changed = rewrite_content_images(content)
+        if not changed:
+            return 0
+        with transaction.atomic():
+            fresh = model.objects.select_for_update().get(pk=obj.pk)
+            if fresh.content != content:
+                # Modifie dans l'admin pendant l'encodage : ce nouvel
+                # enregistrement a pose son propre drapeau.
+                return 0
+            fresh.content = new_content
+            # save() : artefacts de rendu, drapeau, invalidation des pages.
+            fresh.save()
+        self.stdout.write(f"  + {obj} — {changed} balise(s) du contenu reecrite(s)")
+        return changed
@@ -0,0 +1,37 @@
+"""Exporte les pages publiques en fichiers statiques servis par nginx.
+
+Voir core/export.py. A lancer en entier au deploiement (deploy.sh), puis
+en incremental apres les enregistrements de l'admin : chaque minute par
+systemd/horus-export.timer, installe par deploy.sh.
+
+    python manage.py export_site
+    python manage.py export_site --changed
+    python manage.py export_site --root /tmp/export --verbosity 2
+
+Apres un enregistrement, les pages touchees sont deja retirees de
+l'export (core/signals.py) : l'incremental ne fait que les regenerer.
+"""
+
+from django.core.management.base import BaseCommand
+
+from core import export
+
+
+class Command(BaseCommand):
+    help = "Rend les pages publiques (HTML + .br / .gz) dans STATIC_EXPORT_ROOT."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--changed",
+            action="store_true",
+            help="Ne rend que les pages absentes ou modifiees depuis le dernier export.",
+        )
+        parser.add_argument("--root", help="Repertoire cible (defaut : STATIC_EXPORT_ROOT).")
+
+    def handle(self, *args, **options):
+        log = self.stdout.write if options["verbosity"] > 1 else None
+        counts = export.export(changed_only=options["changed"], root=options["root"], log=log)
+        self.stdout.write(self.style.SUCCESS(
+            f"{counts['written']} page(s) ecrite(s), {counts['unchanged']} inchangee(s), "
+            f"{counts['skipped']} ignoree(s), {counts['removed']} supprimee(s)."
+        ))
@@ -0,0 +1,55 @@
+"""Optimise les images integrees aux contenus CKEditor deja en base.
+
+Les nouveaux uploads sont convertis par OptimizedPillowBackend, et les
+images des contenus enregistres depuis par le timer build_image_variants
+(voir core/richtext.py). Cette commande rattrape les contenus anterieurs : elle
+convertit les fichiers de CKEDITOR_UPLOAD_PATH references dans le HTML en
+WebP redimensionne et reecrit les balises (src, width, height, loading,
+decoding). Les fichiers d'origine ne sont pas supprimes.
+
+    python manage.py optimize_content_images --dry-run
+    python manage.py optimize_content_images
+"""
+
+from django.core.management.base import BaseCommand
+
+from core.models import Article, LegalPage
+from core.richtext import rewrite_content_images
+
+
+class Command(BaseCommand):
+    help = "Convertit en WebP les images CKEditor des contenus et reecrit leurs balises <img>."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Compte les contenus a reecrire, sans rien modifier.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        updated = tags = 0
+
+        for model in (Article, LegalPage):
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{model._meta.verbose_name_plural}"))
+
+            for obj in model.objects.filter(content__icontains="<img"):
+                if dry_run:
+                    self.stdout.write(f"  ~ {obj} — {obj.content.lower().count('<img')} image(s)")
+                    continue
+
+                content, changed = rewrite_content_images(obj.content)
+                if not changed:
+                    continue
+                obj.content = content
+                # save() declenche signaux et invalidation du cache de pages.
+                obj.save()
+                self.stdout.write(f"  + {obj} — {changed} balise(s) reecrite(s)")
+                updated += 1
+                tags += changed
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING("\n[dry-run] Aucune modification."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"\n{updated} contenu(s) mis a jour, {tags} balise(s) reecrite(s)."))
@@ -1,37 +1,113 @@
 """Normalise les images deja en base au format cible du modele.
 
-Les champs image de Article et Project sont des ResizedImageField qui forcent
-le WebP et une taille maximale — mais uniquement au moment de l'upload. Les
-fichiers importes avant l'ajout de ces options sont restes tels quels (JPEG
-1920x1280 de 582 Ko servis dans une carte de 335 px, par exemple).
+Les champs image de Article, Project et CustomUser sont des ResizedImageField
+qui forcent le WebP et une taille maximale — mais uniquement au moment de
+l'upload. Les fichiers importes avant l'ajout de ces options sont restes tels
+quels (JPEG 1920x1280 de 582 Ko servis dans une carte de 335 px, par exemple).
 
 Cette commande reconvertit ces fichiers herites et met a jour la base.
 Les originaux ne sont pas supprimes : ils sont seulement dereferences, pour
 pouvoir revenir en arriere. Utiliser --delete-old pour les effacer.
 
+Le travail Pillow (lecture, decodage, encodage WebP) peut etre reparti sur
+plusieurs processus avec --jobs ; les ecritures en base restent dans le
+processus principal. Un manifeste (MEDIA_ROOT/.optimize_images.json) garde
+pour chaque fichier sa taille, sa date et son empreinte SHA-256 : un fichier
+inchange depuis le dernier passage est ignore sans etre relu ni decode.
+
     python manage.py optimize_images --dry-run
-    python manage.py optimize_images
+    python manage.py optimize_images --jobs 4
+    python manage.py optimize_images --since 2026-01-01
 """
 
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, time as dt_time
 from io import BytesIO
 from pathlib import Path
 
+from django.conf import settings
 from django.core.files.base import ContentFile
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from PIL import Image, ImageOps
 
-from core.models import Article, Project
+from core.models import Article, CustomUser, Project
 
-# (modele, taille cible) — aligne sur les ResizedImageField de core/models.py
+# (modele, champ, taille cible) — aligne sur les ResizedImageField de core/models.py
 TARGETS = [
-    (Article, (1200, 675)),
-    (Project, (1200, 900)),
+    (Article, "image", (1200, 675)),
+    (Project, "image", (1200, 900)),
+    (CustomUser, "avatar", (400, 400)),
 ]
 QUALITY = 85
+MANIFEST_VERSION = 1
+
+
+def _process(path, size, known_hash, dry_run):
+    """Travail Pillow d'un fichier, execute dans un processus du pool.
+
+    Une seule lecture du fichier : l'empreinte est calculee sur les octets
+    lus, puis l'image est decodee depuis ce tampon — et seulement si
+    l'empreinte differe de celle du manifeste.
+    """
+    result = {"path": path}
+    try:
+        data = Path(path).read_bytes()
+    except OSError as exc:
+        return {**result, "status": "error", "error": str(exc)}
+
+    digest = hashlib.sha256(data).hexdigest()
+    result.update(sha256=digest, old_bytes=len(data))
+    if digest == known_hash:
+        return {**result, "status": "unchanged"}
+
+    try:
+        with Image.open(BytesIO(data)) as img:
+            img.load()
+            width, height = img.size
+            fmt = (img.format or "").upper()
+
+            needs_format = fmt != "WEBP"
+            needs_resize = width > size[0] or height > size[1]
+            result.update(width=width, height=height, format=fmt)
+            if not (needs_format or needs_resize):
+                return {**result, "status": "compliant"}
+
+            reasons = []
+            if needs_format:
+                reasons.append(f"format {fmt or '?'}")
+            if needs_resize:
+                reasons.append(f"{width}x{height}")
+            result["reasons"] = reasons
+            if dry_run:
+                return {**result, "status": "to_convert"}
+
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail(size, Image.LANCZOS)
+            if img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGB")
+            buffer = BytesIO()
+            img.save(buffer, format="WEBP", quality=QUALITY, method=6)
+    except OSError as exc:
+        return {**result, "status": "error", "error": str(exc)}
+
+    webp = buffer.getvalue()
+    return {
+        **result,
+        "status": "converted",
+        "data": webp,
+        "new_bytes": len(webp),
+    }
 
 
 class Command(BaseCommand):
-    help = "Reconvertit en WebP redimensionne les images heritees (Article, Project)."
+    help = "Reconvertit en WebP redimensionne les images heritees (Article, Project, CustomUser)."
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -44,89 +120,202 @@ class Command(BaseCommand):
             action="store_true",
             help="Supprime le fichier d'origine apres conversion.",
         )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=1,
+            help="Nombre de processus pour le travail Pillow (defaut : 1, sans pool).",
+        )
+        parser.add_argument(
+            "--since",
+            help="Ne traite que les objets modifies depuis cette date (AAAA-MM-JJ[THH:MM]). "
+                 "Sans effet sur CustomUser, qui n'a pas de updated_at.",
+        )
+        parser.add_argument(
+            "--manifest",
+            default=str(Path(settings.MEDIA_ROOT) / ".optimize_images.json"),
+            help="Chemin du manifeste (defaut : MEDIA_ROOT/.optimize_images.json).",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Ignore le manifeste et relit tous les fichiers.",
+        )
 
-    def handle(self, *args, **options):
-        dry_run = options["dry_run"]
-        delete_old = options["delete_old"]
-        total_before = total_after = 0
-        converted = skipped = 0
+    # ------------------------------------------------------------------
+    # Manifeste
+    # ------------------------------------------------------------------
+    def _load_manifest(self, path, force):
+        if force:
+            return {}
+        try:
+            data = json.loads(Path(path).read_text())
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != MANIFEST_VERSION:
+            return {}
+        return data.get("files", {})
+
+    def _save_manifest(self, path, files):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": MANIFEST_VERSION, "files": files}, indent=1, sort_keys=True))
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _stat_entry(path):
+        stat = os.stat(path)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
 
-        for model, size in TARGETS:
-            label = model._meta.verbose_name_plural
-            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{label} (cible {size[0]}x{size[1]} WebP)"))
+    def _parse_since(self, value):
+        if not value:
+            return None
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                raise CommandError(f"--since invalide : {value!r} (attendu AAAA-MM-JJ)")
+            parsed = datetime.combine(day, dt_time.min)
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
 
-            for obj in model.objects.exclude(image="").exclude(image__isnull=True):
-                field = obj.image
+    # ------------------------------------------------------------------
+    # Collecte
+    # ------------------------------------------------------------------
+    def _collect(self, since, manifest):
+        """Liste les fichiers a soumettre au pool ; compte ceux ignores d'office."""
+        tasks, unchanged = [], 0
 
+        for model, field_name, size in TARGETS:
+            queryset = model.objects.exclude(**{field_name: ""}).exclude(**{f"{field_name}__isnull": True})
+            if since and any(f.name == "updated_at" for f in model._meta.fields):
+                queryset = queryset.filter(updated_at__gte=since)
+
+            for obj in queryset.iterator():
+                field = getattr(obj, field_name)
                 try:
-                    old_bytes = field.size
-                    with Image.open(field.path) as img:
-                        img.load()
-                        width, height = img.size
-                        fmt = (img.format or "").upper()
+                    path = field.path
+                    stat = self._stat_entry(path)
                 except (FileNotFoundError, OSError) as exc:
                     self.stdout.write(self.style.WARNING(f"  ! {obj} — illisible ({exc})"))
-                    skipped += 1
                     continue
 
-                needs_format = fmt != "WEBP"
-                needs_resize = width > size[0] or height > size[1]
-
-                if not (needs_format or needs_resize):
-                    self.stdout.write(f"  = {Path(field.name).name} deja conforme")
-                    skipped += 1
+                entry = manifest.get(field.name, {})
+                if entry.get("size") == stat["size"] and entry.get("mtime_ns") == stat["mtime_ns"]:
+                    unchanged += 1
                     continue
+                tasks.append((obj, field_name, size, path, entry.get("sha256")))
 
-                reasons = []
-                if needs_format:
-                    reasons.append(f"format {fmt or '?'}")
-                if needs_resize:
-                    reasons.append(f"{width}x{height}")
-
-                if dry_run:
-                    self.stdout.write(
-                        f"  ~ {Path(field.name).name} — {', '.join(reasons)}, "
-                        f"{old_bytes / 1024:.0f} Ko -> a convertir"
-                    )
-                    total_before += old_bytes
-                    converted += 1
-                    continue
+        return tasks, unchanged
 
-                old_path = Path(field.path)
-                old_name = field.name
+    def _run(self, tasks, jobs, dry_run):
+        """Execute le travail Pillow ; rend (tache, resultat) au fil de l'eau."""
+        if jobs <= 1:
+            for task in tasks:
+                yield task, _process(task[3], task[2], task[4], dry_run)
+            return
+
+        # Les processus fils n'ont pas besoin de la base : on ne leur laisse
+        # pas heriter d'une connexion ouverte.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {
+                pool.submit(_process, task[3], task[2], task[4], dry_run): task
+                for task in tasks
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    # ------------------------------------------------------------------
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        delete_old = options["delete_old"]
+        jobs = max(1, options["jobs"])
+        since = self._parse_since(options["since"])
+        manifest_path = options["manifest"]
+        manifest = self._load_manifest(manifest_path, options["force"])
 
-                with Image.open(old_path) as img:
-                    img = ImageOps.exif_transpose(img)
-                    img.thumbnail(size, Image.LANCZOS)
-                    if img.mode not in ("RGB", "RGBA"):
-                        img = img.convert("RGB")
-                    buffer = BytesIO()
-                    img.save(buffer, format="WEBP", quality=QUALITY, method=6)
+        started = time.perf_counter()
+        total_before = total_after = 0
+        converted = skipped = failed = 0
 
-                new_bytes = buffer.tell()
-                # Nom de fichier seul : upload_to prefixe deja le dossier, sinon
-                # on obtient portfolio/portfolio/xxx.webp.
-                new_name = Path(old_name).with_suffix(".webp").name
+        tasks, unchanged = self._collect(since, manifest)
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\n{len(tasks)} fichier(s) a examiner, {unchanged} inchange(s) depuis le dernier passage "
+            f"({jobs} processus)"
+        ))
 
-                field.save(new_name, ContentFile(buffer.getvalue()), save=True)
+        for (obj, field_name, size, path, _), result in self._run(tasks, jobs, dry_run):
+            field = getattr(obj, field_name)
+            old_name = field.name
+            status = result["status"]
 
-                self.stdout.write(
-                    "  + {} -> {} ({:.0f} Ko -> {:.0f} Ko, -{:.0f}%)".format(
-                        Path(old_name).name,
-                        Path(field.name).name,
-                        old_bytes / 1024,
-                        new_bytes / 1024,
-                        (1 - new_bytes / old_bytes) * 100,
-                    )
-                )
+            if status == "error":
+                self.stdout.write(self.style.WARNING(f"  ! {obj} — illisible ({result['error']})"))
+                failed += 1
+                continue
 
-                if delete_old and old_path.exists() and old_path != Path(field.path):
-                    old_path.unlink()
-                    self.stdout.write(f"    original supprime : {old_path.name}")
+            if status in ("unchanged", "compliant"):
+                if status == "compliant":
+                    self.stdout.write(f"  = {Path(old_name).name} deja conforme")
+                manifest[old_name] = {**self._stat_entry(path), "sha256": result["sha256"]}
+                skipped += 1
+                continue
 
+            old_bytes = result["old_bytes"]
+            if dry_run:
+                self.stdout.write(
+                    f"  ~ {Path(old_name).name} — {', '.join(result['reasons'])}, "
+                    f"{old_bytes / 1024:.0f} Ko -> a convertir"
+                )
                 total_before += old_bytes
-                total_after += new_bytes
                 converted += 1
+                continue
+
+            # Ecriture en base : uniquement dans le processus principal.
+            # Nom de fichier seul : upload_to prefixe deja le dossier, sinon
+            # on obtient portfolio/portfolio/xxx.webp.
+            old_path = Path(path)
+            new_name = Path(old_name).with_suffix(".webp").name
+            field.save(new_name, ContentFile(result["data"]), save=True)
+            new_bytes = result["new_bytes"]
+
+            manifest.pop(old_name, None)
+            # Empreinte du fichier tel que stocke : ResizedImageField le
+            # retraite a l'enregistrement, ce n'est pas forcement notre tampon.
+            stored = Path(field.path)
+            manifest[field.name] = {
+                **self._stat_entry(stored),
+                "sha256": hashlib.sha256(stored.read_bytes()).hexdigest(),
+            }
+
+            self.stdout.write(
+                "  + {} -> {} ({:.0f} Ko -> {:.0f} Ko, -{:.0f}%)".format(
+                    Path(old_name).name,
+                    Path(field.name).name,
+                    old_bytes / 1024,
+                    new_bytes / 1024,
+                    (1 - new_bytes / old_bytes) * 100,
+                )
+            )
+
+            if delete_old and old_path.exists() and old_path != Path(field.path):
+                old_path.unlink()
+                self.stdout.write(f"    original supprime : {old_path.name}")
+
+            total_before += old_bytes
+            total_after += new_bytes
+            converted += 1
+
+        if not dry_run:
+            self._save_manifest(manifest_path, manifest)
+
+        elapsed = time.perf_counter() - started
+        examined = len(tasks) + unchanged
+        rate = examined / elapsed if elapsed else 0.0
+        saved = 0 if dry_run else total_before - total_after
 
         self.stdout.write("")
         if dry_run:
@@ -140,8 +329,13 @@ class Command(BaseCommand):
             gain = total_before - total_after
             self.stdout.write(
                 self.style.SUCCESS(
-                    f"{converted} image(s) converties, {skipped} ignoree(s). "
+                    f"{converted} image(s) converties, {skipped + unchanged} ignoree(s), "
+                    f"{failed} en erreur. "
                     f"{total_before / 1024:.0f} Ko -> {total_after / 1024:.0f} Ko "
                     f"(-{gain / 1024:.0f} Ko)"
                 )
             )
+        self.stdout.write(
+            f"{examined} image(s) en {elapsed:.2f} s — {rate:.1f} images/s, "
+            f"{saved / 1024:.0f} Ko economises"
+        )
@@ -0,0 +1,52 @@
+"""Recalcule les artefacts de rendu des articles (content_html, sommaire...).
+
+Article.save() les tient a jour ; cette commande rattrape les articles
+modifies hors save() (queryset.update, import SQL) ou regenere tout apres
+un changement de core.richtext.render_article_content.
+
+    python manage.py rebuild_article_content
+    python manage.py rebuild_article_content --dry-run
+"""
+
+from django.core.management.base import BaseCommand
+
+from core import export, page_cache
+from core.models import Article
+from core.richtext import render_article_content
+
+
+class Command(BaseCommand):
+    help = "Recalcule content_html, sommaire, nombre de mots, temps de lecture et extrait des articles."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Affiche les articles a mettre a jour, sans rien modifier.",
+        )
+
+    def handle(self, *args, **options):
+        fields = ("content_html", "toc", "word_count", "reading_time", "excerpt")
+        updated, tags = 0, ["articles"]
+
+        for article in Article.objects.only("pk", "slug", "title", "content", *fields).iterator():
+            artifacts = render_article_content(article.content)
+            if all(getattr(article, field) == value for field, value in artifacts.items()):
+                continue
+
+            self.stdout.write(f"  ~ {article.title} — {artifacts['word_count']} mots, "
+                              f"{artifacts['reading_time']} min, {len(artifacts['toc'])} titre(s)")
+            updated += 1
+            if not options["dry_run"]:
+                # update() ne passe pas par save() : ni reecriture des images,
+                # ni signaux. Le cache de pages est invalide a la fin.
+                Article.objects.filter(pk=article.pk).update(**artifacts)
+                tags.append(f"article:{article.slug}")
+
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING(f"\n[dry-run] {updated} article(s) a mettre a jour."))
+        else:
+            if updated:
+                page_cache.invalidate(*tags)
+                export.discard(*tags)
+            self.stdout.write(self.style.SUCCESS(f"\n{updated} article(s) mis a jour."))
@@ -0,0 +1,29 @@
+"""Reconstruit les index de recherche (voir core/search.py et core/admin_search.py).
+
+Sous PostgreSQL la colonne search_vector et les index trigrammes sont tenus
+par la base : la commande se contente de compter les lignes. Sous SQLite
+elle vide et re-remplit les tables FTS5, par exemple apres un import en masse fait
+hors de l'ORM (les signaux n'ont alors pas ete declenches).
+
+    python manage.py rebuild_search_index
+"""
+
+from django.core.management.base import BaseCommand
+
+from core import admin_search, search
+
+
+class Command(BaseCommand):
+    help = "Reconstruit les index de recherche (site : Article, Project ; admin : + Contact)."
+
+    def handle(self, *args, **options):
+        for model in search.INDEXED_FIELDS:
+            count = search.rebuild_index(model)
+            self.stdout.write(
+                self.style.SUCCESS(f"{model._meta.verbose_name_plural} : {count} ligne(s) indexee(s)")
+            )
+        for model in admin_search.ADMIN_INDEXED_FIELDS:
+            count = admin_search.rebuild_index(model)
+            self.stdout.write(
+                self.style.SUCCESS(f"{model._meta.verbose_name_plural} (admin) : {count} ligne(s) indexee(s)")
+            )
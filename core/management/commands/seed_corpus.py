@@ -0,0 +1,231 @@
+"""Genere un corpus synthetique pour les benchmarks (voir benchmark_routes).
+
+Articles au corps CKEditor realiste (titres, listes, code, image integree,
+~10-20 Ko de HTML), projets, et une table Contact volumineuse composee
+surtout de spam. Le contenu ne depend que de --seed : deux executions
+donnent le meme corpus, donc des mesures comparables.
+
+Les objets sont crees par bulk_create (sans signaux) ; la commande refait
+ensuite ce que les signaux auraient fait : artefacts de rendu, index de
+recherche, compteurs de l'admin, invalidation du cache de pages. Les
+images viennent d'un petit lot (media/seed/) partage par tous les objets.
+
+Tout objet genere est reconnaissable (slug "seed-...", email
+"@seed.invalid") : --flush les supprime sans toucher au reste.
+
+    python manage.py seed_corpus
+    python manage.py seed_corpus --articles 5000 --projects 500 --contacts 50000
+    python manage.py seed_corpus --flush
+"""
+
+import datetime
+import random
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models.fields.files import ImageFieldFile
+from django.utils import timezone
+from django.utils.text import slugify
+from PIL import Image
+
+from core import admin_search, counters, images, page_cache, search
+from core.models import CATEGORY_CHOICES, Article, Contact, LegalPage, Project
+from core.richtext import render_article_content
+
+SLUG_PREFIX = "seed-"
+EMAIL_DOMAIN = "seed.invalid"
+IMAGE_DIR = "seed"
+POOL_SIZE = 8
+BATCH_SIZE = 500
+SPAM_RATIO = 0.85
+
+WORDS = (
+    "django python postgresql serveur deploiement nginx gunicorn cache requete index "
+    "performance securite application mobile api rest client donnees migration conteneur "
+    "docker pipeline integration test latence base tailwind gabarit formulaire projet "
+    "architecture service reseau supervision journalisation sauvegarde equipe produit "
+    "utilisateur interface composant module version branche revue qualite metrique"
+).split()
+TECHNOLOGIES = ("Django", "PostgreSQL", "Tailwind", "Docker", "Redis", "Flutter", "React", "Nginx", "Celery")
+SPAM_MESSAGES = (
+    "CHEAP SEO SERVICES!!! Visit https://spam.example/offer and https://spam.example/buy now",
+    "Bonjour, nous proposons des backlinks premium http://links.example pas cher",
+    "Crypto investment opportunity, guaranteed returns, contact us on telegram",
+    "Increase your traffic 1000% >>> http://traffic.example <<<",
+)
+
+
+def _sentence(rng, low=8, high=20):
+    words = rng.choices(WORDS, k=rng.randint(low, high))
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraph(rng):
+    sentences = [_sentence(rng) for _ in range(rng.randint(3, 7))]
+    word = rng.choice(WORDS)
+    sentences[0] = sentences[0].replace(word, f"<strong>{word}</strong>", 1)
+    return "<p>" + " ".join(sentences) + "</p>"
+
+
+def _article_body(rng, image):
+    parts = []
+    for section in range(rng.randint(5, 9)):
+        parts.append(f"<h2>{_sentence(rng, 3, 6)[:-1]}</h2>")
+        parts += [_paragraph(rng) for _ in range(rng.randint(2, 4))]
+        if section % 3 == 1:
+            parts.append("<ul>" + "".join(f"<li>{_sentence(rng, 4, 10)}</li>" for _ in range(4)) + "</ul>")
+        if section % 4 == 2:
+            parts.append("<pre><code>python manage.py migrate\npython manage.py collectstatic --noinput</code></pre>")
+        if section == 1:
+            parts.append(
+                f'<p><img alt="{rng.choice(WORDS)}" src="{settings.MEDIA_URL}{image["src"]}" '
+                f'width="{image["width"]}" height="{image["height"]}" loading="lazy" decoding="async"></p>'
+            )
+    return "\n".join(parts)
+
+
+class Command(BaseCommand):
+    help = "Genere (ou supprime avec --flush) un corpus synthetique pour les benchmarks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--articles", type=int, default=2000)
+        parser.add_argument("--projects", type=int, default=300)
+        parser.add_argument("--contacts", type=int, default=20000)
+        parser.add_argument("--seed", type=int, default=42, help="Graine du generateur (defaut : 42).")
+        parser.add_argument("--flush", action="store_true", help="Supprime le corpus genere et s'arrete.")
+        parser.add_argument("--force", action="store_true", help="Autorise l'execution hors DEBUG.")
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options["force"]:
+            raise CommandError("Refuse hors DEBUG (base de production ?) : ajouter --force.")
+
+        self.flush()
+        if options["flush"]:
+            return
+
+        rng = random.Random(options["seed"])
+        covers = self.image_pool((1200, 675), "cover")
+        shots = self.image_pool((1200, 900), "shot")
+        with transaction.atomic():
+            self.create_articles(rng, options["articles"], covers)
+            self.create_projects(rng, options["projects"], shots)
+            self.create_contacts(rng, options["contacts"])
+            self.create_legal_pages(rng)
+
+        # Ce que les signaux auraient fait objet par objet
+        for model in search.INDEXED_FIELDS:
+            search.rebuild_index(model)
+        for model in admin_search.ADMIN_INDEXED_FIELDS:
+            admin_search.rebuild_index(model)
+        counters.reconcile()
+        page_cache.invalidate("articles", "projects")
+        self.stdout.write(self.style.SUCCESS(
+            f"Corpus cree : {options['articles']} articles, {options['projects']} projets, "
+            f"{options['contacts']} contacts (graine {options['seed']})"
+        ))
+
+    # -----------------------------------------------------------------------
+    def flush(self):
+        deleted = 0
+        for queryset in (
+            Article.objects.filter(slug__startswith=SLUG_PREFIX),
+            Project.objects.filter(slug__startswith=SLUG_PREFIX),
+            Contact.objects.filter(email__endswith="@" + EMAIL_DOMAIN),
+        ):
+            deleted += queryset.delete()[0]
+        if deleted:
+            counters.reconcile()
+            page_cache.invalidate("articles", "projects")
+            self.stdout.write(f"{deleted} objet(s) genere(s) supprime(s)")
+
+    def image_pool(self, size, prefix):
+        """POOL_SIZE images WebP et leurs declinaisons, partagees par le corpus."""
+        pool = []
+        for index in range(POOL_SIZE):
+            name = f"{IMAGE_DIR}/{prefix}-{index}.webp"
+            if not default_storage.exists(name):
+                # Generateur a part : le corpus ne depend pas des images deja presentes.
+                color_rng = random.Random(name)
+                color = tuple(color_rng.randrange(256) for _ in range(3))
+                buffer = BytesIO()
+                Image.new("RGB", size, color).save(buffer, format="WEBP", quality=80)
+                name = default_storage.save(name, ContentFile(buffer.getvalue()))
+            # Declinaisons regenerees : --flush a pu les supprimer (signal post_delete).
+            field_file = ImageFieldFile(None, Article._meta.get_field("image"), name)
+            pool.append(images.build_manifest(field_file))
+        return pool
+
+    def create_articles(self, rng, count, covers):
+        now = timezone.now()
+        batch = []
+        for index in range(count):
+            title = _sentence(rng, 4, 9)[:-1]
+            cover = rng.choice(covers)
+            content = _article_body(rng, cover)
+            batch.append(Article(
+                title=title,
+                slug=f"{SLUG_PREFIX}{index}-{slugify(title)}"[:50].rstrip("-"),
+                summary=_sentence(rng, 15, 30),
+                category=rng.choice(CATEGORY_CHOICES)[0],
+                content=content,
+                image=cover["src"],
+                image_manifest=cover,
+                # Quelques heures d'ecart : plusieurs annees de blog
+                created_at=now - datetime.timedelta(hours=index * 7 + rng.randrange(7)),
+                is_published=rng.random() > 0.05,
+                **render_article_content(content),
+            ))
+            if len(batch) == BATCH_SIZE:
+                Article.objects.bulk_create(batch)
+                batch = []
+        Article.objects.bulk_create(batch)
+
+    def create_projects(self, rng, count, shots):
+        today = timezone.localdate()
+        batch = []
+        for index in range(count):
+            title = _sentence(rng, 2, 5)[:-1]
+            shot = rng.choice(shots)
+            batch.append(Project(
+                title=title,
+                slug=f"{SLUG_PREFIX}{index}-{slugify(title)}"[:50].rstrip("-"),
+                description=" ".join(_sentence(rng) for _ in range(3)),
+                image=shot["src"],
+                image_manifest=shot,
+                url="https://example.com/",
+                technologies=", ".join(rng.sample(TECHNOLOGIES, 3)),
+                created_at=today - datetime.timedelta(days=index * 3),
+                is_featured=index < 6,
+            ))
+        Project.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+
+    def create_contacts(self, rng, count):
+        now = timezone.now()
+        batch = []
+        for index in range(count):
+            spam = rng.random() < SPAM_RATIO
+            batch.append(Contact(
+                name=f"Bot {index}" if spam else f"Client {index}",
+                email=f"contact{index}@{EMAIL_DOMAIN}",
+                phone=f"+22177{index:07d}"[:20],
+                message=rng.choice(SPAM_MESSAGES) if spam else " ".join(_sentence(rng) for _ in range(4)),
+                created_at=now - datetime.timedelta(minutes=rng.randrange(90 * 24 * 60)),
+                is_read=rng.random() < 0.7,
+                is_responded=not spam and rng.random() < 0.5,
+            ))
+            if len(batch) == BATCH_SIZE:
+                Contact.objects.bulk_create(batch)
+                batch = []
+        Contact.objects.bulk_create(batch)
+
+    def create_legal_pages(self, rng):
+        # Pages uniques par type : creees seulement si absentes.
+        for key, _ in LegalPage.TITLE_CHOICES:
+            LegalPage.objects.get_or_create(
+                title=key,
+                defaults={"slug": key, "content": "\n".join(_paragraph(rng) for _ in range(12))},
+            )
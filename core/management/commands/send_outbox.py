@@ -0,0 +1,63 @@
+"""Vide la boite d'envoi (core/outbox.py).
+
+A lancer en continu a cote de Gunicorn (systemd/horus-outbox.service,
+installe par deploy.sh) :
+
+    python manage.py send_outbox --loop
+
+ou periodiquement (cron, toutes les minutes) :
+
+    python manage.py send_outbox
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import outbox
+
+
+class Command(BaseCommand):
+    help = "Envoie les emails en attente de la boite d'envoi, par lots."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Nombre d'emails par lot (defaut : OUTBOX_BATCH_SIZE).",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Tourne en continu au lieu de s'arreter quand la file est vide.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Pause entre deux passages quand la file est vide, avec --loop (defaut : 5 s).",
+        )
+
+    def handle(self, *args, **options):
+        totals = {"sent": 0, "failed": 0, "dead": 0}
+        try:
+            while True:
+                counts = outbox.drain(batch_size=options["batch_size"])
+                for key, value in counts.items():
+                    totals[key] += value
+                if any(counts.values()):
+                    self.stdout.write(
+                        f"  {counts['sent']} envoye(s), {counts['failed']} a reessayer, "
+                        f"{counts['dead']} abandonne(s)"
+                    )
+                    continue
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{totals['sent']} email(s) envoye(s), {totals['failed']} a reessayer, "
+            f"{totals['dead']} abandonne(s)."
+        ))
@@ -0,0 +1,69 @@
+# Index plein texte pour core.search (voir ce module pour le detail).
+#
+# Pas d'operation de schema Django : la colonne tsvector et la table FTS5
+# dependent du moteur et ne sont pas des champs du modele.
+
+from django.db import migrations
+from django.utils.html import strip_tags
+
+# table -> [(colonne, poids PostgreSQL)], du plus au moins important
+INDEXES = {
+    "core_article": [("title", "A"), ("summary", "B"), ("content", "C")],
+    "core_project": [("title", "A"), ("technologies", "B"), ("description", "C")],
+}
+MODELS = {"core_article": "Article", "core_project": "Project"}
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    for table, columns in INDEXES.items():
+        if vendor == "postgresql":
+            vector = " || ".join(
+                f"setweight(to_tsvector('french'::regconfig, coalesce({col}, '')), '{weight}')"
+                for col, weight in columns
+            )
+            schema_editor.execute(
+                f"ALTER TABLE {table} ADD COLUMN search_vector tsvector "
+                f"GENERATED ALWAYS AS ({vector}) STORED"
+            )
+            schema_editor.execute(
+                f"CREATE INDEX {table}_search_gin ON {table} USING gin (search_vector)"
+            )
+
+        elif vendor == "sqlite":
+            names = [col for col, _ in columns]
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {table}_fts USING fts5("
+                f"{', '.join(names)}, tokenize='unicode61 remove_diacritics 2')"
+            )
+            model = apps.get_model("core", MODELS[table])
+            for row in model.objects.values_list("id", *names).iterator():
+                pk, values = row[0], [strip_tags(v or "") for v in row[1:]]
+                schema_editor.execute(
+                    f"INSERT INTO {table}_fts (rowid, {', '.join(names)}) "
+                    f"VALUES (%s, {', '.join(['%s'] * len(names))})",
+                    [pk, *values],
+                )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    for table in INDEXES:
+        if vendor == "postgresql":
+            schema_editor.execute(f"DROP INDEX IF EXISTS {table}_search_gin")
+            schema_editor.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector")
+        elif vendor == "sqlite":
+            schema_editor.execute(f"DROP TABLE IF EXISTS {table}_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_article_updated_at_project_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='image_manifest',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='image_manifest',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:10
+
+import html
+import math
+import re
+
+from django.db import migrations, models
+from django.utils.html import strip_tags
+from django.utils.text import Truncator, slugify
+
+# Copie figee de core.richtext.render_article_content a la date de cette
+# migration : ses evolutions ne doivent pas changer ce que fait le backfill.
+HEADING_RE = re.compile(r"<h([23])\b([^>]*)>(.*?)</h\1\s*>", re.IGNORECASE | re.DOTALL)
+ID_ATTR_RE = re.compile(r"""\bid\s*=\s*("([^"]*)"|'([^']*)')""", re.IGNORECASE)
+BLOCK_TAG_RE = re.compile(
+    r"</?(?:p|div|h[1-6]|li|ul|ol|br|tr|td|th|blockquote|pre|figure|figcaption|section)\b[^>]*>",
+    re.IGNORECASE,
+)
+
+
+def plain_text(content):
+    content = BLOCK_TAG_RE.sub(" ", content or "")
+    return " ".join(html.unescape(strip_tags(content)).split())
+
+
+def render_article_content(content):
+    toc = []
+    used_ids = set()
+
+    def anchor(match):
+        level, attrs, inner = match.group(1), match.group(2), match.group(3)
+        title = plain_text(inner)
+        existing = ID_ATTR_RE.search(attrs)
+        if existing:
+            anchor_id = existing.group(2) or existing.group(3)
+        else:
+            base = slugify(title) or f"section-{len(toc) + 1}"
+            anchor_id, n = base, 2
+            while anchor_id in used_ids:
+                anchor_id, n = f"{base}-{n}", n + 1
+            attrs = f' id="{anchor_id}"{attrs}'
+        used_ids.add(anchor_id)
+        if title:
+            toc.append({"id": anchor_id, "title": title, "level": int(level)})
+        return f"<h{level}{attrs}>{inner}</h{level}>"
+
+    content_html = HEADING_RE.sub(anchor, content or "")
+    text = plain_text(content)
+    word_count = len(re.findall(r"\w+", text))
+
+    return {
+        "content_html": content_html,
+        "toc": toc,
+        "word_count": word_count,
+        "reading_time": max(1, math.ceil(word_count / 200)),
+        "excerpt": Truncator(text).chars(300),
+    }
+
+
+def backfill(apps, schema_editor):
+    Article = apps.get_model("core", "Article")
+    for article in Article.objects.only("pk", "content").iterator():
+        Article.objects.filter(pk=article.pk).update(**render_article_content(article.content))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_article_image_manifest_project_image_manifest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, verbose_name='Extrait'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='reading_time',
+            field=models.PositiveSmallIntegerField(default=1, editable=False, verbose_name='Temps de lecture (min)'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='toc',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='Sommaire'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de mots'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_outboundemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateLimitHit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=200)),
+                ('at', models.FloatField()),
+            ],
+            options={
+                'verbose_name': 'Passage limité',
+                'verbose_name_plural': 'Limitation de débit',
+                'indexes': [models.Index(fields=['key', 'at'], name='ratelimit_key_at_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:15
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_ratelimithit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpamRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('keyword', 'Mot-clé du message'), ('domain', 'Domaine email'), ('email', 'Adresse email')], max_length=10, verbose_name='Type')),
+                ('value', models.CharField(max_length=254, verbose_name='Valeur')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Active')),
+                ('note', models.CharField(blank=True, max_length=200, verbose_name='Note')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Créée le')),
+            ],
+            options={
+                'verbose_name': 'Règle anti-spam',
+                'verbose_name_plural': 'Règles anti-spam',
+                'ordering': ['kind', 'value'],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'value'), name='spamrule_kind_value_uniq')],
+            },
+        ),
+    ]
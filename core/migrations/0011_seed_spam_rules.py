@@ -0,0 +1,54 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:15
+
+# Reprend les listes codees en dur dans core/forms.py (BLOCKED_EMAILS,
+# BLOCKED_DOMAINS, spam_keywords) sous forme de SpamRule editables.
+
+from django.db import migrations
+
+KEYWORDS = [
+    "crypto", "bitcoin", "ethereum", "nft", "blockchain",
+    "casino", "poker", "betting", "gambling", "loan",
+    "forex", "trading", "investment opportunity", "seo service", "seo optimization",
+    "backlink", "whatsapp", "telegram", "viagra", "cialis",
+    "pharmacy", "diet pill", "click here", "buy now", "free money",
+    "earn money", "make money online", "work from home", "passive income", "nigerian prince",
+    "lottery winner", "cheap followers", "buy followers", "instagram followers",
+]
+
+DOMAINS = [
+    "10minutemail.com", "33mail.com", "discard.email", "dispostable.com",
+    "emailondeck.com", "fakeinbox.com", "getnada.com", "grr.la",
+    "guerrillamail.com", "guerrillamailblock.com", "harakirimail.com", "mailcatch.com",
+    "maildrop.cc", "mailinator.com", "mailnesia.com", "mintemail.com",
+    "mohmal.com", "sharklasers.com", "temp-mail.org", "tempail.com",
+    "tempmail.com", "tempr.email", "throwaway.email", "trashmail.com",
+    "yopmail.com",
+]
+
+EMAILS = [
+    "zekisuquc419@gmail.com",
+]
+
+
+def seed(apps, schema_editor):
+    SpamRule = apps.get_model("core", "SpamRule")
+    rules = [("keyword", v) for v in KEYWORDS] + [("domain", v) for v in DOMAINS] + [("email", v) for v in EMAILS]
+    SpamRule.objects.bulk_create(
+        [SpamRule(kind=kind, value=value, note="Liste initiale") for kind, value in rules],
+        ignore_conflicts=True,
+    )
+
+
+def unseed(apps, schema_editor):
+    apps.get_model("core", "SpamRule").objects.filter(note="Liste initiale").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_spamrule"),
+    ]
+
+    operations = [
+        migrations.RunPython(seed, unseed),
+    ]
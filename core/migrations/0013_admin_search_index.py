@@ -0,0 +1,63 @@
+# Index trigrammes de la recherche de l'admin (voir core/admin_search.py).
+#
+# Comme 0005_search_index : pas d'operation de schema Django, les index
+# dependent du moteur. Sous PostgreSQL, l'extension pg_trgm est "trusted"
+# depuis la version 13 : le proprietaire de la base peut la creer.
+
+import sqlite3
+
+from django.db import migrations
+
+# table -> colonnes (search_fields de l'admin)
+INDEXES = {
+    "core_contact": ["name", "email", "phone", "message"],
+    "core_article": ["title", "summary", "content"],
+    "core_project": ["title", "technologies", "description"],
+}
+
+
+def create_admin_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for table, columns in INDEXES.items():
+            for col in columns:
+                # Meme expression que le "icontains" de Django : UPPER(col::text).
+                schema_editor.execute(
+                    f"CREATE INDEX {table}_{col}_trgm ON {table} "
+                    f"USING gin ((UPPER({col}::text)) gin_trgm_ops)"
+                )
+
+    elif vendor == "sqlite" and sqlite3.sqlite_version_info >= (3, 34):
+        # Tokenizer "trigram" absent avant SQLite 3.34 : l'admin garde alors icontains.
+        for table, columns in INDEXES.items():
+            names = ", ".join(columns)
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {table}_admin_fts USING fts5({names}, tokenize='trigram')"
+            )
+            schema_editor.execute(
+                f"INSERT INTO {table}_admin_fts (rowid, {names}) SELECT id, {names} FROM {table}"
+            )
+
+
+def drop_admin_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    for table, columns in INDEXES.items():
+        if vendor == "postgresql":
+            for col in columns:
+                schema_editor.execute(f"DROP INDEX IF EXISTS {table}_{col}_trgm")
+        elif vendor == "sqlite":
+            schema_editor.execute(f"DROP TABLE IF EXISTS {table}_admin_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_admin_search_index, drop_admin_search_index),
+    ]
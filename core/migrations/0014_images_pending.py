@@ -0,0 +1,43 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:49
+
+# Drapeau des objets a traiter par build_image_variants : le timer ne lit
+# plus que ces lignes (index partiel), pas toute la table a chaque minute.
+# Les lignes existantes avec une image sont marquees une fois : la commande
+# ecarte sans encodage celles dont le manifeste est deja a jour.
+
+from django.db import migrations, models
+
+
+def flag_existing(apps, schema_editor):
+    for name in ("Article", "Project"):
+        model = apps.get_model("core", name)
+        model.objects.exclude(image="").exclude(image__isnull=True).update(images_pending=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_admin_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='images_pending',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='images_pending',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('images_pending', True)), fields=['id'], name='article_images_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('images_pending', True)), fields=['id'], name='project_images_pending_idx'),
+        ),
+        migrations.RunPython(flag_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:20
+
+# Les images des contenus CKEditor ne sont plus encodees dans save() mais
+# par le timer build_image_variants : LegalPage recoit le meme drapeau que
+# Article. Les contenus existants avec des images sont marques une fois ;
+# ceux deja convertis sont ecartes sans encodage.
+
+from django.db import migrations, models
+
+
+def flag_existing(apps, schema_editor):
+    for name in ("Article", "LegalPage"):
+        model = apps.get_model("core", name)
+        model.objects.filter(content__icontains="<img").update(images_pending=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_images_pending'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='legalpage',
+            name='images_pending',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='legalpage',
+            index=models.Index(condition=models.Q(('images_pending', True)), fields=['id'], name='legal_images_pending_idx'),
+        ),
+        migrations.RunPython(flag_existing, migrations.RunPython.noop),
+    ]
@@ -6,6 +6,8 @@ from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, Permis
 from ckeditor_uploader.fields import RichTextUploadingField
 from django_resized import ResizedImageField
 
+from .richtext import prepare_content_images, render_article_content
+
 CATEGORY_CHOICES = [
     ('tutorial', 'Tutoriel'),
     ('news', 'Actualité'),
@@ -31,15 +33,129 @@ class Contact(models.Model):
     def __str__(self):
         return f"{self.name} - {self.email}"
 
+# ---------------------------------------------------------------------------
+# Boite d'envoi (emails differes, voir core/outbox.py)
+# ---------------------------------------------------------------------------
+class OutboundEmail(models.Model):
+    STATUS_PENDING = "pending"
+    STATUS_SENT = "sent"
+    STATUS_DEAD = "dead"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "En attente"),
+        (STATUS_SENT, "Envoyé"),
+        (STATUS_DEAD, "Abandonné"),
+    ]
+
+    subject = models.CharField(max_length=255, verbose_name="Sujet")
+    body = models.TextField(verbose_name="Corps")
+    from_email = models.CharField(max_length=254, verbose_name="Expéditeur")
+    to = models.JSONField(default=list, verbose_name="Destinataires")
+    reply_to = models.JSONField(default=list, blank=True, verbose_name="Répondre à")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name="Statut")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Tentatives")
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Prochaine tentative")
+    # Jeton du worker qui a reserve la ligne (deux workers ne l'envoient pas deux fois).
+    lease = models.CharField(max_length=32, blank=True, editable=False)
+    last_error = models.TextField(blank=True, verbose_name="Dernière erreur")
+    created_at = models.DateTimeField(default=timezone.now, verbose_name="Créé le")
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Envoyé le")
+
+    class Meta:
+        verbose_name = "Email sortant"
+        verbose_name_plural = "Boîte d'envoi"
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["status", "next_attempt_at"], name="outbox_due_idx")]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)}"
+
+# ---------------------------------------------------------------------------
+# Regles anti-spam du formulaire de contact (voir core/spam.py)
+# ---------------------------------------------------------------------------
+class SpamRule(models.Model):
+    KIND_KEYWORD = "keyword"
+    KIND_DOMAIN = "domain"
+    KIND_EMAIL = "email"
+    KIND_CHOICES = [
+        (KIND_KEYWORD, "Mot-clé du message"),
+        (KIND_DOMAIN, "Domaine email"),
+        (KIND_EMAIL, "Adresse email"),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, verbose_name="Type")
+    value = models.CharField(max_length=254, verbose_name="Valeur")
+    is_active = models.BooleanField(default=True, verbose_name="Active")
+    note = models.CharField(max_length=200, blank=True, verbose_name="Note")
+    created_at = models.DateTimeField(default=timezone.now, verbose_name="Créée le")
+
+    class Meta:
+        verbose_name = "Règle anti-spam"
+        verbose_name_plural = "Règles anti-spam"
+        ordering = ["kind", "value"]
+        constraints = [models.UniqueConstraint(fields=["kind", "value"], name="spamrule_kind_value_uniq")]
+
+    def save(self, *args, **kwargs):
+        # Comparaisons insensibles a la casse : on stocke en minuscules.
+        self.value = self.value.strip().lower()
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} : {self.value}"
+
+
+# ---------------------------------------------------------------------------
+# Limitation de debit (journal glissant, voir core/ratelimit.py)
+# ---------------------------------------------------------------------------
+class RateLimitHit(models.Model):
+    key = models.CharField(max_length=200)
+    # Horodatage Unix (time.time()) : comparaison numerique simple, sans fuseau.
+    at = models.FloatField()
+
+    class Meta:
+        verbose_name = "Passage limité"
+        verbose_name_plural = "Limitation de débit"
+        indexes = [models.Index(fields=["key", "at"], name="ratelimit_key_at_idx")]
+
+    def __str__(self):
+        return self.key
+
 # ---------------------------------------------------------------------------
 # Article
 # ---------------------------------------------------------------------------
+class ArticleQuerySet(models.QuerySet):
+    """Requetes des listes publiques (accueil, blog, recherche, flux, sitemap).
+
+    Les cartes n'affichent que titre, resume, image et date (et le flux RSS,
+    l'extrait) : cards() differe les colonnes lourdes (corps riche, HTML
+    rendu, sommaire). Les index
+    partiels de Meta.indexes correspondent a published().recent().
+    """
+
+    HEAVY_FIELDS = ("content", "content_html", "toc")
+
+    def published(self):
+        return self.filter(is_published=True)
+
+    def recent(self):
+        # id departage les articles crees dans la meme seconde (curseurs du blog)
+        return self.order_by("-created_at", "-id")
+
+    def cards(self):
+        return self.defer(*self.HEAVY_FIELDS)
+
+
 class Article(models.Model):
     title = models.CharField(max_length=200, verbose_name="Titre")
     slug = models.SlugField(unique=True, blank=True, verbose_name="URL (Slug)")
     summary = models.TextField(max_length=500, verbose_name="Résumé pour SEO")
     category = models.CharField(max_length=50, choices=CATEGORY_CHOICES, blank=True)
     content = RichTextUploadingField(verbose_name="Contenu")
+    # Artefacts de rendu calcules a l'enregistrement (voir core/richtext.py)
+    content_html = models.TextField(blank=True, editable=False)
+    toc = models.JSONField(default=list, blank=True, editable=False, verbose_name="Sommaire")
+    word_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Nombre de mots")
+    reading_time = models.PositiveSmallIntegerField(default=1, editable=False, verbose_name="Temps de lecture (min)")
+    excerpt = models.TextField(blank=True, editable=False, verbose_name="Extrait")
     image = ResizedImageField(
         size=[1200, 675],
         crop=['middle', 'center'],
@@ -50,20 +166,54 @@ class Article(models.Model):
         null=True,
         verbose_name="Image de couverture",
     )
+    # Declinaisons responsives de image (voir core/images.py)
+    image_manifest = models.JSONField(default=dict, blank=True, editable=False)
+    # Couverture ou images du contenu a traiter par build_image_variants
+    # (pose au save, retire par la commande)
+    images_pending = models.BooleanField(default=False, editable=False)
     created_at = models.DateTimeField(default=timezone.now, verbose_name="Date de publication")
     is_published = models.BooleanField(default=True, verbose_name="Publié")
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ArticleQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Article"
         verbose_name_plural = "Articles de blog"
         ordering = ["-created_at"]
+        # Index partiels plutot que (is_published, created_at) : Django ecrit
+        # le filtre booleen sans "= 1" (WHERE "is_published"), ce que SQLite
+        # ne sait pas apparier au prefixe d'un index composite.
+        indexes = [
+            # published().recent() : listes publiques, tri sans etape de tri
+            models.Index(
+                fields=["-created_at", "-id"], name="article_published_idx", condition=models.Q(is_published=True)
+            ),
+            # MAX(updated_at) des validateurs de core/conditional.py
+            models.Index(
+                fields=["updated_at"], name="article_published_upd_idx", condition=models.Q(is_published=True)
+            ),
+            # build_image_variants, chaque minute : vide la plupart du temps
+            models.Index(
+                fields=["id"], name="article_images_pending_idx", condition=models.Q(images_pending=True)
+            ),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
+        # Images CKEditor : lazy + versions WebP deja converties ; le reste est
+        # converti par build_image_variants, hors requete (core/richtext.py)
+        self.content, pending = prepare_content_images(self.content)
+        self.images_pending = bool(pending)
+        self.render_content()
         super().save(*args, **kwargs)
 
+    def render_content(self):
+        """Recalcule content_html, toc, word_count, reading_time et excerpt."""
+        for field, value in render_article_content(self.content).items():
+            setattr(self, field, value)
+
     def __str__(self):
         return self.title
 
@@ -73,6 +223,17 @@ class Article(models.Model):
 # ---------------------------------------------------------------------------
 # Project
 # ---------------------------------------------------------------------------
+class ProjectQuerySet(models.QuerySet):
+    """Requetes du portfolio. Pas de colonne lourde a differer ici : la
+    description est courte et s'affiche sur les cartes."""
+
+    def featured(self):
+        return self.filter(is_featured=True)
+
+    def recent(self):
+        return self.order_by("-id")
+
+
 class Project(models.Model):
     title = models.CharField(max_length=200, verbose_name="Titre du projet")
     slug = models.SlugField(unique=True, blank=True)
@@ -84,6 +245,9 @@ class Project(models.Model):
         force_format="WEBP",
         verbose_name="Image de présentation",
     )
+    image_manifest = models.JSONField(default=dict, blank=True, editable=False)
+    # A traiter par build_image_variants (pose au save, retire par la commande)
+    images_pending = models.BooleanField(default=False, editable=False)
     url = models.URLField(blank=True, verbose_name="Lien vers le site (Live)")
     github_url = models.URLField(blank=True, verbose_name="Lien GitHub (Optionnel)")
     technologies = models.CharField(
@@ -94,10 +258,22 @@ class Project(models.Model):
     is_featured = models.BooleanField(default=False, verbose_name="Afficher sur l'accueil ?")
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProjectQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Projet"
         verbose_name_plural = "Portfolio"
         ordering = ["-created_at"]
+        indexes = [
+            # featured().recent() (accueil) : index partiel, quelques lignes seulement
+            models.Index(
+                fields=["-id"], name="project_featured_idx", condition=models.Q(is_featured=True)
+            ),
+            # build_image_variants, chaque minute : vide la plupart du temps
+            models.Index(
+                fields=["id"], name="project_images_pending_idx", condition=models.Q(images_pending=True)
+            ),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -206,11 +382,24 @@ class LegalPage(models.Model):
     title = models.CharField(max_length=200, choices=TITLE_CHOICES, unique=True, verbose_name="Type de page")
     slug = models.SlugField(unique=True, help_text="Ex: mentions-legales")
     content = RichTextUploadingField(verbose_name="Contenu de la page")
+    # Images du contenu a convertir par build_image_variants (voir core/richtext.py)
+    images_pending = models.BooleanField(default=False, editable=False)
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Dernière mise à jour")
 
     class Meta:
         verbose_name = "Page Légale"
         verbose_name_plural = "Pages Légales"
+        indexes = [
+            # build_image_variants, chaque minute : vide la plupart du temps
+            models.Index(
+                fields=["id"], name="legal_images_pending_idx", condition=models.Q(images_pending=True)
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.content, pending = prepare_content_images(self.content)
+        self.images_pending = bool(pending)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.get_title_display()
\ No newline at end of file
@@ -0,0 +1,135 @@
+"""Boite d'envoi des emails de notification.
+
+La vue contact appelait send_mail() pendant le POST, avec EMAIL_TIMEOUT a
+20 s : un relais SMTP lent bloquait un worker Gunicorn tout ce temps, et
+une rafale de demandes d'audit pouvait figer le site.
+
+Desormais la vue se contente d'enregistrer une ligne OutboundEmail
+(enqueue) et repond aussitot. La commande send_outbox vide la file (drain)
+par lots, sur une seule connexion SMTP reutilisee :
+
+- chaque lot est reserve par un jeton (champ lease) via un UPDATE
+  conditionnel : deux workers concurrents n'envoient jamais le meme email ;
+- un echec repousse la tentative suivante (backoff exponentiel :
+  OUTBOX_RETRY_DELAY, x2 a chaque essai, plafonne a OUTBOX_MAX_DELAY) ;
+- apres OUTBOX_MAX_ATTEMPTS echecs, l'email passe en "dead" et reste
+  visible dans l'admin, ou il peut etre remis en file.
+"""
+
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def enqueue(subject, body, to, from_email=None, reply_to=None):
+    """Met un email en file d'envoi et retourne la ligne creee."""
+    return OutboundEmail.objects.create(
+        subject=subject[:255],
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(to),
+        reply_to=list(reply_to or []),
+    )
+
+
+def retry_delay(attempts):
+    """Delai avant la tentative suivante, apres `attempts` echecs."""
+    base = _setting("OUTBOX_RETRY_DELAY", 60)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), _setting("OUTBOX_MAX_DELAY", 3600)))
+
+
+def _claim(batch_size, now):
+    """Reserve au plus batch_size emails dus ; retourne les lignes reservees.
+
+    La reservation repousse next_attempt_at de OUTBOX_LEASE secondes : si le
+    worker meurt en plein lot, les emails redeviennent dus ensuite.
+    """
+    due = (
+        OutboundEmail.objects.filter(status=OutboundEmail.STATUS_PENDING, next_attempt_at__lte=now)
+        .order_by("next_attempt_at", "pk")
+        .values_list("pk", flat=True)[:batch_size]
+    )
+    token = uuid.uuid4().hex
+    OutboundEmail.objects.filter(
+        pk__in=list(due), status=OutboundEmail.STATUS_PENDING, next_attempt_at__lte=now
+    ).update(lease=token, next_attempt_at=now + timedelta(seconds=_setting("OUTBOX_LEASE", 300)))
+    return list(OutboundEmail.objects.filter(lease=token).order_by("pk"))
+
+
+def _record_failure(email, exc):
+    email.attempts += 1
+    email.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+    email.lease = ""
+    if email.attempts >= _setting("OUTBOX_MAX_ATTEMPTS", 5):
+        email.status = OutboundEmail.STATUS_DEAD
+        logger.error("Email abandonne apres %s tentatives | id=%s err=%s", email.attempts, email.pk, exc)
+    else:
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+        logger.warning("Echec envoi email | id=%s tentative=%s err=%s", email.pk, email.attempts, exc)
+    email.save(update_fields=["attempts", "last_error", "lease", "status", "next_attempt_at"])
+
+
+def drain(batch_size=None, connection=None):
+    """Envoie un lot d'emails dus sur une seule connexion.
+
+    Retourne {"sent": n, "failed": n, "dead": n}.
+    """
+    batch_size = batch_size or _setting("OUTBOX_BATCH_SIZE", 50)
+    counts = {"sent": 0, "failed": 0, "dead": 0}
+    batch = _claim(batch_size, timezone.now())
+    if not batch:
+        return counts
+
+    connection = connection or get_connection(fail_silently=False)
+    try:
+        for email in batch:
+            try:
+                # open() est sans effet si la connexion est deja ouverte ;
+                # apres une erreur elle a ete fermee et se rouvre ici.
+                connection.open()
+                EmailMessage(
+                    email.subject,
+                    email.body,
+                    email.from_email,
+                    email.to,
+                    reply_to=email.reply_to or None,
+                    connection=connection,
+                ).send()
+            except Exception as exc:  # noqa: BLE001 — toute erreur SMTP / reseau
+                _record_failure(email, exc)
+                counts["dead" if email.status == OutboundEmail.STATUS_DEAD else "failed"] += 1
+                try:
+                    connection.close()
+                except Exception:  # noqa: BLE001
+                    pass
+                continue
+
+            email.status = OutboundEmail.STATUS_SENT
+            email.attempts += 1
+            email.sent_at = timezone.now()
+            email.lease = ""
+            email.last_error = ""
+            email.save(update_fields=["status", "attempts", "sent_at", "lease", "last_error"])
+            counts["sent"] += 1
+    finally:
+        connection.close()
+    return counts
+
+
+def requeue(queryset):
+    """Remet en file des emails abandonnes (action d'admin)."""
+    return queryset.exclude(status=OutboundEmail.STATUS_SENT).update(
+        status=OutboundEmail.STATUS_PENDING, attempts=0, next_attempt_at=timezone.now(), lease=""
+    )
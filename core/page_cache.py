@@ -0,0 +1,280 @@
+"""Cache de pages publiques, invalide par le contenu.
+
+Les pages publiques (accueil, blog, portfolio, details, pages legales) ne
+changent que lorsqu'un objet est enregistre dans l'admin, mais chaque visite
+refaisait les requetes SQL et le rendu complet de base.html.
+
+Chaque vue decoree declare les "tags" dont elle depend :
+
+    @cache_public_page("articles", "projects")     # home
+    @cache_public_page("article:{slug}")            # detail, formate avec kwargs
+
+La cle d'une page combine l'hote, le chemin, les parametres qui changent
+le rendu (KEY_PARAMS : le curseur ?c=... a sa propre entree) et la version
+courante de chacun de ses tags. Les parametres de suivi (utm_*, fbclid...)
+sont ignores ; toute autre query string (?page=N, redirige, ou parametre
+inconnu) n'est pas mise en cache : elle ne peut pas multiplier les entrees.
+Invalider un tag revient a changer sa version (voir core/signals.py) : les
+entrees qui en dependent deviennent introuvables et expirent d'elles-memes,
+les autres restent valides. On ne vide jamais tout le cache.
+
+Une entree contient le HTML minifie et ses versions Brotli / gzip
+(core/compression.py) : un hit ne minifie ni ne compresse plus rien.
+
+Ne sont mises en cache que les GET/HEAD anonymes, sans message flash en
+attente, et les reponses 200 qui ne posent pas de cookie ni n'utilisent le
+jeton CSRF (une page qui en contient un est propre au visiteur).
+"""
+
+import hashlib
+import threading
+import time
+import uuid
+from collections import Counter
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.http import HttpResponse
+
+from . import compression
+
+STATS_KEYS = ("hits", "misses")
+# Parametres de query string qui entrent dans la cle (curseur de pagination).
+KEY_PARAMS = ("c",)
+# Parametres sans effet sur la page : ignores (prefixes).
+IGNORED_PARAMS = ("utm_", "fbclid", "gclid", "msclkid", "mc_")
+# Delai maximal (s) avant qu'un worker reporte ses hits / misses.
+STATS_FLUSH_INTERVAL = 1.0
+# Horodatage de la derniere invalidation, ecrit avec les nouvelles versions.
+INVALIDATED_AT_KEY = "pagecache:invalidated_at"
+
+
+def _cache():
+    return caches[getattr(settings, "PAGE_CACHE_ALIAS", "default")]
+
+
+def _timeout():
+    return getattr(settings, "PAGE_CACHE_TIMEOUT", 3600)
+
+
+def _tag_key(tag):
+    return f"pagecache:tag:{tag}"
+
+
+def _tag_versions(tags):
+    """Version courante de chaque tag, creee au besoin.
+
+    Une version manquante (jamais posee, ou evincee par le cache) est tiree
+    au hasard plutot que remise a "1" : les anciennes entrees ne peuvent pas
+    redevenir valides par accident.
+    """
+    cache = _cache()
+    keys = [_tag_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+            versions[key] = cache.get(key)
+    return [str(versions[key]) for key in keys]
+
+
+def tag_versions(*tags):
+    """Versions courantes des tags : a inclure dans la cle de tout artefact
+    mis en cache qui doit suivre les memes invalidations (voir core/sitemaps.py)."""
+    return _tag_versions(tags)
+
+
+def invalidate(*tags):
+    """Invalide toutes les pages qui dependent d'au moins un des tags."""
+    if tags:
+        versions = {_tag_key(tag): uuid.uuid4().hex for tag in tags}
+        _cache().set_many({**versions, INVALIDATED_AT_KEY: time.time()}, timeout=None)
+
+
+def invalidated_at():
+    """time.time() de la derniere invalidation (0 si aucune) : core/replicas.py
+    garde les lectures sur "default" tant que les replicas ont pu la manquer."""
+    return _cache().get(INVALIDATED_AT_KEY, 0)
+
+
+def _key_params(request):
+    """Parametres retenus pour la cle, ou None si la query string en contient
+    un qui n'est ni dans KEY_PARAMS ni ignore."""
+    params = []
+    for name in sorted(request.GET):
+        if name in KEY_PARAMS:
+            params.extend(f"{name}={value}" for value in request.GET.getlist(name))
+        elif not name.startswith(IGNORED_PARAMS):
+            return None
+    return params
+
+
+def _page_key(request, tags, params):
+    raw = "|".join([request.scheme, request.get_host(), request.path, *params, *_tag_versions(tags)])
+    return "pagecache:page:" + hashlib.md5(raw.encode()).hexdigest()
+
+
+# Compteurs du processus pas encore reportes dans le cache partage : un
+# incr() par page servie prenait le verrou d'ecriture du cache a chaque
+# requete, et sous ASGI (un thread par requete) les requetes simultanees
+# s'y attendaient jusqu'a l'erreur "database is locked".
+_pending = Counter()
+_pending_lock = threading.Lock()
+_last_flush = 0.0
+
+
+def _flush(force=False):
+    global _last_flush
+    with _pending_lock:
+        if not _pending or (not force and time.monotonic() - _last_flush < STATS_FLUSH_INTERVAL):
+            return
+        pending = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    cache = _cache()
+    for name, delta in pending.items():
+        key = f"pagecache:stats:{name}"
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            if not cache.add(key, delta, timeout=None):
+                cache.incr(key, delta)
+
+
+def _count(name):
+    with _pending_lock:
+        _pending[name] += 1
+    _flush()
+
+
+def stats():
+    """Compteurs de hits / misses depuis la derniere remise a zero.
+
+    Ceux des autres workers arrivent par lots, au plus tous les
+    STATS_FLUSH_INTERVAL (a leur requete suivante s'ils sont inactifs).
+    """
+    _flush(force=True)
+    values = _cache().get_many([f"pagecache:stats:{name}" for name in STATS_KEYS])
+    hits = values.get("pagecache:stats:hits", 0)
+    misses = values.get("pagecache:stats:misses", 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total * 100, 1) if total else 0.0,
+    }
+
+
+def reset_stats():
+    with _pending_lock:
+        _pending.clear()
+    _cache().delete_many([f"pagecache:stats:{name}" for name in STATS_KEYS])
+
+
+def is_cacheable_request(request):
+    """GET/HEAD anonyme, sans message flash en attente."""
+    if request.method not in ("GET", "HEAD"):
+        return False
+    if request.user.is_authenticated:
+        return False
+    # Un message flash en attente serait affiche (et fige) dans la page.
+    return not len(get_messages(request))
+
+
+def _is_cacheable_response(request, response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+        and "private" not in response.get("Cache-Control", "")
+    )
+
+
+def _lookup(request, tags, kwargs):
+    """(cle, reponse servie depuis le cache ou None) ; (None, None) hors cache."""
+    if not is_cacheable_request(request):
+        return None, None
+    params = _key_params(request)
+    if params is None:
+        return None, None
+
+    key = _page_key(request, [tag.format(**kwargs) for tag in tags], params)
+    entry = _cache().get(key)
+    if entry is None:
+        _count("misses")
+        return key, None
+
+    _count("hits")
+    response = HttpResponse(entry["content"], status=entry["status"])
+    for header, value in entry["headers"].items():
+        response[header] = value
+    # Deja minifie, deja compresse : rien a refaire (core/compression.py).
+    response.minified = True
+    response.precompressed = entry.get("encodings", {})
+    response["X-Page-Cache"] = "HIT"
+    return key, response
+
+
+def _remember(request, key, response):
+    if _is_cacheable_response(request, response):
+        # ETag / Last-Modified de core/conditional.py, gardes avec l'entree :
+        # un hit n'a pas a refaire l'agregat.
+        validators = getattr(request, "page_validators", None)
+        if validators is not None:
+            for header, value in validators().items():
+                response[header] = value
+        if compression.prepare(response):
+            response.precompressed = compression.encode_all(response.content)
+        _cache().set(key, {
+            "content": response.content,
+            "encodings": getattr(response, "precompressed", {}),
+            "status": response.status_code,
+            "headers": {
+                header: response[header]
+                for header in ("Content-Type", "ETag", "Last-Modified")
+                if header in response
+            },
+        }, _timeout())
+    response["X-Page-Cache"] = "MISS"
+    return response
+
+
+def cache_public_page(*tags):
+    """Met en cache la reponse d'une vue publique, par URL et par tags.
+
+    Accepte aussi une vue asynchrone (core/async_views.py) : la lecture du
+    cache, la session et la compression de l'entree passent alors par
+    sync_to_async, hors de la boucle d'evenements.
+    """
+
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def wrapper(request, *args, **kwargs):
+                key, response = await sync_to_async(_lookup)(request, tags, kwargs)
+                if response is not None:
+                    return response
+                response = await view_func(request, *args, **kwargs)
+                if key is None:
+                    return response
+                return await sync_to_async(_remember)(request, key, response)
+        else:
+            @wraps(view_func)
+            def wrapper(request, *args, **kwargs):
+                key, response = _lookup(request, tags, kwargs)
+                if response is not None:
+                    return response
+                response = view_func(request, *args, **kwargs)
+                if key is None:
+                    return response
+                return _remember(request, key, response)
+
+        # Lu par core/export.py pour rattacher les pages exportees aux memes tags.
+        wrapper.page_cache_tags = tags
+        return wrapper
+
+    return decorator
@@ -0,0 +1,251 @@
+"""Pagination par curseur (keyset) pour le blog et le portfolio.
+
+Le Paginator de Django faisait, a chaque page, un COUNT(*) puis un
+SELECT ... OFFSET n : plus un robot descend dans les pages, plus la base
+parcourt de lignes pour les jeter.
+
+KeysetPaginator repart de la derniere ligne affichee :
+
+    WHERE (created_at, id) < (:created_at, :id) ORDER BY created_at DESC, id DESC LIMIT 10
+
+ce que l'index de tri sert directement, quelle que soit la profondeur. Les
+valeurs de la ligne pivot voyagent dans l'URL sous forme de curseur opaque
+(?c=...). Une page ne connait donc pas son numero : les gabarits affichent
+"precedent / suivant" et les liens rel=prev / rel=next. Le lien vers la
+premiere page est l'URL nue (previous_cursor vaut alors None), pas un
+curseur : une seule URL par page.
+
+Un curseur forge (valeurs nulles ou mal typees) ou perime (plus aucune
+ligne apres le pivot : articles depublies, supprimes) donne un 404.
+
+Le nombre total d'objets (affiche sous la liste) vient du cache, sous une
+cle qui inclut les versions de tags de core/page_cache.py : il est
+recalcule apres chaque enregistrement, pas a chaque page vue.
+
+Les anciens liens ?page=N sont rediriges (301) vers le curseur equivalent.
+"""
+
+import base64
+import datetime
+import hashlib
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import Http404, HttpResponsePermanentRedirect
+
+from .page_cache import tag_versions
+
+CURSOR_PARAM = "c"
+NEXT, PREVIOUS = "n", "p"
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder tronque les datetimes a la milliseconde : le curseur
+    # ne designerait plus exactement la ligne pivot.
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _encode(payload):
+    raw = json.dumps(payload, cls=_CursorEncoder, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        direction, values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise Http404("Curseur de pagination invalide")
+    if direction not in (NEXT, PREVIOUS) or not isinstance(values, list):
+        raise Http404("Curseur de pagination invalide")
+    return direction, values
+
+
+class KeysetPage:
+    """Page d'un KeysetPaginator ; iterable comme une Page de Django."""
+
+    def __init__(self, object_list, paginator, has_next, has_previous, previous_is_first=False):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+        self.previous_is_first = previous_is_first
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def has_other_pages(self):
+        return self.has_next_page or self.has_previous_page
+
+    @property
+    def next_cursor(self):
+        if not self.has_next_page or not self.object_list:
+            return None
+        return self.paginator.cursor(self.object_list[-1], NEXT)
+
+    @property
+    def previous_cursor(self):
+        """None aussi quand la page precedente est la premiere (URL nue)."""
+        if not self.has_previous_page or self.previous_is_first or not self.object_list:
+            return None
+        return self.paginator.cursor(self.object_list[0], PREVIOUS)
+
+
+class KeysetPaginator:
+    """
+    ordering : champs du tri, prefixes de "-" pour un tri descendant ; le
+    dernier doit etre unique (id) pour que le curseur designe une seule ligne.
+    count_tags : tags de core/page_cache.py qui invalident le total.
+    """
+
+    def __init__(self, queryset, ordering, per_page, count_tags=()):
+        self.queryset = queryset.order_by(*ordering)
+        self.ordering = [(name.lstrip("-"), name.startswith("-")) for name in ordering]
+        self.per_page = per_page
+        self.count_tags = count_tags
+
+    # ------------------------------------------------------------------
+    # Curseurs
+    # ------------------------------------------------------------------
+    def cursor(self, obj, direction):
+        return _encode([direction, [getattr(obj, name) for name, _ in self.ordering]])
+
+    def _values(self, raw_values):
+        if len(raw_values) != len(self.ordering):
+            raise Http404("Curseur de pagination invalide")
+        if any(not isinstance(value, (str, int, float)) or isinstance(value, bool) for value in raw_values):
+            raise Http404("Curseur de pagination invalide")
+        model = self.queryset.model
+        try:
+            # clean() et pas seulement to_python() : refuse aussi None et les
+            # entiers hors des bornes de la colonne.
+            return [
+                model._meta.get_field(name).clean(value, None)
+                for (name, _), value in zip(self.ordering, raw_values)
+            ]
+        except Exception:  # ValidationError, cle absente...
+            raise Http404("Curseur de pagination invalide")
+
+    def _after(self, values, direction):
+        """Condition "strictement apres le pivot" dans le sens de lecture."""
+        condition = Q()
+        for i, ((name, descending), value) in enumerate(zip(self.ordering, values)):
+            forward = descending if direction == NEXT else not descending
+            step = Q(**{f"{name}__{'lt' if forward else 'gt'}": value})
+            for previous_name, previous_value in zip((n for n, _ in self.ordering[:i]), values[:i]):
+                step &= Q(**{previous_name: previous_value})
+            condition |= step
+        return condition
+
+    # ------------------------------------------------------------------
+    def _slice(self, cursor):
+        """(queryset de la page, limite a per_page + 1 lignes, et direction)."""
+        if not cursor:
+            return self.queryset[: self.per_page + 1], None
+
+        direction, raw_values = _decode(cursor)
+        values = self._values(raw_values)
+        try:
+            queryset = self.queryset.filter(self._after(values, direction))
+        except (TypeError, ValueError):
+            raise Http404("Curseur de pagination invalide")
+        if direction == PREVIOUS:
+            queryset = queryset.reverse()
+        return queryset[: self.per_page + 1], direction
+
+    def _rows(self, rows, direction):
+        """(lignes de la page dans l'ordre de lecture, y en a-t-il d'autres au-dela)."""
+        if direction is not None and not rows:
+            # Plus rien apres le pivot : curseur perime ou forge.
+            raise Http404("Page vide")
+        more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if direction == PREVIOUS:
+            rows.reverse()
+        return rows, more
+
+    def _beyond_previous(self, rows):
+        """Ligne qui precede la page precedente, s'il y en a une : sinon la
+        page precedente est la premiere."""
+        values = [getattr(rows[0], name) for name, _ in self.ordering]
+        return self.queryset.filter(self._after(values, PREVIOUS)).reverse()[self.per_page : self.per_page + 1]
+
+    def page(self, cursor=None):
+        queryset, direction = self._slice(cursor)
+        rows, more = self._rows(list(queryset), direction)
+        if direction is None:
+            return KeysetPage(rows, self, more, False)
+        has_previous = direction == NEXT or more
+        previous_is_first = has_previous and not self._beyond_previous(rows).exists()
+        return KeysetPage(rows, self, direction == PREVIOUS or more, has_previous, previous_is_first)
+
+    async def apage(self, cursor=None):
+        """page() par l'ORM asynchrone (core/async_views.py)."""
+        queryset, direction = self._slice(cursor)
+        rows, more = self._rows([row async for row in queryset], direction)
+        if direction is None:
+            return KeysetPage(rows, self, more, False)
+        has_previous = direction == NEXT or more
+        previous_is_first = has_previous and not await self._beyond_previous(rows).aexists()
+        return KeysetPage(rows, self, direction == PREVIOUS or more, has_previous, previous_is_first)
+
+    @property
+    def count(self):
+        """Total mis en cache, recalcule apres modification (tags)."""
+        cache = caches[settings.PAGE_CACHE_ALIAS]
+        raw = "|".join([str(self.queryset.query), *tag_versions(*self.count_tags)])
+        key = "pagination:count:" + hashlib.md5(raw.encode()).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = self.queryset.count()
+            cache.set(key, count, None)
+        return count
+
+    # ------------------------------------------------------------------
+    # Compatibilite ?page=N
+    # ------------------------------------------------------------------
+    def legacy_redirect(self, request):
+        """Redirection 301 d'un ancien lien ?page=N vers son curseur, sinon None."""
+        if "page" not in request.GET:
+            return None
+        params = request.GET.copy()
+        page = params.pop("page")[-1]
+        params.pop(CURSOR_PARAM, None)
+
+        try:
+            number = int(page)
+        except ValueError:
+            number = 1
+        if number > 1:
+            # Un seul OFFSET, pour la redirection : la ligne qui precede la page N.
+            pivot = self.queryset[(number - 1) * self.per_page - 1 : (number - 1) * self.per_page].first()
+            if pivot is not None:
+                params[CURSOR_PARAM] = self.cursor(pivot, NEXT)
+
+        query = params.urlencode()
+        return HttpResponsePermanentRedirect(f"{request.path}?{query}" if query else request.path)
+
+    async def alegacy_redirect(self, request):
+        if "page" not in request.GET:
+            return None
+        # Anciens liens seulement : la version synchrone, dans un thread.
+        return await sync_to_async(self.legacy_redirect)(request)
@@ -0,0 +1,331 @@
+"""Profilage par requete : en-tete Server-Timing et capture des requetes lentes.
+
+Aucune mesure ne disait ou passe le temps d'une vue : LOGGING n'ecrit que
+les erreurs. ProfilingMiddleware mesure, pour chaque requete :
+
+- la duree totale et celle de la vue (de process_view a la reponse) ;
+- le rendu des gabarits (backend ProfiledTemplates, config/settings.py) ;
+- le nombre et la duree des requetes SQL (connection.execute_wrapper) ;
+- les lectures de cache reussies / manquees (cache.get()).
+
+Le personnel recoit ces mesures dans l'en-tete Server-Timing (onglet
+Reseau des outils de developpement). Les requetes plus lentes que
+PROFILING_SLOW_MS, echantillonnees a PROFILING_SAMPLE_RATE, sont gardees
+avec leur SQL et l'EXPLAIN des plus lentes dans un tampon circulaire de
+PROFILING_RING_SIZE entrees, dans le cache partage (donc vu par tous les
+workers) ; la page "Requetes lentes" de l'admin les affiche.
+
+Jamais les parametres des requetes : ce sont les donnees du formulaire de
+contact, les cles de session... L'EXPLAIN de PostgreSQL, qui les recopie
+dans ses conditions, est expurge de ses litteraux.
+"""
+
+import contextvars
+import logging
+import random
+import re
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, connections
+from django.template.backends.django import DjangoTemplates
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Requete en cours de mesure (None hors ProfilingMiddleware).
+_current = contextvars.ContextVar("core_profiling", default=None)
+
+RING_KEY = "profiling:slow:seq"
+RING_TIMEOUT = 7 * 86400
+# Bornes d'une capture : requetes gardees, EXPLAIN executes, taille du SQL.
+MAX_QUERIES = 20
+MAX_EXPLAINS = 5
+MAX_SQL_LENGTH = 4000
+# Litteraux SQL ('...'::type compris) remplaces dans l'EXPLAIN.
+LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+
+
+class Profile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.total = 0.0
+        self.view = 0.0
+        self.template = 0.0
+        self.template_depth = 0
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.queries = []  # (duree, sql, params, alias), MAX_QUERIES les plus lentes
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def sql_wrapper(self, alias):
+        def wrapper(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                duration = time.perf_counter() - start
+                self.sql_count += 1
+                self.sql_time += duration
+                self.queries.append((duration, sql, None if many else params, alias))
+                if len(self.queries) > MAX_QUERIES * 2:
+                    self.queries = sorted(self.queries, key=lambda q: q[0], reverse=True)[:MAX_QUERIES]
+
+        return wrapper
+
+    def slowest_queries(self):
+        return sorted(self.queries, key=lambda q: q[0], reverse=True)[:MAX_QUERIES]
+
+    def server_timing(self):
+        return ", ".join([
+            f"total;dur={self.total * 1e3:.1f}",
+            f"view;dur={self.view * 1e3:.1f}",
+            f"tpl;dur={self.template * 1e3:.1f}",
+            f'sql;dur={self.sql_time * 1e3:.1f};desc="{self.sql_count} requetes"',
+            f'cache;desc="{self.cache_hits} hits / {self.cache_misses} misses"',
+        ])
+
+
+# ---------------------------------------------------------------------------
+# Gabarits et cache
+# ---------------------------------------------------------------------------
+class _TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        profile = _current.get()
+        if profile is None:
+            return self.template.render(context, request)
+        # Un gabarit rendu depuis un autre (render_to_string dans une balise)
+        # n'est compte qu'une fois.
+        start = time.perf_counter()
+        profile.template_depth += 1
+        try:
+            return self.template.render(context, request)
+        finally:
+            profile.template_depth -= 1
+            if not profile.template_depth:
+                profile.template += time.perf_counter() - start
+
+
+class ProfiledTemplates(DjangoTemplates):
+    """DjangoTemplates dont les gabarits mesurent leur temps de rendu."""
+
+    def from_string(self, template_code):
+        return _TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name))
+
+
+def _instrument_caches():
+    """Compte hits / misses de cache.get() pour les backends de CACHES.
+
+    get_many() de BaseCache passe par get() ; un backend qui le
+    reimplemente n'est pas compte.
+    """
+    for alias in settings.CACHES:
+        backend = import_string(settings.CACHES[alias]["BACKEND"])
+        if backend.__dict__.get("_profiled"):
+            continue
+        original = backend.get
+
+        def get(self, key, default=None, version=None, _original=original):
+            value = _original(self, key, default, version)
+            profile = _current.get()
+            if profile is not None:
+                if value is default:
+                    profile.cache_misses += 1
+                else:
+                    profile.cache_hits += 1
+            return value
+
+        backend.get = get
+        backend._profiled = True
+
+
+# ---------------------------------------------------------------------------
+# Tampon circulaire des requetes lentes
+# ---------------------------------------------------------------------------
+def _cache():
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+
+def _slot_key(slot):
+    return f"profiling:slow:{slot}"
+
+
+def _store(entry):
+    cache = _cache()
+    try:
+        seq = cache.incr(RING_KEY)
+    except ValueError:
+        seq = 1 if cache.add(RING_KEY, 1, None) else cache.incr(RING_KEY)
+    entry["seq"] = seq
+    cache.set(_slot_key(seq % settings.PROFILING_RING_SIZE), entry, RING_TIMEOUT)
+
+
+def slow_requests():
+    """Requetes lentes capturees, de la plus recente a la plus ancienne."""
+    keys = [_slot_key(slot) for slot in range(settings.PROFILING_RING_SIZE)]
+    return sorted(_cache().get_many(keys).values(), key=lambda entry: entry["seq"], reverse=True)
+
+
+def clear_slow_requests():
+    _cache().delete_many([RING_KEY] + [_slot_key(slot) for slot in range(settings.PROFILING_RING_SIZE)])
+
+
+def _explain(alias, sql, params):
+    if params is None or not sql.lstrip().upper().startswith("SELECT"):
+        return ""
+    connection = connections[alias]
+    prefix = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            rows = cursor.fetchall()
+    except DatabaseError as exc:
+        return f"(EXPLAIN impossible : {exc})"
+    # SQLite : (id, parent, notused, detail) ; PostgreSQL : une ligne de texte.
+    return LITERAL_RE.sub("'?'", "\n".join(str(row[-1]) for row in rows))
+
+
+def capture(request, response, profile):
+    queries = []
+    for index, (duration, sql, params, alias) in enumerate(profile.slowest_queries()):
+        queries.append({
+            "ms": round(duration * 1e3, 2),
+            "alias": alias,
+            "sql": sql[:MAX_SQL_LENGTH],
+            "explain": _explain(alias, sql, params) if index < MAX_EXPLAINS else "",
+        })
+    match = getattr(request, "resolver_match", None)
+    entry = {
+        "at": timezone.now(),
+        "method": request.method,
+        "path": request.get_full_path()[:500],
+        "view": match.view_name if match else "",
+        "status": response.status_code,
+        "total_ms": round(profile.total * 1e3, 1),
+        "view_ms": round(profile.view * 1e3, 1),
+        "template_ms": round(profile.template * 1e3, 1),
+        "sql_count": profile.sql_count,
+        "sql_ms": round(profile.sql_time * 1e3, 1),
+        "cache_hits": profile.cache_hits,
+        "cache_misses": profile.cache_misses,
+        "queries": queries,
+    }
+    _store(entry)
+    logger.warning(
+        "Requete lente | %s %s status=%s total=%.0fms sql=%d/%.0fms tpl=%.0fms",
+        entry["method"], entry["path"], entry["status"], entry["total_ms"],
+        entry["sql_count"], entry["sql_ms"], entry["template_ms"],
+    )
+
+
+# ---------------------------------------------------------------------------
+# Middleware
+# ---------------------------------------------------------------------------
+def _is_staff(request):
+    # Sans cookie de session, pas la peine de charger l'utilisateur.
+    if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+        return False
+    user = getattr(request, "user", None)
+    return bool(user and user.is_authenticated and user.is_staff)
+
+
+class ProfilingMiddleware:
+    """Mesure chaque requete ; Server-Timing pour le personnel, capture des lentes."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        _instrument_caches()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.PROFILING_ENABLED:
+            return self.get_response(request)
+
+        profile = Profile()
+        token = _current.set(profile)
+        try:
+            with self._wrap_sql(profile):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        sampled = self._stop(profile)
+        self._report(request, response, profile, sampled)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.PROFILING_ENABLED:
+            return await self.get_response(request)
+
+        profile = Profile()
+        token = _current.set(profile)
+        try:
+            # Les connexions sont propres a chaque thread : les wrappers SQL se
+            # posent dans celui ou l'ORM asynchrone execute ses requetes (sous
+            # ASGI, un thread par requete pour tout sync_to_async).
+            stack = await sync_to_async(self._wrap_sql)(profile)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        finally:
+            _current.reset(token)
+
+        sampled = self._stop(profile)
+        if sampled or settings.SESSION_COOKIE_NAME in request.COOKIES:
+            await sync_to_async(self._report)(request, response, profile, sampled)
+        return response
+
+    def _wrap_sql(self, profile):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(profile.sql_wrapper(connection.alias)))
+        return stack
+
+    def _stop(self, profile):
+        """Arrete les chronometres ; True si la requete est a capturer."""
+        now = time.perf_counter()
+        profile.total = now - profile.started
+        if profile.view_started is not None:
+            profile.view = now - profile.view_started
+        return (
+            profile.total * 1e3 >= settings.PROFILING_SLOW_MS
+            and random.random() < settings.PROFILING_SAMPLE_RATE
+        )
+
+    def _report(self, request, response, profile, sampled):
+        if _is_staff(request):
+            response["Server-Timing"] = profile.server_timing()
+        if sampled:
+            try:
+                capture(request, response, profile)
+            except Exception:  # la mesure ne doit jamais casser la reponse
+                logger.exception("Capture de requete lente impossible | %s", request.path)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = _current.get()
+        if profile is not None:
+            profile.view_started = time.perf_counter()
+        return None
@@ -0,0 +1,105 @@
+"""Budgets SQL par route : nombre de requetes et de lignes chargees.
+
+Rien n'empechait un N+1 ou un chargement de table entiere de se glisser
+dans les vues, les flux, les sitemaps ou les listes de l'admin : les tests
+verifiaient le comportement, pas le cout.
+
+BUDGETS associe chaque nom de route a un plafond :
+
+- queries : requetes SQL d'une requete HTTP sans cache (pire cas) ;
+- rows : objets de modele instancies (signal post_init), c'est-a-dire les
+  lignes chargees en objets. Un values() / values_list() ne compte pas :
+  il ne charge que les colonnes demandees. Entier, ou fonction des
+  reglages (pages de sitemap).
+
+Le test QueryBudgetTests (core/tests.py) parcourt toutes les routes de
+core/benchmarks/routes.py plus les pages d'admin de ADMIN_ROUTES, sur deux
+corpus de tailles differentes (seed_corpus) : il echoue si une route
+depasse son budget, si le nombre de requetes augmente avec la taille des
+donnees (motif O(n)), ou si une route publique n'a pas de budget.
+"""
+
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models.signals import post_init
+
+Budget = namedtuple("Budget", "queries rows")
+
+BUDGETS = {
+    # Pages publiques
+    "home": Budget(queries=3, rows=8),
+    "services": Budget(queries=0, rows=0),
+    "skills": Budget(queries=0, rows=0),
+    "blog": Budget(queries=4, rows=10),
+    "article_detail": Budget(queries=3, rows=1),
+    "portfolio": Budget(queries=4, rows=10),
+    "project_detail": Budget(queries=3, rows=1),
+    "contact": Budget(queries=0, rows=1),
+    "search": Budget(queries=6, rows=40),
+    "legal_page": Budget(queries=3, rows=1),
+    "article_feed": Budget(queries=3, rows=10),
+    "sitemap": Budget(queries=6, rows=lambda: 2 * settings.SITEMAP_PAGE_SIZE),
+    "sitemap_section": Budget(queries=4, rows=lambda: settings.SITEMAP_PAGE_SIZE),
+    "robots.txt": Budget(queries=0, rows=0),
+    "favicon.ico": Budget(queries=0, rows=0),
+    # Admin (connecte, session et utilisateur compris)
+    "admin:index": Budget(queries=8, rows=2),
+    "admin:core_contact_changelist": Budget(queries=8, rows=102),
+    "admin:core_article_changelist": Budget(queries=8, rows=102),
+    "admin:core_project_changelist": Budget(queries=8, rows=102),
+}
+
+# Pages d'admin mesurees en plus des routes publiques (avec parametres de requete)
+ADMIN_ROUTES = {
+    "admin:index": {},
+    "admin:core_contact_changelist": {"q": "seo"},
+    "admin:core_article_changelist": {},
+    "admin:core_project_changelist": {},
+}
+
+
+def limit(budget, field):
+    value = getattr(budget, field)
+    return value() if callable(value) else value
+
+
+class _Usage:
+    def __init__(self):
+        self.queries = 0
+        self.rows = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    def instance_loaded(self, **kwargs):
+        self.rows += 1
+
+
+def measure(client, path, query=None):
+    """(statut, requetes, lignes) d'un GET sur path, cache vide."""
+    cache.clear()
+    usage = _Usage()
+    post_init.connect(usage.instance_loaded, weak=False)
+    try:
+        with connections["default"].execute_wrapper(usage):
+            response = client.get(path, query or {})
+    finally:
+        post_init.disconnect(usage.instance_loaded)
+    return response.status_code, usage.queries, usage.rows
+
+
+def violations(name, queries, rows):
+    """Depassements de budget de la route name (liste de messages)."""
+    budget = BUDGETS.get(name)
+    if budget is None:
+        return [f"{name} : aucun budget dans core/query_budgets.py"]
+    messages = []
+    if queries > limit(budget, "queries"):
+        messages.append(f"{name} : {queries} requetes SQL (budget {limit(budget, 'queries')})")
+    if rows > limit(budget, "rows"):
+        messages.append(f"{name} : {rows} lignes chargees (budget {limit(budget, 'rows')})")
+    return messages
@@ -0,0 +1,213 @@
+"""Limitation de debit : fenetre glissante, increments atomiques.
+
+ContactForm.clean faisait cache.get() puis cache.set() sur le
+FileBasedCache : deux allers-retours disque par soumission, et deux workers
+Gunicorn pouvaient lire le meme compteur puis ecrire chacun +1 — sous une
+rafale, la limite de 5 par heure n'etait pas tenue.
+
+Un RateLimiter compte les passages d'un identifiant (IP...) sur les
+`window` dernieres secondes et refuse au-dela de `limit` :
+
+    CONTACT_LIMIT = RateLimiter("contact", limit=5, window=3600)
+    if not CONTACT_LIMIT.hit(ip):
+        ...  # refuse
+
+ou, sur n'importe quelle vue :
+
+    @ratelimit("devis", limit=3, window=600)
+    def devis(request): ...
+
+Le stockage est choisi par settings.RATE_LIMIT_STORAGE :
+
+- "database" (defaut) : un journal de passages (RateLimitHit). Le test et
+  l'ajout tiennent en un seul INSERT ... SELECT conditionnel. Sous SQLite,
+  les ecritures sont serialisees par la base (une instruction sur un
+  instantane perime echoue et est rejouee) ; sous PostgreSQL, un verrou
+  consultatif de transaction par cle serialise les passages concurrents.
+  La fenetre est donc exacte, au passage pres.
+- "cache" : deux compteurs a fenetre fixe ponderes (approximation de la
+  fenetre glissante). Le passage est compte d'abord (cache.incr), puis la
+  valeur renvoyee est comparee a la limite ; un passage refuse est
+  decompte. Atomique seulement si le backend l'est (Redis, Memcached) ;
+  pas le FileBasedCache.
+"""
+
+import hashlib
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import OperationalError, connection, transaction
+from django.http import HttpResponse
+
+from .models import RateLimitHit
+
+# Tentatives quand SQLite refuse l'ecriture (base verrouillee, instantane perime).
+SQLITE_RETRIES = 50
+
+
+def client_ip(request):
+    """IP client (proxy-aware), cle par defaut du decorateur."""
+    x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
+    if x_forwarded_for:
+        return x_forwarded_for.split(",")[0].strip()
+    return request.META.get("REMOTE_ADDR", "")
+
+
+# ---------------------------------------------------------------------------
+# Stockages
+# ---------------------------------------------------------------------------
+class DatabaseStorage:
+    """Journal glissant exact dans la table core_ratelimithit."""
+
+    def _insert_if_allowed(self, cursor, key, limit, window, now):
+        qn = connection.ops.quote_name
+        table, key_col, at_col = qn(RateLimitHit._meta.db_table), qn("key"), qn("at")
+        cursor.execute(
+            f"INSERT INTO {table} ({key_col}, {at_col}) "
+            f"SELECT %s, %s WHERE (SELECT COUNT(*) FROM {table} WHERE {key_col} = %s AND {at_col} > %s) < %s",
+            [key, now, key, now - window, limit],
+        )
+        return cursor.rowcount == 1
+
+    def hit(self, key, limit, window):
+        now = time.time()
+        if connection.vendor == "postgresql":
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [key])
+                allowed = self._insert_if_allowed(cursor, key, limit, window, now)
+        else:
+            for attempt in range(SQLITE_RETRIES):
+                try:
+                    with transaction.atomic(), connection.cursor() as cursor:
+                        allowed = self._insert_if_allowed(cursor, key, limit, window, now)
+                    break
+                except OperationalError:
+                    if attempt == SQLITE_RETRIES - 1:
+                        raise
+                    time.sleep(0.005 * (attempt + 1))
+
+        self._prune(key, now - window)
+        return allowed
+
+    def _prune(self, key, cutoff):
+        try:
+            RateLimitHit.objects.filter(key=key, at__lte=cutoff).delete()
+            # De temps en temps, on efface aussi les cles abandonnees.
+            if random.random() < 0.01:
+                retention = getattr(settings, "RATE_LIMIT_RETENTION", 86400)
+                RateLimitHit.objects.filter(at__lte=time.time() - retention).delete()
+        except OperationalError:
+            # Menage differe : sans effet sur le decompte (filtre sur `at`).
+            pass
+
+    def reset(self, key, window):
+        RateLimitHit.objects.filter(key=key).delete()
+
+
+class CacheStorage:
+    """Fenetre glissante approchee par deux compteurs a fenetre fixe."""
+
+    def __init__(self):
+        self.cache = caches[getattr(settings, "RATE_LIMIT_CACHE_ALIAS", "default")]
+
+    def _bucket_key(self, key, window, index):
+        digest = hashlib.md5(key.encode()).hexdigest()
+        return f"ratelimit:{digest}:{window}:{index}"
+
+    def _incr(self, bucket_key, timeout):
+        self.cache.add(bucket_key, 0, timeout=timeout)
+        try:
+            return self.cache.incr(bucket_key)
+        except ValueError:
+            # Compteur expire (ou evince) entre add et incr.
+            self.cache.add(bucket_key, 0, timeout=timeout)
+            return self.cache.incr(bucket_key)
+
+    def hit(self, key, limit, window):
+        now = time.time()
+        index = int(now // window)
+        current_key = self._bucket_key(key, window, index)
+        # Compter avant de comparer : deux passages simultanes ne peuvent pas
+        # lire la meme valeur (pas de get puis incr).
+        current = self._incr(current_key, window * 2)
+        previous = self.cache.get(self._bucket_key(key, window, index - 1), 0)
+
+        # Part de la fenetre precedente encore couverte par la fenetre glissante.
+        weight = 1 - (now % window) / window
+        if previous * weight + current > limit:
+            try:
+                self.cache.decr(current_key)
+            except ValueError:
+                pass
+            return False
+        return True
+
+    def reset(self, key, window):
+        index = int(time.time() // window)
+        self.cache.delete_many([self._bucket_key(key, window, index - 1), self._bucket_key(key, window, index)])
+
+
+STORAGES = {
+    "database": DatabaseStorage,
+    "cache": CacheStorage,
+}
+
+
+def get_storage(name=None):
+    name = name or getattr(settings, "RATE_LIMIT_STORAGE", "database")
+    try:
+        return STORAGES[name]()
+    except KeyError:
+        raise ValueError(f"RATE_LIMIT_STORAGE inconnu : {name!r} (attendu : {', '.join(STORAGES)})")
+
+
+# ---------------------------------------------------------------------------
+# API
+# ---------------------------------------------------------------------------
+class RateLimiter:
+    def __init__(self, name, limit, window, storage=None):
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self._storage = storage
+
+    @property
+    def storage(self):
+        # Resolu a l'usage : RATE_LIMIT_STORAGE peut changer (tests, override_settings).
+        return self._storage or get_storage()
+
+    def _key(self, ident):
+        return f"{self.name}:{ident}"
+
+    def hit(self, ident):
+        """Enregistre un passage ; False si la limite est deja atteinte."""
+        return self.storage.hit(self._key(ident), self.limit, self.window)
+
+    def reset(self, ident):
+        self.storage.reset(self._key(ident), self.window)
+
+
+def ratelimit(name, limit, window, key=client_ip, methods=("POST",)):
+    """Decorateur de vue : repond 429 au-dela de `limit` requetes par `window` s."""
+    limiter = RateLimiter(name, limit, window)
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods and not limiter.hit(key(request)):
+                response = HttpResponse(
+                    "Trop de requetes. Veuillez reessayer plus tard.",
+                    status=429,
+                    content_type="text/plain; charset=utf-8",
+                )
+                response["Retry-After"] = str(window)
+                return response
+            return view_func(request, *args, **kwargs)
+
+        wrapper.limiter = limiter
+        return wrapper
+
+    return decorator
@@ -0,0 +1,184 @@
+"""Lectures des pages publiques sur des replicas de la base (optionnel).
+
+Sans DB_REPLICAS, tout passe par "default" et ce module n'est pas charge.
+Avec, config/settings.py declare les alias replica1, replica2... (liste
+DATABASE_REPLICAS), installe ReplicaRouter et ReplicaMiddleware :
+
+- seules les requetes GET / HEAD des routes de REPLICA_ROUTES (pages
+  publiques, flux, sitemap) lisent sur un replica ; l'admin, le formulaire
+  de contact, les commandes et les taches de fond restent sur "default" ;
+- toutes les ecritures vont sur "default", comme les lectures des modeles
+  d'authentification et de session (PRIMARY_APPS, AUTH_USER_MODEL) ;
+- apres une requete POST (ou toute methode non sure), le cookie PIN_COOKIE
+  epingle le navigateur sur "default" pendant DB_REPLICA_PIN_SECONDS :
+  la redirection qui suit le formulaire de contact lit ce qui vient d'etre
+  ecrit, meme si le replica a du retard ;
+- apres une invalidation du cache de pages (enregistrement dans l'admin,
+  core/signals.py), toutes les lectures publiques restent sur "default"
+  pendant DB_REPLICA_PIN_SECONDS. Les nouvelles versions de tags sont
+  posees au commit sur le primaire : une page lue sur un replica en retard
+  serait rangee sous ces versions (cache de pages, ETag, sitemap, total de
+  la pagination) et servie perimee jusqu'au prochain enregistrement.
+
+Choix du replica, une fois par requete (toutes ses lectures sur le meme) :
+tourniquet entre les replicas sans echec depuis DB_REPLICA_RETRY_SECONDS ;
+s'ils ont tous echoue recemment, le moins recemment tombe est retente en
+premier ; sinon "default". Un echec est constate a l'ouverture de la
+connexion (ensure_connection) ; un replica qui tombe en pleine requete
+fait echouer cette requete, la suivante l'evite.
+
+En local, deux fichiers SQLite ou deux bases PostgreSQL suffisent ; la
+"replication" est une copie, a refaire apres chaque ecriture a propager :
+
+    cp db.sqlite3 db-replica.sqlite3
+    DB_REPLICAS=db-replica.sqlite3 python manage.py runserver
+
+    createdb -T horus horus_replica
+    DB_ENGINE=django.db.backends.postgresql DB_NAME=horus \\
+        DB_REPLICAS=127.0.0.1:5432/horus_replica python manage.py runserver
+"""
+
+import contextvars
+import itertools
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from .page_cache import invalidated_at
+
+logger = logging.getLogger(__name__)
+
+# Etat de la requete en cours (None hors ReplicaMiddleware : tout sur "default").
+_current = contextvars.ContextVar("core_replicas", default=None)
+
+# Noms d'URL dont les lectures peuvent aller sur un replica.
+REPLICA_ROUTES = frozenset({
+    "home", "services", "skills", "blog", "article_detail", "portfolio",
+    "project_detail", "search", "legal_page", "article_feed", "sitemap",
+    "sitemap_section",
+})
+# Applications toujours lues sur "default" (connexion, sessions, admin).
+PRIMARY_APPS = frozenset({"admin", "auth", "contenttypes", "sessions"})
+PIN_COOKIE = "db_primary"
+
+_turn = itertools.count()
+_failures = {}  # alias -> time.monotonic() du dernier echec
+
+
+class RequestState:
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.replica_reads = False
+        self.alias = None
+
+
+def choose_replica():
+    """Alias du replica a utiliser, ou "default" si aucun ne repond."""
+    replicas = list(settings.DATABASE_REPLICAS)
+    if not replicas:
+        return DEFAULT_DB_ALIAS
+    start = next(_turn)
+    ordered = [replicas[(start + i) % len(replicas)] for i in range(len(replicas))]
+    now = time.monotonic()
+    healthy = [alias for alias in ordered if now - _failures.get(alias, -1e9) >= settings.DB_REPLICA_RETRY_SECONDS]
+    failed = sorted((alias for alias in ordered if alias not in healthy), key=_failures.get)
+    for alias in healthy + failed:
+        try:
+            connections[alias].ensure_connection()
+        except DatabaseError as exc:
+            _failures[alias] = time.monotonic()
+            logger.warning("Replica indisponible, lecture ailleurs | %s err=%s", alias, exc)
+            continue
+        _failures.pop(alias, None)
+        return alias
+    return DEFAULT_DB_ALIAS
+
+
+class ReplicaRouter:
+    """DATABASE_ROUTERS : lectures publiques sur un replica, le reste sur "default"."""
+
+    def db_for_read(self, model, **hints):
+        state = _current.get()
+        if state is None or not state.replica_reads:
+            return DEFAULT_DB_ALIAS
+        if model._meta.app_label in PRIMARY_APPS or model._meta.label == settings.AUTH_USER_MODEL:
+            return DEFAULT_DB_ALIAS
+        if state.alias is None:
+            state.alias = choose_replica()
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Memes donnees partout : un objet lu sur un replica peut en referencer
+        # un lu sur "default".
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Le schema arrive sur les replicas par la replication (ou la copie).
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """Ouvre les lectures sur replica aux routes publiques ; epingle apres un POST."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = _current.set(RequestState(pinned=PIN_COOKIE in request.COOKIES))
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._pin(request, response)
+
+    async def __acall__(self, request):
+        token = _current.set(RequestState(pinned=PIN_COOKIE in request.COOKIES))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._pin(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # L'etat est modifie en place : visible aussi depuis les threads de
+        # sync_to_async, qui travaillent sur une copie du contexte.
+        state = _current.get()
+        if (
+            state is not None
+            and not state.pinned
+            and request.method in ("GET", "HEAD")
+            and request.resolver_match.url_name in REPLICA_ROUTES
+            and time.time() - invalidated_at() >= settings.DB_REPLICA_PIN_SECONDS
+        ):
+            state.replica_reads = True
+        return None
+
+    def _pin(self, request, response):
+        if request.method not in ("GET", "HEAD", "OPTIONS", "TRACE"):
+            response.set_cookie(
+                PIN_COOKIE, "1",
+                max_age=settings.DB_REPLICA_PIN_SECONDS,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -0,0 +1,249 @@
+"""Images integrees au contenu CKEditor (Article.content, LegalPage.content).
+
+Les images envoyees via ckeditor_uploader (CKEDITOR_UPLOAD_PATH, "uploads/")
+ne passent pas par ResizedImageField : elles arrivaient en pleine resolution
+d'appareil photo dans le corps des articles, rendues par {{ ...|safe }} sans
+loading="lazy" ni dimensions.
+
+Deux etapes :
+
+- a l'upload, OptimizedPillowBackend (CKEDITOR_IMAGE_BACKEND) convertit le
+  fichier en WebP d'au plus MAX_WIDTH px avant de renvoyer son URL a
+  l'editeur ;
+- a l'enregistrement du contenu (Article.save, LegalPage.save),
+  prepare_content_images() ajoute loading="lazy" et decoding="async" a
+  toutes les balises, et fait pointer vers leur version WebP les <img> dont
+  le fichier a deja ete converti. Aucun encodage pendant la requete de
+  l'admin (method=6 : plusieurs secondes par image) : s'il reste des
+  fichiers a convertir, l'objet est marque images_pending et le timer
+  build_image_variants (ou la commande optimize_content_images) appelle
+  rewrite_content_images(), qui les convertit et reecrit les balises.
+
+render_article_content() calcule enfin, une fois pour toutes a
+l'enregistrement, ce que la page article deriverait sinon du HTML brut a
+chaque requete : ancres des titres, sommaire, nombre de mots, temps de
+lecture et extrait.
+"""
+
+import html
+import math
+import re
+from io import BytesIO
+from pathlib import PurePosixPath
+from urllib.parse import unquote
+
+from ckeditor_uploader.backends import PillowBackend
+from ckeditor_uploader.utils import get_thumb_filename
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils.html import escape, strip_tags
+from django.utils.text import Truncator, slugify
+from PIL import Image, ImageOps
+
+MAX_WIDTH = 1200
+QUALITY = 82
+
+# Vitesse de lecture moyenne retenue pour le temps de lecture (mots / minute).
+WORDS_PER_MINUTE = 200
+EXCERPT_LENGTH = 300
+
+IMG_TAG_RE = re.compile(r"<img\b[^>]*>", re.IGNORECASE)
+HEADING_RE = re.compile(r"<h([23])\b([^>]*)>(.*?)</h\1\s*>", re.IGNORECASE | re.DOTALL)
+ID_ATTR_RE = re.compile(r"""\bid\s*=\s*("([^"]*)"|'([^']*)')""", re.IGNORECASE)
+# Balises de bloc : un "<h2>Titre</h2><p>Texte" ne doit pas donner "TitreTexte".
+BLOCK_TAG_RE = re.compile(
+    r"</?(?:p|div|h[1-6]|li|ul|ol|br|tr|td|th|blockquote|pre|figure|figcaption|section)\b[^>]*>",
+    re.IGNORECASE,
+)
+ATTR_RE = re.compile(r"""([^\s=/>]+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s>]+))?""")
+
+
+def optimize_upload(storage, name, encode=True):
+    """Convertit un fichier image en WebP d'au plus MAX_WIDTH px.
+
+    Retourne (nom, largeur, hauteur) du fichier optimise — le meme nom si
+    l'image etait deja conforme. Les GIF animes sont laisses tels quels.
+    Avec encode=False, seule une conversion deja faite est reprise (en-tete
+    lu, rien de decode) ; None s'il faudrait encoder.
+    """
+    with storage.open(name, "rb") as source, Image.open(source) as img:
+        width, height = img.size
+        fmt = (img.format or "").upper()
+        if getattr(img, "is_animated", False) or (fmt == "WEBP" and width <= MAX_WIDTH):
+            return name, width, height
+        if not encode:
+            converted = str(PurePosixPath(name).with_suffix(".webp"))
+            if converted == name or not storage.exists(converted):
+                return None
+            with storage.open(converted, "rb") as existing, Image.open(existing) as webp:
+                return (converted, *webp.size)
+
+        img = ImageOps.exif_transpose(img)
+        if img.width > MAX_WIDTH:
+            img.thumbnail((MAX_WIDTH, MAX_WIDTH * 10), Image.LANCZOS)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGB")
+        buffer = BytesIO()
+        img.save(buffer, format="WEBP", quality=QUALITY, method=6)
+        width, height = img.size
+
+    new_name = storage.save(str(PurePosixPath(name).with_suffix(".webp")), ContentFile(buffer.getvalue()))
+    return new_name, width, height
+
+
+class OptimizedPillowBackend(PillowBackend):
+    """Backend ckeditor_uploader qui stocke directement la version WebP."""
+
+    def save_as(self, filepath):
+        saved_path = super().save_as(filepath)
+        if not self.is_image:
+            return saved_path
+
+        new_path, _, _ = optimize_upload(self.storage_engine, saved_path)
+        if new_path != saved_path:
+            # L'original pleine resolution n'est reference nulle part.
+            self.storage_engine.delete(saved_path)
+            thumb = get_thumb_filename(saved_path)
+            if self.storage_engine.exists(thumb):
+                self.storage_engine.delete(thumb)
+            with self.storage_engine.open(new_path, "rb") as optimized:
+                self.create_thumbnail(optimized, new_path)
+        return new_path
+
+
+# ---------------------------------------------------------------------------
+# Reecriture des <img> du contenu
+# ---------------------------------------------------------------------------
+def _parse_attrs(tag):
+    inner = tag[4:].rstrip(">").rstrip("/")
+    attrs = {}
+    for key, value in ATTR_RE.findall(inner):
+        if value[:1] in ("'", '"'):
+            value = value[1:-1]
+        attrs[key.lower()] = value
+    return attrs
+
+
+def _render_tag(attrs):
+    return "<img " + " ".join(f'{key}="{escape(value)}"' for key, value in attrs.items()) + ">"
+
+
+def _upload_name(src):
+    """Nom de stockage si src pointe vers un upload CKEditor, sinon None."""
+    prefix = settings.MEDIA_URL + settings.CKEDITOR_UPLOAD_PATH
+    path = unquote(src.split("?", 1)[0])
+    if not path.startswith(prefix):
+        return None
+    return path[len(settings.MEDIA_URL):]
+
+
+def _rewrite_images(content, storage, encode):
+    """(html, balises modifiees, images encore a convertir)."""
+    if not content or "<img" not in content.lower():
+        return content, 0, 0
+    storage = storage or default_storage
+    changed = pending = 0
+
+    def replace(match):
+        nonlocal changed, pending
+        tag = match.group(0)
+        # Les entites des attributs sont decodees ici, re-echappees par _render_tag.
+        attrs = {key: html.unescape(value) for key, value in _parse_attrs(tag).items()}
+        src = attrs.get("src", "")
+        name = _upload_name(src)
+
+        done = src.lower().endswith(".webp") and "width" in attrs and "height" in attrs
+        if name and not done:
+            try:
+                if storage.exists(name):
+                    optimized = optimize_upload(storage, name, encode=encode)
+                    if optimized is None:
+                        pending += 1
+                    else:
+                        new_name, width, height = optimized
+                        attrs["src"] = storage.url(new_name)
+                        attrs.setdefault("width", str(width))
+                        attrs.setdefault("height", str(height))
+            except OSError:
+                pass
+
+        attrs.setdefault("loading", "lazy")
+        attrs.setdefault("decoding", "async")
+        new_tag = _render_tag(attrs)
+        if new_tag != tag:
+            changed += 1
+        return new_tag
+
+    return IMG_TAG_RE.sub(replace, content), changed, pending
+
+
+def rewrite_content_images(content, storage=None):
+    """Optimise les images d'un contenu HTML et complete leurs attributs.
+
+    Retourne (html, nombre de balises modifiees). Les width / height deja
+    poses dans l'editeur (taille d'affichage choisie par l'auteur) sont
+    conserves. Une balise deja traitee (WebP avec width / height)
+    n'entraine aucun acces au stockage. Hors requete : peut encoder.
+    """
+    content, changed, _ = _rewrite_images(content, storage, encode=True)
+    return content, changed
+
+
+def prepare_content_images(content, storage=None):
+    """rewrite_content_images() sans encodage, pour save().
+
+    Retourne (html, nombre d'images dont le fichier reste a convertir).
+    """
+    content, _, pending = _rewrite_images(content, storage, encode=False)
+    return content, pending
+
+
+# ---------------------------------------------------------------------------
+# Artefacts de rendu d'un article
+# ---------------------------------------------------------------------------
+def plain_text(content):
+    """Texte brut d'un fragment HTML, les blocs separes par une espace."""
+    content = BLOCK_TAG_RE.sub(" ", content or "")
+    return " ".join(html.unescape(strip_tags(content)).split())
+
+
+def render_article_content(content):
+    """Calcule le HTML final et les champs derives d'un contenu d'article.
+
+    Retourne un dict pret a etre affecte au modele :
+    content_html, toc, word_count, reading_time, excerpt.
+    Chaque <h2> / <h3> recoit un id stable (slug du titre, rendu unique),
+    repris dans le sommaire.
+    """
+    toc = []
+    used_ids = set()
+
+    def anchor(match):
+        level, attrs, inner = match.group(1), match.group(2), match.group(3)
+        title = plain_text(inner)
+        existing = ID_ATTR_RE.search(attrs)
+        if existing:
+            anchor_id = existing.group(2) or existing.group(3)
+        else:
+            base = slugify(title) or f"section-{len(toc) + 1}"
+            anchor_id, n = base, 2
+            while anchor_id in used_ids:
+                anchor_id, n = f"{base}-{n}", n + 1
+            attrs = f' id="{anchor_id}"{attrs}'
+        used_ids.add(anchor_id)
+        if title:
+            toc.append({"id": anchor_id, "title": title, "level": int(level)})
+        return f"<h{level}{attrs}>{inner}</h{level}>"
+
+    content_html = HEADING_RE.sub(anchor, content or "")
+    text = plain_text(content)
+    word_count = len(re.findall(r"\w+", text))
+
+    return {
+        "content_html": content_html,
+        "toc": toc,
+        "word_count": word_count,
+        "reading_time": max(1, math.ceil(word_count / WORDS_PER_MINUTE)),
+        "excerpt": Truncator(text).chars(EXCERPT_LENGTH),
+    }
@@ -0,0 +1,186 @@
+"""Recherche plein texte indexee pour Article et Project.
+
+Les anciens filtres "icontains" sur title / summary / content se traduisaient
+en "UPPER(...) LIKE '%...%'" : un parcours complet de la table a chaque
+recherche, de plus en plus lent a mesure que le blog grossit.
+
+L'index est stocke en base et pondere (titre > resume > contenu) :
+
+- PostgreSQL : colonne "search_vector" (tsvector GENERATED ... STORED) avec
+  un index GIN. La base la recalcule elle-meme a chaque ecriture, y compris
+  via queryset.update(). Le parseur par defaut reconnait les balises HTML du
+  contenu CKEditor comme jetons "tag", qu'aucune configuration n'indexe.
+- SQLite : table virtuelle FTS5 "<table>_fts" dont le rowid est l'id de la
+  ligne. Elle est tenue a jour par les signaux post_save / post_delete (voir
+  core/signals.py), avec le HTML deja retire.
+
+Les deux structures sont creees par la migration 0005_search_index. Si
+l'index est absent (autre moteur, SQLite sans FTS5), on retombe sur
+l'ancien filtrage "icontains" pour ne jamais casser la page de recherche.
+"""
+
+import logging
+import re
+
+from django.db import connection, connections, models, router
+from django.db.utils import OperationalError, ProgrammingError
+from django.utils.html import strip_tags
+
+from .models import Article, Project
+
+logger = logging.getLogger(__name__)
+
+# Configuration linguistique PostgreSQL (racinisation, mots vides).
+PG_CONFIG = "french"
+
+# Nombre maximum de mots pris en compte dans une requete.
+MAX_TERMS = 8
+
+# (champ, poids PostgreSQL, poids bm25 SQLite) — du plus au moins important.
+# Doit rester aligne sur la migration 0005_search_index.
+INDEXED_FIELDS = {
+    Article: (("title", "A", 10.0), ("summary", "B", 4.0), ("content", "C", 1.0)),
+    Project: (("title", "A", 10.0), ("technologies", "B", 4.0), ("description", "C", 1.0)),
+}
+
+
+def _fts_table(model):
+    return f"{model._meta.db_table}_fts"
+
+
+def _fts_query(query):
+    """Transforme la saisie utilisateur en requete FTS5 sure.
+
+    Chaque mot est cite (la syntaxe FTS5 — NEAR, OR, guillemets — n'est pas
+    exposee) et utilise en prefixe : "djan" trouve "Django". Les mots sont
+    combines en ET implicite.
+    """
+    terms = re.findall(r"\w+", query)[:MAX_TERMS]
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def _index_values(instance):
+    values = []
+    for field, _, _ in INDEXED_FIELDS[type(instance)]:
+        value = getattr(instance, field) or ""
+        if field in ("content", "description"):
+            value = strip_tags(value)
+        values.append(value)
+    return values
+
+
+# ---------------------------------------------------------------------------
+# Maintenance de l'index (SQLite uniquement, PostgreSQL s'en charge seul)
+# ---------------------------------------------------------------------------
+def index_instance(instance):
+    """Insere ou remplace la ligne FTS de l'objet."""
+    if connection.vendor != "sqlite" or type(instance) not in INDEXED_FIELDS:
+        return
+    fields = [field for field, _, _ in INDEXED_FIELDS[type(instance)]]
+    table = _fts_table(type(instance))
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE rowid = %s", [instance.pk])
+            cursor.execute(
+                f"INSERT INTO {table} (rowid, {', '.join(fields)}) "
+                f"VALUES (%s, {', '.join(['%s'] * len(fields))})",
+                [instance.pk, *_index_values(instance)],
+            )
+    except OperationalError as exc:
+        logger.warning("Index de recherche non mis a jour | %s pk=%s err=%s", table, instance.pk, exc)
+
+
+def remove_instance(instance):
+    """Retire l'objet de l'index."""
+    if connection.vendor != "sqlite" or type(instance) not in INDEXED_FIELDS:
+        return
+    table = _fts_table(type(instance))
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE rowid = %s", [instance.pk])
+    except OperationalError as exc:
+        logger.warning("Index de recherche non mis a jour | %s pk=%s err=%s", table, instance.pk, exc)
+
+
+def rebuild_index(model):
+    """Reconstruit entierement l'index d'un modele. Retourne le nombre de lignes."""
+    if connection.vendor != "sqlite":
+        return model.objects.count()
+    count = 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {_fts_table(model)}")
+    for instance in model.objects.iterator(chunk_size=500):
+        index_instance(instance)
+        count += 1
+    return count
+
+
+# ---------------------------------------------------------------------------
+# Requetes
+# ---------------------------------------------------------------------------
+def _ranked_ids(model, query, limit, where=""):
+    """Ids des objets correspondants, du plus au moins pertinent."""
+    table = model._meta.db_table
+    # Meme base que l'ORM (replica sur les pages publiques, core/replicas.py).
+    db = connections[router.db_for_read(model)]
+
+    if db.vendor == "postgresql":
+        sql = (
+            f"SELECT t.id FROM {table} t, websearch_to_tsquery(%s::regconfig, %s) q "
+            f"WHERE t.search_vector @@ q {where} "
+            f"ORDER BY ts_rank_cd(t.search_vector, q) DESC, t.id DESC LIMIT %s"
+        )
+        params = [PG_CONFIG, query, limit]
+    elif db.vendor == "sqlite":
+        fts_query = _fts_query(query)
+        if not fts_query:
+            return []
+        fts = _fts_table(model)
+        weights = ", ".join(str(weight) for _, _, weight in INDEXED_FIELDS[model])
+        sql = (
+            f"SELECT t.id FROM {fts} JOIN {table} t ON t.id = {fts}.rowid "
+            f"WHERE {fts} MATCH %s {where} "
+            f"ORDER BY bm25({fts}, {weights}), t.id DESC LIMIT %s"
+        )
+        params = [fts_query, limit]
+    else:
+        return None
+
+    with db.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _fetch_ranked(model, query, limit, where="", fallback=None, queryset=None):
+    try:
+        ids = _ranked_ids(model, query, limit, where)
+    except (OperationalError, ProgrammingError) as exc:
+        logger.warning("Index de recherche indisponible, repli icontains | %s err=%s", model.__name__, exc)
+        ids = None
+
+    if ids is None:
+        return list(fallback[:limit])
+
+    objects = (queryset if queryset is not None else model.objects.all()).in_bulk(ids)
+    return [objects[pk] for pk in ids if pk in objects]
+
+
+def search_articles(query, limit=20):
+    """Articles publies correspondant a la requete, classes par pertinence."""
+    cards = Article.objects.cards()
+    fallback = cards.published().filter(
+        models.Q(title__icontains=query)
+        | models.Q(summary__icontains=query)
+        | models.Q(content__icontains=query)
+    ).recent()
+    return _fetch_ranked(Article, query, limit, where="AND t.is_published", fallback=fallback, queryset=cards)
+
+
+def search_projects(query, limit=20):
+    """Projets correspondant a la requete, classes par pertinence."""
+    fallback = Project.objects.filter(
+        models.Q(title__icontains=query)
+        | models.Q(description__icontains=query)
+        | models.Q(technologies__icontains=query)
+    ).recent()
+    return _fetch_ranked(Project, query, limit, fallback=fallback)
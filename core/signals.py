@@ -0,0 +1,170 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import admin_search, counters, export, images, page_cache, search, spam
+from .models import Article, Contact, LegalPage, Project, SpamRule
+
+
+# ---------------------------------------------------------------------------
+# Index de recherche
+# ---------------------------------------------------------------------------
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Project)
+def update_search_index(sender, instance, **kwargs):
+    search.index_instance(instance)
+
+
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Project)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.remove_instance(instance)
+
+
+# Index trigrammes de la recherche de l'admin (voir core/admin_search.py).
+@receiver(post_save, sender=Contact)
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Project)
+def update_admin_search_index(sender, instance, **kwargs):
+    admin_search.index_instance(instance)
+
+
+@receiver(post_delete, sender=Contact)
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Project)
+def remove_from_admin_search_index(sender, instance, **kwargs):
+    admin_search.remove_instance(instance)
+
+
+# ---------------------------------------------------------------------------
+# Declinaisons responsives des images (voir core/images.py)
+# ---------------------------------------------------------------------------
+@receiver(pre_save, sender=Article)
+@receiver(pre_save, sender=Project)
+def flag_pending_image(sender, instance, raw=False, **kwargs):
+    # Nouvelle image (ou manifeste perime) : build_image_variants la reprendra.
+    if not raw and instance.image and not images.manifest_is_current(instance.image, instance.image_manifest):
+        instance.images_pending = True
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Project)
+def refresh_image_manifest(sender, instance, raw=False, **kwargs):
+    # Image retiree : seules les declinaisons sont a supprimer, sans encodage.
+    # Une nouvelle image est traitee par build_image_variants, hors requete.
+    if not raw and not instance.image:
+        images.refresh_manifest(instance)
+
+
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Project)
+def delete_image_variants(sender, instance, **kwargs):
+    images.delete_variants(instance.image.storage, instance.image_manifest)
+
+
+# ---------------------------------------------------------------------------
+# Cache de pages (voir core/page_cache.py)
+# ---------------------------------------------------------------------------
+# modele -> (tag de la liste, prefixe du tag de detail)
+PAGE_CACHE_TAGS = {
+    Article: ("articles", "article"),
+    Project: ("projects", "project"),
+    LegalPage: (None, "legal"),
+}
+
+
+def _page_cache_tags(instance):
+    list_tag, detail_prefix = PAGE_CACHE_TAGS[type(instance)]
+    slugs = {instance.slug, getattr(instance, "_page_cache_old_slug", None)} - {None, ""}
+    tags = [f"{detail_prefix}:{slug}" for slug in slugs]
+    if list_tag:
+        tags.append(list_tag)
+    return tags
+
+
+@receiver(pre_save, sender=Article)
+@receiver(pre_save, sender=Project)
+@receiver(pre_save, sender=LegalPage)
+def remember_old_slug(sender, instance, raw=False, **kwargs):
+    """Un changement de slug doit aussi invalider l'ancienne URL."""
+    if instance.pk and not raw:
+        instance._page_cache_old_slug = (
+            sender.objects.filter(pk=instance.pk).values_list("slug", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=LegalPage)
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=LegalPage)
+def invalidate_page_cache(sender, instance, **kwargs):
+    invalidate_pages(instance)
+
+
+def invalidate_pages(instance):
+    """Invalide les pages (cache et export) qui affichent instance.
+
+    Aussi appele hors signal, apres un queryset.update() (build_image_variants).
+    """
+    # Apres le commit : sinon une requete concurrente pourrait remettre en
+    # cache l'ancienne version entre l'invalidation et le commit.
+    tags = _page_cache_tags(instance)
+    transaction.on_commit(lambda: page_cache.invalidate(*tags))
+    # Les pages exportees (core/export.py) qui en dependent sont retirees :
+    # nginx retombe sur Django jusqu'au prochain `export_site --changed`.
+    transaction.on_commit(lambda: export.discard(*tags))
+
+
+# ---------------------------------------------------------------------------
+# Compteurs du tableau de bord (voir core/counters.py)
+# ---------------------------------------------------------------------------
+# modele -> {champ booleen: (compteur, valeur comptee)}
+COUNTED_FIELDS = {
+    Contact: {"is_read": ("contacts_unread", False), "is_responded": ("contacts_unanswered", False)},
+    Article: {"is_published": ("articles_published", True)},
+}
+
+
+@receiver(pre_save, sender=Contact)
+@receiver(pre_save, sender=Article)
+def remember_counted_fields(sender, instance, raw=False, **kwargs):
+    if instance.pk and not raw:
+        fields = list(COUNTED_FIELDS[sender])
+        previous = sender.objects.filter(pk=instance.pk).values(*fields).first()
+        instance._counters_previous = previous
+
+
+@receiver(post_save, sender=Contact)
+@receiver(post_save, sender=Article)
+def update_counters(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_counters_previous", None)
+    for field, (name, counted) in COUNTED_FIELDS[sender].items():
+        was = previous is not None and previous[field] == counted
+        now = getattr(instance, field) == counted
+        counters.adjust(name, int(now) - int(was))
+    if created and sender is Contact:
+        day = timezone.localdate(instance.created_at)
+        transaction.on_commit(lambda: counters.record("contacts", day))
+
+
+@receiver(post_delete, sender=Contact)
+@receiver(post_delete, sender=Article)
+def update_counters_on_delete(sender, instance, **kwargs):
+    for field, (name, counted) in COUNTED_FIELDS[sender].items():
+        if getattr(instance, field) == counted:
+            counters.adjust(name, -1)
+
+
+# ---------------------------------------------------------------------------
+# Regles anti-spam (voir core/spam.py)
+# ---------------------------------------------------------------------------
+@receiver(post_save, sender=SpamRule)
+@receiver(post_delete, sender=SpamRule)
+def bump_spam_rules_version(sender, **kwargs):
+    # Apres le commit : un worker qui reconstruirait plus tot lirait les anciennes regles.
+    transaction.on_commit(spam.bump_version)
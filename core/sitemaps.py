@@ -1,6 +1,45 @@
+"""Sitemaps du site, pre-generes et servis depuis le cache.
+
+La vue django.contrib.sitemaps chargeait chaque Project et chaque Article
+publie (colonne content comprise) et regenerait le XML a chaque passage de
+robot.
+
+Ici :
+
+- les sitemaps ne selectionnent que slug et updated_at ;
+- sitemap.xml est une liste d'URL unique tant que chaque section tient en
+  une page (SITEMAP_PAGE_SIZE URL) ; au-dela, il devient un index qui
+  pointe vers /sitemap-<section>.xml?p=N ;
+- le XML minifie et ses versions Brotli / gzip (core/compression.py) sont
+  mis en cache, avec une cle qui inclut les versions des tags "articles"
+  et "projects" de core/page_cache.py : ils ne sont regeneres qu'apres une
+  modification de contenu (core/signals.py).
+
+Un passage de robot ne fait donc aucune requete SQL ; l'ETag et le
+Last-Modified sont stockes avec l'artefact.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
 from django.contrib.sitemaps import Sitemap
+from django.contrib.sitemaps.views import SitemapIndexItem
+from django.db.models import Max
+from django.contrib.sites.shortcuts import get_current_site
+from django.core.paginator import EmptyPage, PageNotAnInteger
+from django.http import Http404, HttpResponse
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from . import compression
 from .models import Article, Project
+from .page_cache import tag_versions
+
+# Tags de core/page_cache.py dont depend le contenu des sitemaps.
+SITEMAP_TAGS = ("articles", "projects")
 
 
 class StaticViewSitemap(Sitemap):
@@ -20,13 +59,22 @@ class ProjectSitemap(Sitemap):
     changefreq = 'weekly'
     priority = 0.8 # Priorité haute pour tes réalisations
 
+    @property
+    def limit(self):
+        return settings.SITEMAP_PAGE_SIZE
+
     def items(self):
-        # On s'assure de l'ordre pour un sitemap stable
-        return Project.objects.all().order_by('-id')
+        # On s'assure de l'ordre pour un sitemap stable ; seules les colonnes
+        # utiles (get_absolute_url + lastmod) sont chargees.
+        return Project.objects.only("slug", "updated_at").recent()
 
     def lastmod(self, obj):
-        # Utilise updated_at si tu l'as, sinon created_at
-        return getattr(obj, 'updated_at', obj.created_at)
+        return obj.updated_at
+
+    def get_latest_lastmod(self):
+        # Index des sitemaps : Sitemap.get_latest_lastmod() chargerait tous
+        # les objets pour en prendre le max.
+        return self.items().aggregate(latest=Max("updated_at"))["latest"]
 
 
 class ArticleSitemap(Sitemap):
@@ -34,8 +82,120 @@ class ArticleSitemap(Sitemap):
     changefreq = 'weekly'
     priority = 0.6
 
+    @property
+    def limit(self):
+        return settings.SITEMAP_PAGE_SIZE
+
     def items(self):
-        return Article.objects.filter(is_published=True).order_by('-created_at')
+        return Article.objects.published().only("slug", "updated_at").recent()
 
     def lastmod(self, obj):
-        return getattr(obj, 'updated_at', obj.created_at)
\ No newline at end of file
+        return obj.updated_at
+
+    def get_latest_lastmod(self):
+        # Index des sitemaps : Sitemap.get_latest_lastmod() chargerait tous
+        # les objets pour en prendre le max.
+        return self.items().aggregate(latest=Max("updated_at"))["latest"]
+
+
+SITEMAPS = {
+    "static": StaticViewSitemap,
+    "blog": ArticleSitemap,
+    "projects": ProjectSitemap,
+}
+
+
+# ---------------------------------------------------------------------------
+# Generation des artefacts
+# ---------------------------------------------------------------------------
+def _urlset(sitemaps, page, site, protocol):
+    urls = []
+    for sitemap in sitemaps:
+        try:
+            urls.extend(sitemap.get_urls(page=page, site=site, protocol=protocol))
+        except EmptyPage:
+            raise Http404(f"Page {page} vide")
+        except PageNotAnInteger:
+            raise Http404(f"Page {page!r} invalide")
+    last_mods = [url["lastmod"] for url in urls if url.get("lastmod")]
+    xml = render_to_string("sitemap.xml", {"urlset": urls})
+    return xml, max(last_mods) if last_mods else None
+
+
+def _index(request, sitemaps):
+    items, last_mods = [], []
+    for section, sitemap in sitemaps.items():
+        location = request.build_absolute_uri(reverse("sitemap_section", args=[section]))
+        last_mod = sitemap.get_latest_lastmod()
+        if last_mod:
+            last_mods.append(last_mod)
+        for page in sitemap.paginator.page_range:
+            items.append(SitemapIndexItem(location if page == 1 else f"{location}?p={page}", last_mod))
+    xml = render_to_string("sitemap_index.xml", {"sitemaps": items})
+    return xml, max(last_mods) if last_mods else None
+
+
+def build_artifact(request, section=None, page=1):
+    """XML (brut et compresse), ETag et Last-Modified d'un sitemap, depuis le cache si possible."""
+    raw_key = "|".join([
+        request.scheme, request.get_host(), section or "", str(page), *tag_versions(*SITEMAP_TAGS),
+    ])
+    key = "sitemap:" + hashlib.md5(raw_key.encode()).hexdigest()
+    cache = caches[settings.PAGE_CACHE_ALIAS]
+    artifact = cache.get(key)
+    if artifact is not None:
+        return artifact
+
+    site = get_current_site(request)
+    sitemaps = {name: cls() for name, cls in SITEMAPS.items()}
+    if section is None:
+        if all(sitemap.paginator.num_pages <= 1 for sitemap in sitemaps.values()):
+            xml, last_modified = _urlset(sitemaps.values(), 1, site, request.scheme)
+        else:
+            xml, last_modified = _index(request, sitemaps)
+    else:
+        if section not in sitemaps:
+            raise Http404(f"Section de sitemap inconnue : {section}")
+        xml, last_modified = _urlset([sitemaps[section]], page, site, request.scheme)
+
+    data = compression.minify_xml(xml.encode())
+    artifact = {
+        "xml": data,
+        "encodings": compression.encode_all(data),
+        # Faible : la meme empreinte sert la version brute et les versions compressees.
+        "etag": f'W/"{hashlib.md5(data).hexdigest()}"',
+        "last_modified": last_modified,
+    }
+    cache.set(key, artifact, settings.SITEMAP_CACHE_TIMEOUT)
+    return artifact
+
+
+# ---------------------------------------------------------------------------
+# Vues
+# ---------------------------------------------------------------------------
+def _serve(request, artifact):
+    last_modified = artifact["last_modified"]
+    last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=artifact["etag"], last_modified=last_modified_ts)
+    if response is None:
+        encoding = compression.negotiate(request.headers.get("Accept-Encoding", ""), artifact["encodings"])
+        if encoding:
+            response = HttpResponse(artifact["encodings"][encoding], content_type="application/xml")
+            response["Content-Encoding"] = encoding
+        else:
+            response = HttpResponse(artifact["xml"], content_type="application/xml")
+    response["ETag"] = artifact["etag"]
+    if last_modified_ts:
+        response["Last-Modified"] = http_date(last_modified_ts)
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
+
+
+def sitemap(request):
+    """sitemap.xml : liste d'URL, ou index si une section depasse une page."""
+    return _serve(request, build_artifact(request))
+
+
+def sitemap_section(request, section):
+    """Une page d'une section : /sitemap-<section>.xml?p=N."""
+    return _serve(request, build_artifact(request, section, request.GET.get("p", 1)))
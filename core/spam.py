@@ -0,0 +1,120 @@
+"""Moteur anti-spam du formulaire de contact, compile depuis SpamRule.
+
+ContactForm.clean_message parcourait une liste Python de 35 mots-cles
+(un "keyword in message" par entree) et les listes de domaines / adresses
+bloques etaient codees en dur dans core/forms.py : chaque ajout demandait
+un deploiement, et le cout du scan croissait avec la liste.
+
+Les regles vivent desormais en base (SpamRule, editables dans l'admin) et
+sont compilees en un seul moteur :
+
+- les mots-cles en une expression reguliere unique, factorisee en trie
+  ("buy now|buy followers" -> "buy\\ (?:now|followers)") : un seul passage
+  sur le message, et le moteur de regex n'explore qu'un prefixe commun a
+  la fois, quel que soit le nombre de mots-cles ;
+- les domaines et adresses en frozenset (recherche en temps constant).
+
+Le moteur est garde par processus et reconstruit seulement quand la
+version des regles change. Cette version est un jeton stocke dans le cache
+(comme les tags de core/page_cache.py), renouvele a chaque modification
+d'une regle (core/signals.py, actions de l'admin) : un worker Gunicorn voit
+le changement au message suivant, sans interroger la table a chaque fois.
+"""
+
+import re
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.db.utils import OperationalError, ProgrammingError
+
+from .models import SpamRule
+
+VERSION_KEY = "spam:rules:version"
+
+_lock = threading.Lock()
+_engine = None
+_engine_version = None
+
+
+def _trie_pattern(words):
+    """Expression reguliere equivalente a l'alternance des mots, factorisee en trie."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}  # fin de mot
+
+    def build(node):
+        if list(node) == [""]:
+            return ""
+        ends = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if len(branches) == 1 and not ends:
+            return branches[0]
+        pattern = "(?:" + "|".join(branches) + ")"
+        return pattern + "?" if ends else pattern
+
+    return build(trie)
+
+
+class SpamEngine:
+    def __init__(self, keywords=(), domains=(), emails=()):
+        keywords = sorted({k.lower() for k in keywords if k})
+        self.keyword_re = re.compile(_trie_pattern(keywords)) if keywords else None
+        self.domains = frozenset(d.lower() for d in domains)
+        self.emails = frozenset(e.lower() for e in emails)
+
+    @classmethod
+    def from_database(cls):
+        rules = {kind: [] for kind, _ in SpamRule.KIND_CHOICES}
+        try:
+            for kind, value in SpamRule.objects.filter(is_active=True).values_list("kind", "value"):
+                rules[kind].append(value)
+        except (OperationalError, ProgrammingError):
+            # Table absente (migrations en cours) : aucun blocage plutot qu'une erreur 500.
+            pass
+        return cls(
+            keywords=rules[SpamRule.KIND_KEYWORD],
+            domains=rules[SpamRule.KIND_DOMAIN],
+            emails=rules[SpamRule.KIND_EMAIL],
+        )
+
+    def match_keyword(self, text):
+        """Premier mot-cle interdit trouve dans le texte (deja en minuscules), sinon None."""
+        if self.keyword_re is None:
+            return None
+        match = self.keyword_re.search(text)
+        return match.group(0) if match else None
+
+    def is_blocked_email(self, email):
+        return email in self.emails
+
+    def is_blocked_domain(self, domain):
+        return domain in self.domains
+
+
+def current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    """A appeler apres toute modification des regles (y compris queryset.update)."""
+    cache.set(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def get_engine():
+    """Moteur compile du processus, reconstruit si les regles ont change."""
+    global _engine, _engine_version
+    version = current_version()
+    if _engine is None or version != _engine_version:
+        with _lock:
+            if _engine is None or version != _engine_version:
+                _engine = SpamEngine.from_database()
+                _engine_version = version
+    return _engine
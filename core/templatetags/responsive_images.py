@@ -0,0 +1,36 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from core.images import manifest_is_current
+
+register = template.Library()
+
+DEFAULT_ATTRS = {"loading": "lazy", "decoding": "async"}
+
+
+@register.simple_tag
+def responsive_image(obj, sizes="100vw", **attrs):
+    """<img> avec srcset / sizes / width / height tires de obj.image_manifest.
+
+        {% responsive_image article sizes="(min-width: 1024px) 400px, 100vw" alt=article.title class="..." %}
+
+    Sans manifeste a jour (image pas encore traitee), on retombe sur l'image
+    d'origine seule ; width / height peuvent alors etre passes en attributs.
+    """
+    image = obj.image
+    manifest = getattr(obj, "image_manifest", None) or {}
+    attrs = {**DEFAULT_ATTRS, **attrs}
+
+    if manifest_is_current(image, manifest) and manifest.get("variants"):
+        attrs["srcset"] = ", ".join(
+            f"{image.storage.url(v['name'])} {v['width']}w" for v in manifest["variants"]
+        )
+        attrs["sizes"] = sizes
+        attrs["width"] = manifest["width"]
+        attrs["height"] = manifest["height"]
+
+    return format_html(
+        '<img src="{}"{}>',
+        image.url,
+        format_html_join("", ' {}="{}"', attrs.items()),
+    )
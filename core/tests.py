@@ -1,10 +1,55 @@
-from unittest.mock import patch
+import asyncio
+import gzip
+import json
+import multiprocessing
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest.mock import Mock, patch
 
-from django.test import TestCase
-from django.urls import reverse
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.db import SessionStore
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.db import DatabaseError, connection
+from django.http import Http404, HttpResponse
+from django.test.utils import CaptureQueriesContext
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import resolve, reverse
+from PIL import Image
 
+from .admin import ContactAdmin
+from .asgi import ConcurrencyLimit
 from .forms import ContactForm
-from .models import Contact
+from .unfold_callbacks import unread_contacts_badge
+from . import page_cache
+from . import admin_search
+from . import async_views
+from . import compression
+from . import counters
+from . import export
+from . import images
+from . import outbox
+from . import profiling
+from . import query_budgets
+from . import replicas
+from . import views
+from .ratelimit import RateLimiter, ratelimit
+from .pagination import KeysetPaginator, _encode
+from .models import Article, Contact, CustomUser, LegalPage, OutboundEmail, Project, SpamRule
+from .cache_backends import TieredSQLiteCache
+from .richtext import rewrite_content_images
+from .search import search_articles
+from .spam import SpamEngine, get_engine
 
 
 class ContactFormTests(TestCase):
@@ -39,9 +84,13 @@ class ContactFormTests(TestCase):
         self.assertIn("phone", form.errors)
 
 
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
 class ContactViewTests(TestCase):
-    @patch("core.views.send_mail")
-    def test_contact_view_audit_type_is_preserved_on_post(self, send_mail_mock):
+    def setUp(self):
+        # Le rate limit anti-spam vit dans le cache : pas de fuite entre tests.
+        cache.clear()
+
+    def test_contact_view_audit_type_is_preserved_on_post(self):
         response = self.client.post(
             reverse("contact"),
             data={
@@ -57,14 +106,1419 @@ class ContactViewTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(Contact.objects.count(), 1)
 
-        send_mail_mock.assert_called_once()
-        args, _ = send_mail_mock.call_args
-        self.assertIn("DEMANDE D'AUDIT", args[0])
-        self.assertIn("Type : Audit", args[1])
+        # La vue met l'email en file, sans rien envoyer pendant la requete.
+        self.assertEqual(len(mail.outbox), 0)
+        queued = OutboundEmail.objects.get()
+        self.assertIn("DEMANDE D'AUDIT", queued.subject)
+        self.assertIn("Type : Audit", queued.body)
+        self.assertEqual(queued.reply_to, ["alice@example.com"])
+
+        call_command("send_outbox", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, queued.subject)
 
     def test_contact_view_prefills_audit_message_on_get(self):
         response = self.client.get(reverse("contact"), {"type": "audit"})
 
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Mode audit prioritaire activé")
-        self.assertContains(response, "audit complet")
\ No newline at end of file
+        self.assertContains(response, "audit complet")
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.title_hit = Article.objects.create(
+            title="Optimiser PostgreSQL", summary="Index et requêtes.", content="<p>Texte.</p>"
+        )
+        self.content_hit = Article.objects.create(
+            title="Journal de bord", summary="Notes diverses.", content="<p>Un mot sur <strong>PostgreSQL</strong>.</p>"
+        )
+        Article.objects.create(
+            title="Brouillon PostgreSQL", summary="Pas encore publié.", content="<p>...</p>", is_published=False
+        )
+        self.project = Project.objects.create(
+            title="Translingo", description="Plateforme de traduction.",
+            technologies="Django, PostgreSQL", image="portfolio/translingo.webp",
+        )
+
+    def test_search_ranks_title_matches_first_and_skips_drafts(self):
+        self.assertEqual(search_articles("postgresql"), [self.title_hit, self.content_hit])
+
+    def test_search_matches_prefix_and_ignores_html_tags(self):
+        self.assertEqual(search_articles("postg"), [self.title_hit, self.content_hit])
+        self.assertEqual(search_articles("strong"), [])
+
+    def test_search_index_follows_saves_and_deletes(self):
+        self.title_hit.title = "Optimiser MySQL"
+        self.title_hit.summary = "Autre moteur."
+        self.title_hit.save()
+        self.content_hit.delete()
+
+        self.assertEqual(search_articles("postgresql"), [])
+        self.assertEqual(search_articles("mysql"), [self.title_hit])
+
+    def test_search_view_returns_articles_and_projects(self):
+        response = self.client.get(reverse("search"), {"q": "PostgreSQL"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["articles"]), [self.title_hit, self.content_hit])
+        self.assertEqual(list(response.context["projects"]), [self.project])
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        page_cache.reset_stats()
+        self.article = Article.objects.create(
+            title="Premier article", slug="premier-article", summary="Résumé.", content="<p>Corps.</p>"
+        )
+        self.other = Article.objects.create(
+            title="Second article", slug="second-article", summary="Résumé.", content="<p>Corps.</p>"
+        )
+
+    def test_second_anonymous_hit_is_served_without_queries(self):
+        url = reverse("article_detail", args=[self.article.slug])
+        self.assertEqual(self.client.get(url)["X-Page-Cache"], "MISS")
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+
+        self.assertEqual(response["X-Page-Cache"], "HIT")
+        self.assertContains(response, "Premier article")
+        self.assertEqual(page_cache.stats()["hits"], 1)
+        self.assertEqual(page_cache.stats()["misses"], 1)
+
+    def test_query_string_is_part_of_the_key(self):
+        self.client.get(reverse("blog"))
+        cursor = KeysetPaginator(Article.objects.all(), ("-created_at", "-id"), 1).cursor(self.other, "n")
+        response = self.client.get(reverse("blog"), {"c": cursor})
+
+        self.assertEqual(response["X-Page-Cache"], "MISS")
+
+    def test_only_meaningful_parameters_create_entries(self):
+        self.client.get(reverse("blog"))
+
+        response = self.client.get(reverse("blog"), {"utm_source": "newsletter", "fbclid": "abc"})
+        self.assertEqual(response["X-Page-Cache"], "HIT")
+        response = self.client.get(reverse("blog"), {"x": "123"})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Page-Cache", response)
+
+    def test_save_invalidates_only_dependent_pages(self):
+        detail = reverse("article_detail", args=[self.article.slug])
+        other_detail = reverse("article_detail", args=[self.other.slug])
+        for url in (detail, other_detail, reverse("blog"), reverse("portfolio")):
+            self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.title = "Premier article (mis à jour)"
+            self.article.save()
+
+        response = self.client.get(detail)
+        self.assertEqual(response["X-Page-Cache"], "MISS")
+        self.assertContains(response, "mis à jour")
+        self.assertEqual(self.client.get(reverse("blog"))["X-Page-Cache"], "MISS")
+        self.assertEqual(self.client.get(other_detail)["X-Page-Cache"], "HIT")
+        self.assertEqual(self.client.get(reverse("portfolio"))["X-Page-Cache"], "HIT")
+
+    def test_delete_invalidates_detail_page(self):
+        url = reverse("article_detail", args=[self.article.slug])
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.delete()
+
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_authenticated_users_bypass_the_cache(self):
+        user = CustomUser.objects.create_user(email="staff@example.com", password="secret-pass")
+        self.client.force_login(user)
+        url = reverse("article_detail", args=[self.article.slug])
+        self.client.get(url)
+
+        self.assertNotIn("X-Page-Cache", self.client.get(url))
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.article = Article.objects.create(
+            title="Premier article", slug="premier-article", summary="Résumé.", content="<p>Corps.</p>"
+        )
+
+    def test_detail_sends_validators_and_answers_304_with_one_query(self):
+        url = reverse("article_detail", args=[self.article.slug])
+        response = self.client.get(url)
+        self.assertTrue(response["ETag"].startswith('W/"'))
+        self.assertIn("Last-Modified", response)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, headers={"if-none-match": response["ETag"]})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_cached_page_keeps_validators_and_conditional_get_costs_one_query(self):
+        url = reverse("article_detail", args=[self.article.slug])
+        first = self.client.get(url)
+
+        with self.assertNumQueries(0):
+            hit = self.client.get(url)
+        self.assertEqual(hit["X-Page-Cache"], "HIT")
+        self.assertEqual(hit["ETag"], first["ETag"])
+        self.assertEqual(hit["Last-Modified"], first["Last-Modified"])
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, headers={"if-modified-since": first["Last-Modified"]})
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_when_content_changes(self):
+        url = reverse("blog")
+        etag = self.client.get(url)["ETag"]
+
+        Article.objects.create(title="Second article", summary="Résumé.", content="<p>Corps.</p>")
+
+        response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_feed_and_sitemap_support_if_modified_since(self):
+        for url in (reverse("article_feed"), "/sitemap.xml"):
+            last_modified = self.client.get(url)["Last-Modified"]
+            response = self.client.get(url, headers={"if-modified-since": last_modified})
+            self.assertEqual(response.status_code, 304, url)
+
+    def test_missing_object_still_returns_404(self):
+        response = self.client.get(reverse("article_detail", args=["inconnu"]))
+
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn("ETag", response)
+
+
+class ResponsiveImageTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def _upload(self, name="cover.jpg", size=(1600, 900)):
+        buffer = BytesIO()
+        Image.new("RGB", size, "navy").save(buffer, format="JPEG")
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+    def _build(self):
+        call_command("build_image_variants", stdout=StringIO())
+
+    def test_saving_an_image_defers_variants_to_the_command(self):
+        article = Article.objects.create(
+            title="Couverture", summary="Résumé.", content="<p>Corps.</p>", image=self._upload()
+        )
+        # Pas d'encodage pendant l'enregistrement, seulement le drapeau
+        self.assertEqual(article.image_manifest, {})
+        self.assertTrue(article.images_pending)
+        self.assertFalse(article.image.storage.exists(images.variant_name(article.image.name, 320)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._build()
+        article.refresh_from_db()
+
+        manifest = article.image_manifest
+        self.assertEqual(manifest["src"], article.image.name)
+        self.assertEqual([v["width"] for v in manifest["variants"]], [320, 640, 960, 1200])
+        for variant in manifest["variants"]:
+            self.assertTrue(article.image.storage.exists(variant["name"]))
+        self.assertFalse(article.images_pending)
+
+        # Passage a vide : une requete par modele, sans charger les lignes.
+        with self.assertNumQueries(3):
+            self._build()
+
+    def test_replacing_the_image_removes_old_variants(self):
+        article = Article.objects.create(
+            title="Couverture", summary="Résumé.", content="<p>Corps.</p>", image=self._upload()
+        )
+        self._build()
+        article.refresh_from_db()
+        old_variant = article.image_manifest["variants"][0]["name"]
+
+        article.image = self._upload("autre.jpg")
+        article.save()
+        self._build()
+        article.refresh_from_db()
+
+        self.assertFalse(article.image.storage.exists(old_variant))
+        self.assertEqual(article.image_manifest["src"], article.image.name)
+
+    def test_tag_emits_srcset_sizes_and_dimensions(self):
+        article = Article.objects.create(
+            title="Couverture", summary="Résumé.", content="<p>Corps.</p>", image=self._upload()
+        )
+        self._build()
+        article.refresh_from_db()
+        html = Template(
+            '{% load responsive_images %}{% responsive_image article sizes="50vw" alt=article.title %}'
+        ).render(Context({"article": article}))
+
+        self.assertIn("-320w.webp 320w", html)
+        self.assertIn('sizes="50vw"', html)
+        self.assertIn('width="1200"', html)
+        self.assertIn('height="675"', html)
+        self.assertIn('loading="lazy"', html)
+
+
+class OptimizeImagesCommandTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        # Image heritee : JPEG trop grand, pose sans passer par ResizedImageField.
+        (Path(self.media_root) / "blog").mkdir()
+        Image.new("RGB", (1920, 1280), "teal").save(Path(self.media_root) / "blog" / "legacy.jpg", format="JPEG")
+        self.article = Article.objects.create(title="Ancien", summary="Résumé.", content="<p>Corps.</p>")
+        Article.objects.filter(pk=self.article.pk).update(image="blog/legacy.jpg")
+
+    def _run(self, *args):
+        out = StringIO()
+        call_command("optimize_images", *args, stdout=out)
+        return out.getvalue()
+
+    def test_converts_in_a_process_pool_and_skips_untouched_files_on_rerun(self):
+        output = self._run("--jobs", "2")
+
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.image.name, "blog/legacy.webp")
+        with Image.open(self.article.image.path) as img:
+            self.assertEqual((img.format, img.size), ("WEBP", (1200, 675)))
+        self.assertIn("1 image(s) converties", output)
+        self.assertIn("images/s", output)
+
+        output = self._run()
+        self.assertIn("0 fichier(s) a examiner, 1 inchange(s)", output)
+
+    def test_since_filters_on_updated_at(self):
+        output = self._run("--dry-run", "--since", "2999-01-01")
+
+        self.assertIn("0 image(s) a convertir", output)
+
+
+class RichTextImageTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def _jpeg(self, size=(3000, 2000)):
+        buffer = BytesIO()
+        Image.new("RGB", size, "olive").save(buffer, format="JPEG")
+        return buffer.getvalue()
+
+    def test_ckeditor_upload_is_stored_as_resized_webp(self):
+        staff = CustomUser.objects.create_user(email="staff@example.com", password="secret-pass", is_staff=True)
+        self.client.force_login(staff)
+
+        response = self.client.post(
+            "/ckeditor/upload/",
+            {"upload": SimpleUploadedFile("photo.jpg", self._jpeg(), content_type="image/jpeg")},
+        )
+
+        url = response.json()["url"]
+        self.assertTrue(url.endswith(".webp"), url)
+        with Image.open(Path(self.media_root) / url.removeprefix("/media/")) as img:
+            self.assertEqual(img.size, (1200, 800))
+        self.assertEqual(list((Path(self.media_root) / "uploads").rglob("photo.jpg")), [])
+
+    def test_saving_content_defers_encoding_to_build_image_variants(self):
+        upload = Path(self.media_root) / "uploads" / "2025" / "01" / "02"
+        upload.mkdir(parents=True)
+        (upload / "legacy.jpg").write_bytes(self._jpeg())
+
+        article = Article.objects.create(
+            title="Avec image",
+            summary="Résumé.",
+            content='<p>Avant</p><img alt="Schéma &amp; flux" src="/media/uploads/2025/01/02/legacy.jpg" />'
+                    '<img src="https://cdn.example.com/x.png">',
+        )
+
+        # Au save : attributs seulement, aucun encodage dans la requete.
+        self.assertIn(
+            '<img alt="Schéma &amp; flux" src="/media/uploads/2025/01/02/legacy.jpg" '
+            'loading="lazy" decoding="async">',
+            article.content,
+        )
+        self.assertIn(
+            '<img src="https://cdn.example.com/x.png" loading="lazy" decoding="async">', article.content
+        )
+        self.assertFalse((upload / "legacy.webp").exists())
+        self.assertTrue(article.images_pending)
+
+        call_command("build_image_variants", stdout=StringIO())
+        article.refresh_from_db()
+
+        self.assertIn(
+            '<img alt="Schéma &amp; flux" src="/media/uploads/2025/01/02/legacy.webp" '
+            'loading="lazy" decoding="async" width="1200" height="800">',
+            article.content,
+        )
+        self.assertIn("legacy.webp", article.content_html)
+        self.assertFalse(article.images_pending)
+        self.assertEqual(rewrite_content_images(article.content), (article.content, 0))
+
+        # Version deja convertie : reprise directement au save.
+        other = Article.objects.create(
+            title="Meme image",
+            summary="Résumé.",
+            content='<img src="/media/uploads/2025/01/02/legacy.jpg">',
+        )
+        self.assertIn("legacy.webp", other.content)
+        self.assertFalse(other.images_pending)
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class ArticleRenderArtifactsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_save_stores_anchors_toc_and_reading_time(self):
+        body = " ".join(["mot"] * 450)
+        article = Article.objects.create(
+            title="Guide",
+            slug="guide",
+            summary="Résumé.",
+            content=f"<h2>Mise en place</h2><p>{body}</p><h3>Détails &amp; pièges</h3><h2>Mise en place</h2>",
+            is_published=True,
+        )
+
+        self.assertIn('<h2 id="mise-en-place">Mise en place</h2>', article.content_html)
+        self.assertIn('<h2 id="mise-en-place-2">', article.content_html)
+        self.assertEqual(
+            [(entry["id"], entry["level"]) for entry in article.toc],
+            [("mise-en-place", 2), ("details-pieges", 3), ("mise-en-place-2", 2)],
+        )
+        self.assertEqual(article.toc[1]["title"], "Détails & pièges")
+        self.assertEqual(article.reading_time, 3)
+        self.assertTrue(article.excerpt.startswith("Mise en place mot mot"))
+
+        response = self.client.get(reverse("article_detail", args=["guide"]))
+        self.assertContains(response, 'href="#details-pieges"')
+        self.assertContains(response, "3 min de lecture")
+
+        # Le flux lit l'extrait stocke, sans charger le corps.
+        with CaptureQueriesContext(connection) as queries:
+            feed = self.client.get(reverse("article_feed"))
+        self.assertContains(feed, "Mise en place mot mot")
+        self.assertFalse(any('"content"' in query["sql"] for query in queries.captured_queries))
+
+    def test_rebuild_command_backfills_rows_updated_outside_save(self):
+        article = Article.objects.create(title="Ancien", slug="ancien", summary="-", content="<h2>Intro</h2>")
+        Article.objects.filter(pk=article.pk).update(content="<h2>Nouveau titre</h2>", content_html="", toc=[])
+
+        out = StringIO()
+        call_command("rebuild_article_content", stdout=out)
+
+        article.refresh_from_db()
+        self.assertEqual(article.toc, [{"id": "nouveau-titre", "title": "Nouveau titre", "level": 2}])
+        self.assertIn("1 article(s) mis a jour", out.getvalue())
+
+
+class FlakyEmailBackend(LocmemEmailBackend):
+    """Backend de test : refuse les destinataires en @down.example."""
+
+    def send_messages(self, messages):
+        for message in messages:
+            if any(to.endswith("@down.example") for to in message.to):
+                raise ConnectionRefusedError("relais indisponible")
+        return super().send_messages(messages)
+
+
+@override_settings(OUTBOX_MAX_ATTEMPTS=2, OUTBOX_RETRY_DELAY=60)
+class OutboxTests(TestCase):
+    def test_drain_sends_batch_over_one_connection(self):
+        for i in range(3):
+            outbox.enqueue(f"Sujet {i}", "Corps", [f"dest{i}@example.com"])
+
+        counts = outbox.drain(connection=FlakyEmailBackend())
+
+        self.assertEqual(counts, {"sent": 3, "failed": 0, "dead": 0})
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(OutboundEmail.objects.exclude(status=OutboundEmail.STATUS_SENT).exists())
+        self.assertEqual(outbox.drain(connection=FlakyEmailBackend()), {"sent": 0, "failed": 0, "dead": 0})
+
+    def test_failures_back_off_then_go_dead(self):
+        failing = outbox.enqueue("KO", "Corps", ["x@down.example"])
+        outbox.enqueue("OK", "Corps", ["ok@example.com"])
+
+        self.assertEqual(outbox.drain(connection=FlakyEmailBackend()), {"sent": 1, "failed": 1, "dead": 0})
+        failing.refresh_from_db()
+        self.assertEqual(failing.status, OutboundEmail.STATUS_PENDING)
+        self.assertIn("relais indisponible", failing.last_error)
+        self.assertGreater(failing.next_attempt_at, failing.created_at + outbox.retry_delay(1) / 2)
+
+        # Pas encore du : le lot suivant l'ignore.
+        self.assertEqual(outbox.drain(connection=FlakyEmailBackend())["failed"], 0)
+
+        OutboundEmail.objects.filter(pk=failing.pk).update(next_attempt_at=failing.created_at)
+        self.assertEqual(outbox.drain(connection=FlakyEmailBackend())["dead"], 1)
+        failing.refresh_from_db()
+        self.assertEqual((failing.status, failing.attempts), (OutboundEmail.STATUS_DEAD, 2))
+
+        self.assertEqual(outbox.requeue(OutboundEmail.objects.all()), 1)
+        failing.refresh_from_db()
+        self.assertEqual((failing.status, failing.attempts), (OutboundEmail.STATUS_PENDING, 0))
+
+
+class RateLimiterTests(TransactionTestCase):
+    def test_concurrent_hits_respect_exact_limit(self):
+        limiter = RateLimiter("test", limit=5, window=3600)
+
+        def submit(_):
+            try:
+                return limiter.hit("10.0.0.1")
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(submit, range(24)))
+
+        self.assertEqual(results.count(True), 5)
+        self.assertFalse(limiter.hit("10.0.0.1"))
+        self.assertTrue(limiter.hit("10.0.0.2"))
+
+    def test_window_slides(self):
+        limiter = RateLimiter("slide", limit=2, window=60)
+        with patch("core.ratelimit.time.time", return_value=1000.0):
+            self.assertTrue(limiter.hit("ip"))
+        with patch("core.ratelimit.time.time", return_value=1030.0):
+            self.assertTrue(limiter.hit("ip"))
+            self.assertFalse(limiter.hit("ip"))
+        # Le premier passage sort de la fenetre, pas le second.
+        with patch("core.ratelimit.time.time", return_value=1061.0):
+            self.assertTrue(limiter.hit("ip"))
+            self.assertFalse(limiter.hit("ip"))
+
+    @override_settings(
+        RATE_LIMIT_STORAGE="cache",
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    )
+    def test_decorator_returns_429_with_cache_storage(self):
+        cache.clear()
+        view = ratelimit("vue", limit=1, window=60)(lambda request: HttpResponse("ok"))
+        factory = RequestFactory()
+
+        self.assertEqual(view(factory.post("/", REMOTE_ADDR="1.2.3.4")).status_code, 200)
+        self.assertEqual(view(factory.get("/", REMOTE_ADDR="1.2.3.4")).status_code, 200)
+        response = view(factory.post("/", REMOTE_ADDR="1.2.3.4"))
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "60")
+
+    @override_settings(
+        RATE_LIMIT_STORAGE="cache",
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    )
+    def test_cache_storage_counts_before_comparing_and_resets(self):
+        cache.clear()
+        limiter = RateLimiter("cache", limit=2, window=60)
+        with patch("core.ratelimit.time.time", return_value=1000.0):
+            self.assertEqual([limiter.hit("ip") for _ in range(4)], [True, True, False, False])
+            # Les passages refuses ne consomment rien.
+            self.assertEqual(cache.get(limiter.storage._bucket_key("cache:ip", 60, 16)), 2)
+            limiter.reset("ip")
+            self.assertTrue(limiter.hit("ip"))
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class SpamRuleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _form(self, **overrides):
+        data = {
+            "name": "Alice Ndiaye",
+            "email": "alice@example.com",
+            "message": "Besoin d'un audit sécurité complet.",
+            **overrides,
+        }
+        return ContactForm(data=data)
+
+    def test_seeded_rules_block_disposable_domains_and_keywords(self):
+        self.assertIn("email", self._form(email="bot@yopmail.com").errors)
+        self.assertIn("message", self._form(message="Great passive income, buy now!").errors)
+        self.assertTrue(self._form().is_valid())
+
+    def test_rule_changes_rebuild_the_engine(self):
+        engine = get_engine()
+        self.assertIs(get_engine(), engine)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SpamRule.objects.create(kind=SpamRule.KIND_KEYWORD, value="  Audit Sécurité ")
+
+        self.assertIsNot(get_engine(), engine)
+        self.assertIn("message", self._form().errors)
+
+    def test_trie_pattern_matches_like_substring_search(self):
+        keywords = ["buy", "buy now", "buy followers", "nft", "nigerian prince", "a.b"]
+        engine = SpamEngine(keywords=keywords)
+        for text in ["please buy now", "tokens nft", "nigerian", "axb", "a.b", "cnfts", "rien"]:
+            with self.subTest(text=text):
+                self.assertEqual(
+                    engine.match_keyword(text) is not None,
+                    any(keyword in text for keyword in keywords),
+                )
+
+
+def _tiered_cache_worker(location, action):
+    backend = TieredSQLiteCache(location, {})
+    if action == "set":
+        backend.set("shared", "du worker")
+    else:
+        for _ in range(50):
+            backend.incr("hits")
+
+
+class TieredSQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.location = Path(self.root) / "cache.sqlite3"
+
+    def _cache(self, **options):
+        return TieredSQLiteCache(self.location, {"OPTIONS": options})
+
+    def _run_workers(self, action, count):
+        context = multiprocessing.get_context("fork")
+        workers = [context.Process(target=_tiered_cache_worker, args=(self.location, action)) for _ in range(count)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+            self.assertEqual(worker.exitcode, 0)
+
+    def test_basic_operations(self):
+        backend = self._cache()
+        backend.set("a", {"x": 1})
+        self.assertEqual(backend.get("a"), {"x": 1})
+        self.assertFalse(backend.add("a", "autre"))
+        self.assertTrue(backend.add("b", 1))
+        self.assertEqual(backend.incr("b", 4), 5)
+        self.assertEqual(backend.get("b"), 5)
+        self.assertTrue(backend.delete("a"))
+        self.assertIsNone(backend.get("a"))
+
+        backend.set("court", "v", timeout=1)
+        with patch("core.cache_backends.time.time", return_value=time.time() + 5):
+            self.assertIsNone(backend.get("court"))
+            self.assertTrue(backend.add("court", "nouveau"))
+
+        backend.clear()
+        self.assertIsNone(backend.get("b"))
+
+    def test_other_process_write_invalidates_local_tier(self):
+        backend = self._cache()
+        backend.set("shared", "local")
+        self.assertEqual(backend.get("shared"), "local")  # en LRU desormais
+
+        self._run_workers("set", 1)
+
+        self.assertEqual(backend.get("shared"), "du worker")
+
+    def test_incr_is_atomic_across_processes(self):
+        backend = self._cache()
+        backend.set("hits", 0)
+
+        self._run_workers("incr", 4)
+
+        self.assertEqual(backend.get("hits"), 200)
+
+    def test_instances_share_connection_and_cull_counter(self):
+        # Sous ASGI, caches[...] construit un backend par requete.
+        first, second = self._cache(CULL_EVERY=2), self._cache(CULL_EVERY=2)
+        self.assertIs(first._connection(), second._connection())
+        with patch.object(TieredSQLiteCache, "_cull") as cull:
+            first.set("a", 1)
+            second.set("b", 2)
+        self.assertEqual(cull.call_count, 1)
+
+    def test_culling_is_bounded(self):
+        backend = self._cache(MAX_ENTRIES=20, CULL_EVERY=1, CULL_BATCH=5)
+        for i in range(60):
+            backend.set(f"k{i}", i)
+
+        conn = backend._connection()
+        count = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        self.assertLessEqual(count, 21)
+        self.assertEqual(backend.get("k59"), 59)
+        # Compteur tenu par les triggers, sans COUNT(*) au menage.
+        self.assertEqual(conn.execute("SELECT entries FROM cache_size").fetchone()[0], count)
+        backend.delete("k59")
+        backend.clear()
+        self.assertEqual(conn.execute("SELECT entries FROM cache_size").fetchone()[0], 0)
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class SitemapTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(3):
+            Article.objects.create(title=f"Article {i}", summary="-", content="<p>Corps.</p>", is_published=True)
+
+    def test_sitemap_is_served_from_cache_without_queries(self):
+        response = self.client.get("/sitemap.xml", headers={"accept-encoding": "gzip"})
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn(b"/blog/article-2/", gzip.decompress(response.content))
+
+        with self.assertNumQueries(0):
+            plain = self.client.get("/sitemap.xml")
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertContains(plain, "<urlset")
+        with self.assertNumQueries(0):
+            cached = self.client.get("/sitemap.xml", headers={"if-none-match": plain["ETag"]})
+        self.assertEqual(cached.status_code, 304)
+
+    def test_content_change_regenerates_sitemap(self):
+        self.client.get("/sitemap.xml")
+        with self.captureOnCommitCallbacks(execute=True):
+            Article.objects.create(title="Nouveau", summary="-", content="<p>.</p>", is_published=True)
+
+        self.assertContains(self.client.get("/sitemap.xml"), "/blog/nouveau/")
+
+    @override_settings(SITEMAP_PAGE_SIZE=2)
+    def test_large_section_switches_to_index(self):
+        index = self.client.get("/sitemap.xml")
+        self.assertContains(index, "<sitemapindex")
+        self.assertContains(index, "/sitemap-blog.xml?p=2")
+
+        page = self.client.get("/sitemap-blog.xml", {"p": 2})
+        self.assertEqual(page.content.count(b"<url>"), 1)
+        self.assertEqual(self.client.get("/sitemap-blog.xml", {"p": 3}).status_code, 404)
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class ListingQueryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(4):
+            Article.objects.create(title=f"Article {i}", summary="-", content="<p>Corps lourd.</p>" * 50)
+        Project.objects.create(title="Vitrine", description="-", technologies="Django",
+                               image="portfolio/inexistant.webp", is_featured=True)
+
+    def _explain(self, queryset):
+        if connection.vendor == "postgresql":
+            # Tables minuscules : sans cela PostgreSQL prefere toujours un seq scan.
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+    def test_listings_skip_heavy_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("blog"))
+        self.assertEqual(response.status_code, 200)
+        listing = [q["sql"] for q in queries if '"core_article"."title"' in q["sql"]]
+        self.assertTrue(listing)
+        for sql in listing:
+            self.assertNotIn('"core_article"."content"', sql)
+
+    def test_home_runs_two_queries(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("home"))
+        self.assertContains(response, "Vitrine")
+
+    def test_listing_filters_use_indexes(self):
+        plan = self._explain(Article.objects.published().cards().recent()[:9])
+        self.assertIn("article_published_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)  # SQLite : pas de tri a part
+
+        # Equivalent de MAX(updated_at) : le plan d'un aggregate() n'est pas accessible.
+        plan = self._explain(Article.objects.published().values("updated_at").order_by("-updated_at")[:1])
+        self.assertIn("article_published_upd_idx", plan)
+
+        plan = self._explain(Project.objects.featured().recent()[:3])
+        self.assertIn("project_featured_idx", plan)
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(20):
+            Article.objects.create(title=f"Article {i}", summary="-", content="<p>x</p>")
+        # Meme horodatage pour la moitie : seul id departage les lignes.
+        same = Article.objects.order_by("id")[:10].values_list("id", flat=True)
+        Article.objects.filter(id__in=list(same)).update(created_at=Article.objects.get(id=same[0]).created_at)
+        self.expected = list(Article.objects.recent().values_list("id", flat=True))
+
+    def _paginator(self):
+        return KeysetPaginator(Article.objects.published(), ("-created_at", "-id"), 3, count_tags=("articles",))
+
+    def test_cursors_walk_every_row_once_in_both_directions(self):
+        paginator = self._paginator()
+        page, seen, pages = paginator.page(), [], []
+        while True:
+            pages.append(page)
+            seen.extend(a.id for a in page)
+            if not page.has_next():
+                break
+            page = paginator.page(page.next_cursor)
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(len(pages), 7)
+
+        back = []
+        while page.has_previous():
+            page = paginator.page(page.previous_cursor)
+            back = [a.id for a in page] + back
+        self.assertEqual(back, self.expected[:-2])
+        self.assertFalse(page.has_previous())
+
+    def test_blog_links_and_legacy_page_redirect(self):
+        response = self.client.get(reverse("blog"))
+        next_cursor = response.context["articles"].next_cursor
+        self.assertContains(response, f'<link rel="next" href="?c={next_cursor}">', html=True)
+
+        response = self.client.get(reverse("blog"), {"page": 2})
+        self.assertEqual(response.status_code, 301)
+        self.assertEqual(response["Location"], f"{reverse('blog')}?c={next_cursor}")
+        self.assertRedirects(self.client.get(reverse("blog"), {"page": "abc"}), reverse("blog"),
+                             status_code=301)
+        self.assertEqual(self.client.get(reverse("blog"), {"c": "pas-un-curseur"}).status_code, 404)
+
+    def test_previous_link_to_the_first_page_is_the_bare_url(self):
+        paginator = self._paginator()
+        second = paginator.page(paginator.page().next_cursor)
+        self.assertTrue(second.has_previous())
+        self.assertIsNone(second.previous_cursor)
+        third = paginator.page(second.next_cursor)
+        self.assertIsNotNone(third.previous_cursor)
+        self.assertEqual([a.id for a in paginator.page(third.previous_cursor)], self.expected[3:6])
+
+        blog = reverse("blog")
+        response = self.client.get(blog, {"c": paginator.page().next_cursor})
+        self.assertContains(response, f'<link rel="prev" href="{blog}">', html=True)
+
+    def test_forged_or_stale_cursors_are_404(self):
+        paginator = self._paginator()
+        last = Article.objects.order_by("created_at", "id").first()
+        stale = paginator.cursor(last, "n")
+        forged = [
+            _encode(["n", [None, None]]),
+            _encode(["n", [[1], {"a": 1}]]),
+            _encode(["n", ["2024-01-01T00:00:00+00:00", 10**30]]),
+            stale,
+        ]
+        for cursor in forged:
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(Http404):
+                    paginator.page(cursor)
+                with self.assertRaises(Http404):
+                    async_to_sync(paginator.apage)(cursor)
+        self.assertEqual(self.client.get(reverse("blog"), {"c": stale}).status_code, 404)
+
+    def test_count_is_cached_until_content_changes(self):
+        self.assertEqual(self._paginator().count, 20)
+        with self.assertNumQueries(0):
+            self.assertEqual(self._paginator().count, 20)
+        with self.captureOnCommitCallbacks(execute=True):
+            Article.objects.create(title="Nouveau", summary="-", content="<p>x</p>")
+        self.assertEqual(self._paginator().count, 21)
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_header_is_cached_per_active_section(self):
+        first = self.client.get(reverse("services"))
+        self.assertTemplateUsed(first, "core/partials/header.html")
+        self.assertTemplateUsed(first, "core/partials/footer.html")
+
+        again = self.client.get(reverse("services"))
+        self.assertTemplateNotUsed(again, "core/partials/header.html")
+        self.assertTemplateNotUsed(again, "core/partials/footer.html")
+        self.assertEqual(again.content, first.content)
+
+        # Autre section : autre variante de l'en-tete (lien actif), meme pied de page.
+        other = self.client.get(reverse("skills"))
+        self.assertTemplateUsed(other, "core/partials/header.html")
+        self.assertTemplateNotUsed(other, "core/partials/footer.html")
+        self.assertNotEqual(
+            first.content.decode().split("<main")[0].split("<body")[1],
+            other.content.decode().split("<main")[0].split("<body")[1],
+        )
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class CompressionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Article.objects.create(title="Article compresse", summary="-", content="<p>x</p>")
+
+    def test_minify_keeps_significant_whitespace(self):
+        html = (
+            "<div>\n    <p>Un \n\n      deux</p>  <!-- note -->\n"
+            "    <pre>  garde\n    ceci</pre>\n<script>\n  var a = 1\n</script>\n</div>"
+        )
+        self.assertEqual(
+            compression.minify_html(html),
+            "<div>\n<p>Un \ndeux</p>\n<pre>  garde\n    ceci</pre>\n<script>\n  var a = 1\n</script>\n</div>",
+        )
+
+    def test_negotiate(self):
+        self.assertEqual(compression.negotiate("br;q=0, gzip"), "gzip")
+        self.assertEqual(compression.negotiate("gzip;q=0.5, *", ("br", "gzip")), "br")
+        self.assertIsNone(compression.negotiate("identity"))
+
+    def test_cache_hit_serves_stored_compressed_bytes(self):
+        first = self.client.get(reverse("blog"), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(first["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", first["Vary"])
+        html = gzip.decompress(first.content)
+        self.assertIn(b"Article compresse", html)
+        self.assertIn(b"<head>\n<meta charset", html)  # indentation retiree
+
+        with patch("core.compression.compress", side_effect=AssertionError("compression sur un hit")):
+            hit = self.client.get(reverse("blog"), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(hit["X-Page-Cache"], "HIT")
+        self.assertEqual(gzip.decompress(hit.content), html)
+
+        plain = self.client.get(reverse("blog"))
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertEqual(plain.content, html)
+
+    def test_pages_with_csrf_token_are_not_compressed(self):
+        response = self.client.get(reverse("contact"), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertNotIn("Content-Encoding", response)
+        self.assertIn("csrfmiddlewaretoken", response.content.decode())
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    STATIC_EXPORT_ORIGIN="http://testserver",
+)
+class StaticExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.article = Article.objects.create(title="Exporte", summary="-", content="<p>Corps</p>")
+        Article.objects.create(title="Brouillon", summary="-", content="-", is_published=False)
+
+    def test_full_then_incremental_export(self):
+        with self.settings(STATIC_EXPORT_ROOT=str(self.root)):
+            counts = export.export()
+            self.assertEqual(counts["skipped"], 0)
+            self.assertTrue((self.root / "index.html").exists())
+            self.assertTrue((self.root / "services/index.html").exists())
+            self.assertTrue((self.root / "feed.xml").exists())
+            page = self.root / f"blog/{self.article.slug}/index.html"
+            self.assertIn("Corps", page.read_text())
+            self.assertIn("Corps", gzip.decompress((self.root / f"blog/{self.article.slug}/index.html.gz").read_bytes()).decode())
+            self.assertFalse((self.root / "blog/brouillon").exists())
+            self.assertFalse((self.root / "contact").exists())
+
+            # Rien n'a change : aucune page rendue.
+            with self.assertNumQueries(5):  # public_paths() seulement (slugs, taille des sitemaps)
+                self.assertEqual(export.export(changed_only=True)["written"], 0)
+
+            # Un enregistrement retire aussitot les pages touchees...
+            self.article.content = "<p>Corps modifie</p>"
+            with self.captureOnCommitCallbacks(execute=True):
+                self.article.save()
+            self.assertFalse(page.exists())
+            self.assertFalse((self.root / "blog/index.html").exists())
+            self.assertTrue((self.root / "services/index.html").exists())
+
+            # ... que l'export incremental regenere seules.
+            counts = export.export(changed_only=True)
+            self.assertEqual(counts["written"], 5)  # accueil, blog, article, flux, sitemap
+            self.assertIn("Corps modifie", page.read_text())
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.article.delete()
+            self.assertEqual(export.export(changed_only=True)["removed"], 1)
+            self.assertFalse(page.exists())
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class CounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _contact(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Contact.objects.create(name="Alice", email="alice@example.com", message="Bonjour", **kwargs)
+
+    def test_badge_is_free_once_warm_and_follows_signals(self):
+        self._contact()
+        self.assertEqual(unread_contacts_badge(None), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_contacts_badge(None), 1)
+
+        contact = self._contact()
+        self.assertEqual(counters.get("contacts_unread"), 2)
+        contact.is_read = True
+        with self.captureOnCommitCallbacks(execute=True):
+            contact.save()
+        self.assertEqual(counters.get("contacts_unread"), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            contact.delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(counters.get("contacts_unread"), 1)
+        self.assertEqual(counters.reconcile("contacts_unread"), {"contacts_unread": 1})
+
+    def test_bulk_admin_actions_adjust_counters(self):
+        first = self._contact()
+        self._contact()
+        self._contact()
+        self._contact(is_read=True, is_responded=True)
+        self.assertEqual(counters.get_many("contacts_unread", "contacts_unanswered"),
+                         {"contacts_unread": 3, "contacts_unanswered": 3})
+
+        model_admin = ContactAdmin(Contact, None)
+        with self.captureOnCommitCallbacks(execute=True):
+            model_admin.mark_as_read(None, Contact.objects.all())
+            model_admin.mark_as_responded(None, Contact.objects.filter(pk=first.pk))
+        self.assertEqual(counters.get("contacts_unread"), 0)
+        self.assertEqual(counters.get("contacts_unanswered"), 2)
+
+    def test_daily_counters(self):
+        self._contact()
+        self._contact()
+        contacts = counters.daily("contacts")
+        self.assertEqual(len(contacts), 7)
+        self.assertEqual(contacts[-1][1], 2)
+        self._contact()
+        with self.assertNumQueries(0):
+            self.assertEqual(counters.daily("contacts")[-1][1], 3)
+
+        # Spam : rejet compte, rien en base.
+        response = self.client.post(reverse("contact"), data={
+            "name": "Bot", "email": "bot@example.com", "message": "Bonjour, offre speciale.",
+            "website": "http://spam.example",
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(counters.daily("spam_rejections")[-1][1], 1)
+        self.assertEqual(Contact.objects.count(), 3)
+
+
+class AdminSearchTests(TestCase):
+    def setUp(self):
+        Contact.objects.create(name="Alice Ndiaye", email="alice@example.com", message="Projet de boutique en ligne")
+        Contact.objects.create(name="Bob", email="bob@spam.example", message="Cheap BOUTIQUE pills")
+        self.old = Contact.objects.create(name="Awa", email="awa@example.com", message="Refonte du site")
+        self.model_admin = ContactAdmin(Contact, None)
+
+    def _search(self, term):
+        queryset, _ = self.model_admin.get_search_results(None, Contact.objects.all(), term)
+        return sorted(queryset.values_list("name", flat=True))
+
+    def test_index_matches_icontains(self):
+        self.assertTrue(admin_search.has_index(Contact))
+        self.assertEqual(self._search("boutique"), ["Alice Ndiaye", "Bob"])
+        self.assertEqual(self._search("outiq spam"), ["Bob"])
+        self.assertEqual(self._search('"en ligne"'), ["Alice Ndiaye"])
+        # Mot de moins de trois caracteres : icontains sur le reste.
+        self.assertEqual(self._search("ex aw"), ["Awa"])
+
+        # Index tenu a jour par les signaux.
+        self.old.message = "Boutique Shopify"
+        self.old.save()
+        self.assertEqual(self._search("boutique"), ["Alice Ndiaye", "Awa", "Bob"])
+        self.old.delete()
+        self.assertEqual(self._search("shopify"), [])
+
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM core_contact_admin_fts")
+        self.assertEqual(admin_search.rebuild_index(Contact), 2)
+        self.assertEqual(self._search("boutique"), ["Alice Ndiaye", "Bob"])
+
+    def test_estimated_count_paginator(self):
+        self.assertFalse(self.model_admin.show_full_result_count)
+        queryset = Contact.objects.all()
+        with patch.object(admin_search, "estimate_count", return_value=50000):
+            self.assertEqual(admin_search.EstimatedCountPaginator(queryset, 10).count, 50000)
+        with patch.object(admin_search, "estimate_count", return_value=20):
+            self.assertEqual(admin_search.EstimatedCountPaginator(queryset, 10).count, 3)
+        # Hors PostgreSQL : pas d'estimation, COUNT(*) exact.
+        self.assertIsNone(admin_search.estimate_count(queryset))
+
+    def test_changelist_search(self):
+        user = CustomUser.objects.create_superuser(email="admin@example.com", password="secret-pass-123")
+        self.client.force_login(user)
+        response = self.client.get(reverse("admin:core_contact_changelist"), {"q": "boutique"})
+        self.assertContains(response, "alice@example.com")
+        self.assertNotContains(response, "awa@example.com")
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class ProfilingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.staff = CustomUser.objects.create_superuser(email="admin@example.com", password="secret-pass-123")
+        Article.objects.create(title="Profil", summary="-", content="-")
+
+    def test_server_timing_for_staff_only(self):
+        response = self.client.get(reverse("blog"))
+        self.assertFalse(response.has_header("Server-Timing"))
+
+        self.client.force_login(self.staff)
+        timing = self.client.get(reverse("blog"))["Server-Timing"]
+        for metric in ("total;dur=", "view;dur=", "tpl;dur=", "sql;dur=", "cache;desc="):
+            self.assertIn(metric, timing)
+        self.assertNotIn('sql;dur=0.0;desc="0 requetes"', timing)
+
+    @override_settings(PROFILING_SLOW_MS=0, PROFILING_RING_SIZE=2)
+    def test_slow_requests_ring_buffer(self):
+        # Connecte : pas de cache de pages, chaque requete fait son SQL.
+        self.client.force_login(self.staff)
+        with self.assertLogs("core.profiling", "WARNING"):
+            for _ in range(3):
+                self.client.get(reverse("blog"))
+        entries = profiling.slow_requests()
+        self.assertEqual([entry["seq"] for entry in entries], [3, 2])
+        entry = entries[0]
+        self.assertEqual(entry["view"], "blog")
+        self.assertGreater(entry["sql_count"], 0)
+        self.assertIn("core_article", " ".join(query["sql"] for query in entry["queries"]))
+        self.assertTrue(any(query["explain"] for query in entry["queries"]))
+        # Ni parametres ni cle de session dans la capture.
+        self.assertTrue(all("params" not in query for query in entry["queries"]))
+        self.assertNotIn(self.client.session.session_key, repr(entries))
+        self.assertEqual(
+            profiling.LITERAL_RE.sub("'?'", "Index Cond: (session_key = 'abc''d'::text)"),
+            "Index Cond: (session_key = '?'::text)",
+        )
+
+        self.client.force_login(self.staff)
+        with override_settings(PROFILING_ENABLED=False):
+            response = self.client.get(reverse("admin_slow_requests"))
+            self.assertContains(response, "/blog/")
+            self.client.post(reverse("admin_slow_requests"))
+        self.assertEqual(profiling.slow_requests(), [])
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class RouteBenchmarkTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_seed_corpus_and_measure_every_route(self):
+        from .benchmarks import routes
+
+        args = ["--articles", "12", "--projects", "3", "--contacts", "40", "--force"]
+        call_command("seed_corpus", *args, stdout=StringIO())
+        self.assertEqual(Article.objects.count(), 12)
+        self.assertEqual(Contact.objects.filter(email__endswith="@seed.invalid").count(), 40)
+        self.assertTrue(Article.objects.exclude(content_html="").exists())
+        self.assertTrue(search_articles("django"))
+        # Meme graine, meme corpus
+        titles = list(Article.objects.order_by("slug").values_list("title", flat=True))
+        call_command("seed_corpus", *args, stdout=StringIO())
+        self.assertEqual(list(Article.objects.order_by("slug").values_list("title", flat=True)), titles)
+
+        results = routes.measure(requests=2)
+        measured = set(results["routes"])
+        for name in ("home", "blog", "article_detail", "project_detail", "search", "article_feed", "sitemap", "legal_page"):
+            self.assertIn(name, measured)
+            self.assertEqual(results["routes"][name]["status"], 200)
+        self.assertFalse(any(name.startswith("admin") for name in measured))
+
+        self.assertEqual(routes.compare(results, results, 0.2), [])
+
+        call_command("seed_corpus", "--flush", "--force", stdout=StringIO())
+        self.assertFalse(Article.objects.exists())
+
+    def test_compare_flags_regressions_beyond_tolerance(self):
+        from .benchmarks import routes
+
+        def route(p95_ms, queries, status=200):
+            return {"status": status, "p50_ms": 5.0, "p95_ms": p95_ms, "queries": queries}
+
+        baseline = {
+            "routes": {"blog": route(10.0, 3), "search": route(10.0, 2), "home": route(10.0, 1)},
+            "peak_rss_kb": 100000,
+        }
+        # Valeurs fixes : pas de mesure reelle, donc pas de bruit.
+        results = {
+            "routes": {
+                "blog": route(50.0, 3),
+                "search": route(10.0, 4),
+                "home": route(12.5, 1),  # dans la tolerance (10 * 1.2 + SLACK_MS)
+                "nouvelle": route(99.0, 9),  # absente de la reference : ignoree
+            },
+            "peak_rss_kb": 110000,
+        }
+        self.assertEqual(routes.compare(results, baseline, 0.2), [
+            "blog : p95_ms 10.00 -> 50.00 ms",
+            "search : requetes SQL 2 -> 4",
+        ])
+
+        results["routes"]["home"]["status"] = 500
+        results["peak_rss_kb"] = 130000
+        regressions = routes.compare(results, baseline, 0.2)
+        self.assertIn("home : statut 200 -> 500", regressions)
+        self.assertIn("RSS max 100000 -> 130000 Ko", regressions)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    SITEMAP_PAGE_SIZE=10,
+)
+class QueryBudgetTests(TestCase):
+    # Deux tailles de corpus, toutes deux au-dela d'une page de sitemap ;
+    # la seconde depasse une page de chaque liste (admin comprise).
+    SIZES = (
+        {"articles": 12, "projects": 11, "contacts": 20},
+        {"articles": 45, "projects": 30, "contacts": 130},
+    )
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.staff = self.client_class()
+        self.staff.force_login(
+            CustomUser.objects.create_superuser(email="admin@example.com", password="secret-pass-123")
+        )
+
+    def _measure_all(self):
+        from .benchmarks import routes
+
+        found, _ = routes.routes()
+        results = {}
+        for name, path in found:
+            results[name] = query_budgets.measure(self.client, path, routes.QUERY.get(name))
+        for name, query in query_budgets.ADMIN_ROUTES.items():
+            results[name] = query_budgets.measure(self.staff, reverse(name), query)
+        return results
+
+    def test_routes_stay_within_budget_at_two_sizes(self):
+        runs = []
+        for size in self.SIZES:
+            args = [f"--{key}={value}" for key, value in size.items()]
+            call_command("seed_corpus", *args, "--force", stdout=StringIO())
+            runs.append(self._measure_all())
+        small, large = runs
+
+        problems = []
+        for name, (status, queries, rows) in large.items():
+            if status >= 400:
+                problems.append(f"{name} : statut {status}")
+            problems += query_budgets.violations(name, queries, rows)
+            if queries > small[name][1]:
+                problems.append(f"{name} : {small[name][1]} -> {queries} requetes quand les donnees augmentent")
+        self.assertEqual(problems, [], "\n".join(f"{name}: {value}" for name, value in large.items()))
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.article = Article.objects.create(
+            title="Cache Django", slug="cache-django", summary="Résumé.", content="<p>Le cache de Django.</p>"
+        )
+        self.project = Project.objects.create(
+            title="Vitrine", slug="vitrine", description="Site Django.",
+            technologies="Django", image="portfolio/inexistant.webp",
+        )
+        self.legal = LegalPage.objects.create(title="confidentialite", slug="confidentialite", content="<p>Données.</p>")
+        self.factory = AsyncRequestFactory()
+
+    def _request(self, path, headers=None):
+        request = self.factory.get(path, headers=headers)
+        request.user = AnonymousUser()
+        request.session = SessionStore()
+        request._messages = FallbackStorage(request)
+        return request
+
+    async def test_async_views_render_like_sync_views(self):
+        cases = [
+            ("home", "/", {}),
+            ("blog", "/blog/", {}),
+            ("article_detail", "/blog/cache-django/", {"slug": "cache-django"}),
+            ("portfolio", "/portfolio/", {}),
+            ("project_detail", "/portfolio/vitrine/", {"slug": "vitrine"}),
+            ("search", "/recherche/?q=django", {}),
+            ("legal_page_detail", "/legal/confidentialite/", {"slug": "confidentialite"}),
+        ]
+        for name, path, kwargs in cases:
+            with self.subTest(name):
+                await sync_to_async(cache.clear)()
+                expected = await sync_to_async(getattr(views, name))(self._request(path), **kwargs)
+                await sync_to_async(cache.clear)()
+                response = await getattr(async_views, name)(self._request(path), **kwargs)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.content, expected.content)
+
+    async def test_page_cache_and_etag_apply_to_async_views(self):
+        first = await async_views.article_detail(self._request("/blog/cache-django/"), slug="cache-django")
+        self.assertEqual(first["X-Page-Cache"], "MISS")
+        second = await async_views.article_detail(self._request("/blog/cache-django/"), slug="cache-django")
+        self.assertEqual(second["X-Page-Cache"], "HIT")
+
+        request = self._request("/blog/cache-django/", headers={"If-None-Match": first["ETag"]})
+        self.assertEqual((await async_views.article_detail(request, slug="cache-django")).status_code, 304)
+        with self.assertRaises(Http404):
+            await async_views.article_detail(self._request("/blog/absent/"), slug="absent")
+
+    @override_settings(PROFILING_SLOW_MS=0)
+    async def test_middlewares_run_natively_async(self):
+        async def view(request):
+            count = await Article.objects.acount()
+            return HttpResponse(f"<html><body><p>{count} article(s)</p>{'<p>texte</p>' * 50}</body></html>")
+
+        middleware = profiling.ProfilingMiddleware(compression.CompressionMiddleware(view))
+        self.assertTrue(iscoroutinefunction(middleware))
+        request = self._request("/", headers={"Accept-Encoding": "gzip"})
+        with self.assertLogs("core.profiling", "WARNING"):
+            response = await middleware(request)
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn(b"1 article(s)", gzip.decompress(response.content))
+        entries = await sync_to_async(profiling.slow_requests)()
+        self.assertEqual(entries[0]["sql_count"], 1)
+
+    async def test_concurrency_limit_queues_extra_requests(self):
+        running, peak = 0, 0
+
+        async def app(scope, receive, send):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        limited = ConcurrencyLimit(app, 2)
+        await asyncio.gather(*(limited({"type": "http"}, None, None) for _ in range(6)))
+        self.assertEqual(peak, 2)
+
+
+class DatabaseProfileTests(SimpleTestCase):
+    def test_sqlite_profile_and_benchmark(self):
+        from .benchmarks import database
+
+        if connection.vendor != "sqlite":
+            self.skipTest("profil SQLite")
+        root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        (_, _, default), (_, alias, tuned) = database._variants(root)
+        self.assertEqual(default["OPTIONS"], {})
+
+        wrapper = database._wrapper(tuned, alias)
+        with wrapper.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+        wrapper.close()
+
+        with patch.object(database, "DURATION", 0.3):
+            results = database.run(lambda line: None, repeat=1)
+        self.assertGreater(results["SQLite profil"]["writes"], 0)
+        self.assertEqual(results["SQLite profil"]["errors"], 0)
+
+
+@override_settings(DATABASE_REPLICAS=["replica1", "replica2"], DB_REPLICA_RETRY_SECONDS=30, DB_REPLICA_PIN_SECONDS=10)
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        replicas._failures.clear()
+        self.connections = {"replica1": Mock(), "replica2": Mock()}
+        patcher = patch.object(replicas, "connections", self.connections)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(replicas._failures.clear)
+
+    def test_round_robin_skips_failed_replicas(self):
+        picks = {replicas.choose_replica() for _ in range(4)}
+        self.assertEqual(picks, {"replica1", "replica2"})
+
+        self.connections["replica1"].ensure_connection.reset_mock()
+        self.connections["replica1"].ensure_connection.side_effect = DatabaseError("down")
+        with self.assertLogs("core.replicas", "WARNING"):
+            self.assertEqual([replicas.choose_replica() for _ in range(4)], ["replica2"] * 4)
+        # Retente seulement apres DB_REPLICA_RETRY_SECONDS
+        self.assertEqual(self.connections["replica1"].ensure_connection.call_count, 1)
+
+        self.connections["replica2"].ensure_connection.side_effect = DatabaseError("down")
+        with self.assertLogs("core.replicas", "WARNING"):
+            self.assertEqual(replicas.choose_replica(), "default")
+        # Tous en echec : le moins recemment tombe est retente en premier
+        self.connections["replica1"].ensure_connection.side_effect = None
+        self.assertEqual(replicas.choose_replica(), "replica1")
+        self.assertNotIn("replica1", replicas._failures)
+
+    def _call(self, method, path, cookies=None):
+        def view(request):
+            router = replicas.ReplicaRouter()
+            return HttpResponse(f"{router.db_for_read(Article)} {router.db_for_read(CustomUser)}")
+
+        request = getattr(RequestFactory(), method)(path)
+        request.COOKIES.update(cookies or {})
+        request.resolver_match = resolve(path)
+        middleware = replicas.ReplicaMiddleware(
+            lambda request: middleware.process_view(request, view, (), {}) or view(request)
+        )
+        with patch.object(replicas, "choose_replica", return_value="replica2"):
+            return middleware(request)
+
+    def test_public_reads_go_to_replica_and_writes_pin_primary(self):
+        router = replicas.ReplicaRouter()
+        self.assertEqual(router.db_for_read(Article), "default")  # hors requete
+        self.assertEqual(router.db_for_write(Article), "default")
+        self.assertFalse(router.allow_migrate("replica1", "core"))
+        self.assertIsNone(router.allow_migrate("default", "core"))
+
+        self.assertEqual(self._call("get", reverse("blog")).content, b"replica2 default")
+        self.assertEqual(self._call("get", reverse("contact")).content, b"default default")
+
+        response = self._call("post", reverse("contact"))
+        self.assertEqual(response.content, b"default default")
+        pin = response.cookies[replicas.PIN_COOKIE]
+        self.assertEqual(pin["max-age"], 10)
+        self.assertTrue(pin["httponly"])
+        pinned = self._call("get", reverse("blog"), cookies={replicas.PIN_COOKIE: "1"})
+        self.assertEqual(pinned.content, b"default default")
+
+    def test_reads_stay_on_primary_right_after_an_invalidation(self):
+        now = time.time()
+        page_cache.invalidate("articles")
+        # Le replica a pu manquer l'ecriture : ni lecture, ni mise en cache perimee.
+        self.assertEqual(self._call("get", reverse("blog")).content, b"default default")
+        self.assertEqual(self._call("get", reverse("sitemap")).content, b"default default")
+        with patch("core.replicas.time.time", return_value=now + 11):
+            self.assertEqual(self._call("get", reverse("blog")).content, b"replica2 default")
+
+    async def test_async_views_read_from_replica(self):
+        async def view(request):
+            alias = await sync_to_async(replicas.ReplicaRouter().db_for_read)(Article)
+            return HttpResponse(alias)
+
+        async def get_response(request):
+            await sync_to_async(middleware.process_view)(request, view, (), {})
+            return await view(request)
+
+        middleware = replicas.ReplicaMiddleware(get_response)
+        request = AsyncRequestFactory().get(reverse("blog"))
+        request.resolver_match = resolve(reverse("blog"))
+        with patch.object(replicas, "choose_replica", return_value="replica1"):
+            response = await middleware(request)
+        self.assertEqual(response.content, b"replica1")
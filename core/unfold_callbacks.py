@@ -1,23 +1,24 @@
-from django.apps import apps
-from django.db.utils import OperationalError, ProgrammingError
-
-
-def _safe_count(qs) -> int:
-    try:
-        return qs.count()
-    except (OperationalError, ProgrammingError):
-        return 0
+from . import counters, page_cache
 
 
 def dashboard_callback(request, context):
-    Contact = apps.get_model("core", "Contact")
-    Article = apps.get_model("core", "Article")
+    # Compteurs maintenus (core/counters.py) : aucun COUNT(*) tant que le
+    # cache est chaud.
+    values = counters.get_many("contacts_unread", "contacts_unanswered", "articles_published")
+    contacts = counters.daily("contacts")
+    spam_rejections = counters.daily("spam_rejections")
 
-    context["kpi_unread_contacts"] = _safe_count(Contact.objects.filter(is_read=False))
-    context["kpi_published_articles"] = _safe_count(Article.objects.filter(is_published=True))
+    context["kpi_unread_contacts"] = values["contacts_unread"]
+    context["kpi_unanswered_contacts"] = values["contacts_unanswered"]
+    context["kpi_published_articles"] = values["articles_published"]
+    context["kpi_contacts_today"] = contacts[-1][1]
+    context["kpi_contacts_week"] = sum(value for day, value in contacts)
+    context["kpi_contacts_daily"] = contacts
+    context["kpi_spam_today"] = spam_rejections[-1][1]
+    context["kpi_spam_week"] = sum(value for day, value in spam_rejections)
+    context["kpi_page_cache"] = page_cache.stats()
     return context
 
 
 def unread_contacts_badge(request) -> int:
-    Contact = apps.get_model("core", "Contact")
-    return _safe_count(Contact.objects.filter(is_read=False))
+    return counters.get("contacts_unread")
@@ -1,17 +1,22 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+from .conditional import conditional_page, published_articles_state
 from .feeds import LatestArticlesFeed
 
+# Profil ASGI (config/gunicorn_asgi.py) : pages publiques en vues asynchrones.
+pages = async_views if settings.ASYNC_VIEWS else views
+
 urlpatterns = [
-    path('', views.home, name='home'),
+    path('', pages.home, name='home'),
     path('services/', views.services, name='services'),
     path('competences/', views.skills, name='skills'),
-    path('blog/', views.blog, name='blog'),
-    path('blog/<slug:slug>/', views.article_detail, name='article_detail'),
-    path('portfolio/', views.portfolio, name='portfolio'),
-    path('portfolio/<slug:slug>/', views.project_detail, name='project_detail'),
+    path('blog/', pages.blog, name='blog'),
+    path('blog/<slug:slug>/', pages.article_detail, name='article_detail'),
+    path('portfolio/', pages.portfolio, name='portfolio'),
+    path('portfolio/<slug:slug>/', pages.project_detail, name='project_detail'),
     path('contact/', views.contact, name='contact'),
-    path('recherche/', views.search, name='search'),
-    path('feed.xml', LatestArticlesFeed(), name='article_feed'),
-    path('legal/<slug:slug>/', views.legal_page_detail, name='legal_page'),
+    path('recherche/', pages.search, name='search'),
+    path('feed.xml', conditional_page(published_articles_state)(LatestArticlesFeed()), name='article_feed'),
+    path('legal/<slug:slug>/', pages.legal_page_detail, name='legal_page'),
 ]
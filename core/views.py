@@ -4,13 +4,22 @@ from django.http import HttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.template.loader import render_to_string
 from django.contrib import messages
-from django.core.mail import send_mail
 from django.conf import settings
-from django.core.paginator import Paginator
 
-from django.db import models
 from .models import LegalPage, Article, Project
 from .forms import ContactForm
+from . import counters, outbox
+from .conditional import (
+    article_state,
+    conditional_page,
+    legal_page_state,
+    project_state,
+    projects_state,
+    published_articles_state,
+)
+from .page_cache import cache_public_page
+from .pagination import CURSOR_PARAM, KeysetPaginator
+from .search import search_articles, search_projects
 
 
 # Configuration du logger
@@ -32,11 +41,12 @@ def _get_client_ip(request):
     return request.META.get("REMOTE_ADDR", "")
 
 
+@cache_public_page("articles", "projects")
 def home(request):
     """Page d'accueil optimisée"""
     # On limite les requêtes SQL pour accélérer le FCP
-    recent_articles = Article.objects.filter(is_published=True).order_by("-created_at")[:3]
-    featured_projects = Project.objects.filter(is_featured=True).order_by("-id")[:3]
+    recent_articles = Article.objects.published().cards().recent()[:3]
+    featured_projects = Project.objects.featured().recent()[:3]
 
     return render(request, "core/home.html", {
         "recent_articles": recent_articles,
@@ -52,35 +62,31 @@ def skills(request):
     return render(request, "core/skills.html")
 
 
+@conditional_page(published_articles_state)
+@cache_public_page("articles")
 def blog(request):
-    """Liste des articles avec pagination"""
-    articles_list = Article.objects.filter(is_published=True).order_by("-created_at")
-    paginator = Paginator(articles_list, 9)
-    page_number = request.GET.get("page")
-    articles = paginator.get_page(page_number)
+    """Liste des articles, paginee par curseur (created_at, id)"""
+    # Les cartes n'affichent que le resume et le temps de lecture precalcule :
+    # inutile de charger le corps des articles.
+    paginator = KeysetPaginator(
+        Article.objects.published().cards(), ("-created_at", "-id"), 9, count_tags=("articles",)
+    )
+    legacy = paginator.legacy_redirect(request)
+    if legacy:
+        return legacy
+    articles = paginator.page(request.GET.get(CURSOR_PARAM))
     return render(request, "core/blog.html", {"articles": articles})
 
 
 def search(request):
-    """Recherche sur les articles et projets"""
+    """Recherche sur les articles et projets, classee par pertinence"""
     query = request.GET.get("q", "").strip()
     articles = []
     projects = []
 
     if query:
-        articles = Article.objects.filter(
-            is_published=True
-        ).filter(
-            models.Q(title__icontains=query)
-            | models.Q(summary__icontains=query)
-            | models.Q(content__icontains=query)
-        ).order_by("-created_at")[:20]
-
-        projects = Project.objects.filter(
-            models.Q(title__icontains=query)
-            | models.Q(description__icontains=query)
-            | models.Q(technologies__icontains=query)
-        ).order_by("-id")[:20]
+        articles = search_articles(query, limit=20)
+        projects = search_projects(query, limit=20)
 
     return render(request, "core/search.html", {
         "query": query,
@@ -89,8 +95,12 @@ def search(request):
     })
 
 
+@conditional_page(article_state)
+@cache_public_page("article:{slug}")
 def article_detail(request, slug):
-    article = get_object_or_404(Article, slug=slug, is_published=True)
+    # Le gabarit affiche content_html (core/richtext.py) : le corps brut, aussi
+    # lourd, n'est lu qu'en secours pour une ligne sans artefacts.
+    article = get_object_or_404(Article.objects.defer("content"), slug=slug, is_published=True)
     return render(request, "core/article_detail.html", {"article": article})
 
 
@@ -136,22 +146,15 @@ Message :
             from_email = getattr(settings, "DEFAULT_FROM_EMAIL", None)
 
             if recipient_email and from_email:
-                try:
-                    send_mail(
-                        subject,
-                        message,
-                        from_email,
-                        [recipient_email],
-                        fail_silently=False,
-                    )
-                except Exception as e:
-                    logger.error(
-                        "Erreur envoi email contact | email=%s ip=%s err=%s",
-                        contact_obj.email,
-                        client_ip,
-                        e,
-                        exc_info=True,
-                    )
+                # Mise en file seulement : l'envoi SMTP se fait hors requete
+                # (commande send_outbox), un relais lent ne bloque plus le worker.
+                outbox.enqueue(
+                    subject,
+                    message,
+                    [recipient_email],
+                    from_email=from_email,
+                    reply_to=[contact_obj.email],
+                )
             else:
                 logger.warning(
                     "Email non envoyé : DEFAULT_FROM_EMAIL ou PUBLIC_EMAIL manquant "
@@ -178,6 +181,9 @@ Message :
                 return redirect(f"{request.path}?type={AUDIT_REQUEST_TYPE}")
             return redirect("contact")
 
+        if form.spam_detected:
+            counters.record("spam_rejections")
+
         # ✅ Log utile si validation échoue (anti-spam / erreurs)
         logger.warning(
             "Contact form invalide | ip=%s ua=%s errors=%s",
@@ -197,23 +203,29 @@ Message :
     })
 
 
+@conditional_page(projects_state)
+@cache_public_page("projects")
 def portfolio(request):
-    """Page Portfolio avec pagination et correction order_by"""
-    projects_list = Project.objects.all().order_by("-id")
-
+    """Page Portfolio, paginee par curseur (id)"""
     # Pagination : 9 projets par page
-    paginator = Paginator(projects_list, 9)
-    page_number = request.GET.get("page")
-    projects = paginator.get_page(page_number)
+    paginator = KeysetPaginator(Project.objects.all(), ("-id",), 9, count_tags=("projects",))
+    legacy = paginator.legacy_redirect(request)
+    if legacy:
+        return legacy
+    projects = paginator.page(request.GET.get(CURSOR_PARAM))
 
     return render(request, "core/portfolio.html", {"projects": projects})
 
 
+@conditional_page(project_state)
+@cache_public_page("project:{slug}")
 def project_detail(request, slug):
     project = get_object_or_404(Project, slug=slug)
     return render(request, "core/project_detail.html", {"project": project})
 
 
+@conditional_page(legal_page_state)
+@cache_public_page("legal:{slug}")
 def legal_page_detail(request, slug):
     page = get_object_or_404(LegalPage, slug=slug)
     return render(request, "core/legal.html", {"page": page})
@@ -40,7 +40,27 @@ echo "📦 Collecte des fichiers statiques..."
 # --clear vide l'ancien dossier static pour éviter les résidus
 python3 manage.py collectstatic --noinput --clear
 
-# 6. Redémarrage des services
+# 6. Export statique des pages publiques (servi par nginx, voir core/export.py)
+# Complet : les gabarits ont pu changer. Seuls les fichiers modifies sont reecrits.
+# En www-data, comme Gunicorn (discard) et horus-export.timer (--changed).
+echo "🗂️ Export statique des pages publiques..."
+sudo -u www-data venv/bin/python manage.py export_site
+
+# 7. Tâches de fond : units systemd du dossier systemd/ (timers et services)
+echo "⏱️ Installation des tâches de fond..."
+sudo install -m 644 systemd/*.service systemd/*.timer /etc/systemd/system/
+sudo systemctl daemon-reload
+for timer in systemd/*.timer; do
+    sudo systemctl enable --now "$(basename "$timer")"
+done
+# Services permanents (sans timer) : relances pour charger le nouveau code
+for service in systemd/*.service; do
+    [ -e "${service%.service}.timer" ] && continue
+    sudo systemctl enable "$(basename "$service")"
+    sudo systemctl restart "$(basename "$service")"
+done
+
+# 8. Redémarrage des services
 echo "⚙️ Redémarrage de Gunicorn et Nginx..."
 sudo systemctl restart gunicorn
 sudo systemctl reload nginx